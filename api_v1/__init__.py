@@ -1 +1,3 @@
-import locale
\ No newline at end of file
+import locale
+
+default_app_config = 'api_v1.apps.ApiV1Config'
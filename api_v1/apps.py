@@ -3,3 +3,10 @@ from django.apps import AppConfig
 
 class ApiV1Config(AppConfig):
     name = 'api_v1'
+
+    def ready(self):
+        # Connect the match chat, match feed, tile cache and metrics signal receivers
+        import api_v1.chat.events  # noqa: F401
+        import api_v1.feed.events  # noqa: F401
+        import api_v1.geocache.tiles  # noqa: F401
+        import api_v1.metrics.events  # noqa: F401
@@ -0,0 +1,4 @@
+from .broker import *
+from .events import *
+from .writer import *
+from .consumer import *
@@ -0,0 +1,268 @@
+import os
+import time
+import select
+import asyncio
+import logging
+import threading
+
+import psycopg2
+
+from django.conf import settings
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.utils.module_loading import import_string
+
+from api_v1.core import json_dumps, json_loads
+
+logger = logging.getLogger(__name__)
+
+
+def match_channel(match_id):
+    return f'match.{match_id}'
+
+
+class Subscription:
+    """
+    Messages of a broker channel, received by the event loop that created it.
+    Messages are dropped when the subscriber is `max_pending` messages behind.
+    """
+    def __init__(self, broker, channel, max_pending=100):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_event_loop()
+        self.queue = asyncio.Queue(maxsize=max_pending)
+
+    def deliver(self, message):
+        # Called from any thread
+        if not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.put, message)
+
+    def put(self, message):
+        if not self.queue.full():
+            self.queue.put_nowait(message)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class CallbackSubscription:
+    """
+    Messages of a broker channel passed to `callback`, in the thread that
+    delivers them (the publisher's or the broker listener's), so it must be
+    quick and thread safe.
+    """
+    def __init__(self, broker, channel, callback):
+        self.broker = broker
+        self.channel = channel
+        self.callback = callback
+
+    def deliver(self, message):
+        try:
+            self.callback(message)
+        except Exception:
+            logger.exception('Broker callback of %s failed', self.channel)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    """
+    Publish/subscribe of JSON serializable messages in named channels.
+    `publish` may be called from any thread.
+    """
+    def subscribe(self, channel, callback=None):
+        """
+        Subscription to the messages of `channel`, read from the event loop
+        (`await subscription.get()`), or passed to `callback` if given.
+        """
+        raise NotImplementedError
+
+    async def asubscribe(self, channel):
+        """
+        `subscribe` from the event loop, once the broker can deliver the
+        messages of the channel.
+        """
+        return self.subscribe(channel)
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+    def publish(self, channel, message):
+        raise NotImplementedError
+
+    def has_subscribers(self, channel):
+        """
+        False only if no process is subscribed to the channel, so the
+        publisher can skip building the message.
+        """
+        return True
+
+
+class InProcessBroker(Broker):
+    """
+    Broker of a single process: messages reach only the subscribers of the
+    process that published them. Use it only with a single worker process
+    (or in tests), see PostgresBroker.
+    """
+    def __init__(self):
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel, callback=None):
+        if callback is not None:
+            subscription = CallbackSubscription(self, channel, callback)
+        else:
+            subscription = Subscription(self, channel)
+        with self._lock:
+            self._subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.channel, None)
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.deliver(message)
+
+    def has_subscribers(self, channel):
+        with self._lock:
+            return bool(self._subscriptions.get(channel))
+
+
+class PostgresBroker(Broker):
+    """
+    Broker of all the processes using the database, by PostgreSQL
+    LISTEN/NOTIFY, so participants connected to different workers receive
+    each other's messages.
+
+    Messages of every channel are sent as notifications of a single
+    PostgreSQL channel, and each process dispatches them to its own
+    subscribers (an InProcessBroker). A daemon thread of each process
+    listens on a dedicated connection, opened on the first subscription and
+    reopened if lost; messages published while it reconnects are lost.
+    Subscribe with `asubscribe` from the event loop, to wait for it.
+    Payloads are limited by PostgreSQL to 8000 bytes, larger messages are
+    logged and dropped.
+    """
+    notify_channel = 'applada_broker'
+    max_payload_size = 7999
+    listen_timeout = 5  # seconds
+    reconnect_interval = 1  # seconds
+
+    def __init__(self, alias=DEFAULT_DB_ALIAS):
+        self.alias = alias
+        self._local = InProcessBroker()
+        self._pid = None
+        self._listener = None
+        self._listening = threading.Event()
+        self._listener_lock = threading.Lock()
+        self._publish_connection = None
+        self._publish_lock = threading.Lock()
+
+    def connect(self):
+        connection = psycopg2.connect(**connections[self.alias].get_connection_params())
+        connection.autocommit = True
+        return connection
+
+    def subscribe(self, channel, callback=None):
+        self.start()
+        return self._local.subscribe(channel, callback)
+
+    async def asubscribe(self, channel):
+        subscription = self.subscribe(channel)
+        # The listener may be connecting, without blocking the event loop
+        await asyncio.get_event_loop().run_in_executor(None, self._listening.wait, self.listen_timeout)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self._local.unsubscribe(subscription)
+
+    def publish(self, channel, message):
+        payload = json_dumps({'channel': channel, 'message': message}).decode('utf-8')
+        if len(payload.encode('utf-8')) > self.max_payload_size:
+            logger.error('Message of %d bytes not published to %s, the limit is %d bytes',
+                         len(payload.encode('utf-8')), channel, self.max_payload_size)
+            return
+        with self._publish_lock:
+            # A closed connection is reopened once
+            for attempt in range(2):
+                try:
+                    if self._publish_connection is None or self._publish_connection.closed:
+                        self._publish_connection = self.connect()
+                    with self._publish_connection.cursor() as cursor:
+                        cursor.execute('SELECT pg_notify(%s, %s)', (self.notify_channel, payload))
+                    return
+                except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                    self.close_publish_connection()
+                    if attempt:
+                        raise
+
+    def close_publish_connection(self):
+        if self._publish_connection is not None:
+            self._publish_connection.close()
+            self._publish_connection = None
+
+    def start(self):
+        """
+        Start the listener thread of the process, if it is not running. It
+        does not wait for the listener to connect, see `asubscribe`.
+        """
+        with self._listener_lock:
+            # Threads are not inherited by forked worker processes
+            if self._pid != os.getpid() or not self._listener.is_alive():
+                self._pid = os.getpid()
+                self._listening.clear()
+                self._listener = threading.Thread(target=self.listen, name='PostgresBroker', daemon=True)
+                self._listener.start()
+
+    def listen(self):
+        while True:
+            connection = None
+            try:
+                connection = self.connect()
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN {self.notify_channel}')
+                self._listening.set()
+                while True:
+                    if select.select([connection], [], [], self.listen_timeout) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        self.dispatch(connection.notifies.pop(0).payload)
+            except psycopg2.Error:
+                logger.exception('Broker listener connection lost, reconnecting')
+            finally:
+                if connection is not None:
+                    connection.close()
+            time.sleep(self.reconnect_interval)
+
+    def dispatch(self, payload):
+        try:
+            data = json_loads(payload)
+            self._local.publish(data['channel'], data['message'])
+        except (ValueError, KeyError, TypeError):
+            logger.exception('Invalid broker notification')
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """
+    Broker instance of the process, of the class `settings.CHAT_BROKER`.
+    """
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(settings.CHAT_BROKER)()
+        return _broker
@@ -0,0 +1,137 @@
+import re
+import asyncio
+
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from django.utils.translation import gettext as _
+
+from rest_framework_simplejwt.exceptions import TokenError, InvalidToken
+
+from api_v1.core import StatelessJWTAuthentication, json_dumps, json_loads
+from api_v1.models import Match, MatchChatMessage, MatchSubscription
+from api_v1.utils.sync import database_sync_to_async
+from api_v1.chat.broker import get_broker, match_channel
+from api_v1.chat.writer import get_writer
+from api_v1.chat.events import UNSUBSCRIBED
+
+""" WebSocket close codes """
+CLOSE_UNAUTHENTICATED = 4401
+CLOSE_NOT_SUBSCRIBED = 4403
+CLOSE_NOT_FOUND = 4404
+
+
+class MatchChatConsumer:
+    """
+    ASGI application of the match chat WebSocket, `/v1/matches/<id>/chat`.
+
+    The JWT access token is passed in the `token` query parameter (browsers
+    cannot set headers on WebSocket requests). Only users subscribed for the
+    match can connect, and they are disconnected (CLOSE_NOT_SUBSCRIBED) when
+    unsubscribed. Clients send `{"message": "..."}` and receive the
+    saved messages of the match, with the same structure of the chat history
+    endpoint, or `{"errors": [...]}`.
+    """
+    path_regex = re.compile(r'^/v1/matches/(?P<match_id>\d+)/chat/?$')
+
+    async def __call__(self, scope, receive, send):
+        match = self.path_regex.match(scope['path'])
+        message = await receive()
+        if message['type'] != 'websocket.connect':
+            return
+        if match is None:
+            return await send({'type': 'websocket.close', 'code': CLOSE_NOT_FOUND})
+        match_id = int(match.group('match_id'))
+
+        user = self.authenticate(scope)
+        if user is None:
+            return await send({'type': 'websocket.close', 'code': CLOSE_UNAUTHENTICATED})
+
+        # Subscribed before the check, so an unsubscription right after it is not missed
+        subscription = await get_broker().asubscribe(match_channel(match_id))
+        try:
+            close_code = await self.check_subscription(match_id, user)
+            if close_code is not None:
+                return await send({'type': 'websocket.close', 'code': close_code})
+
+            await send({'type': 'websocket.accept'})
+            forwarder = asyncio.ensure_future(self.forward_messages(subscription, send, user))
+            receiver = asyncio.ensure_future(self.receive_messages(receive, send, match_id, user))
+            try:
+                await asyncio.wait({forwarder, receiver}, return_when=asyncio.FIRST_COMPLETED)
+                if forwarder.done() and not receiver.done():
+                    # The user was unsubscribed from the match
+                    await send({'type': 'websocket.close', 'code': CLOSE_NOT_SUBSCRIBED})
+            finally:
+                forwarder.cancel()
+                receiver.cancel()
+        finally:
+            subscription.close()
+
+    @staticmethod
+    def authenticate(scope):
+        query = parse_qs(scope.get('query_string', b'').decode('latin1'))
+        token = query.get('token', [None])[0]
+        if not token:
+            return None
+        authentication = StatelessJWTAuthentication()
+        try:
+            return authentication.get_token_user(authentication.get_validated_token(token))
+        except (TokenError, InvalidToken):
+            return None
+
+    @staticmethod
+    @database_sync_to_async
+    def check_subscription(match_id, user):
+        if not Match.objects.filter(pk=match_id).exists():
+            return CLOSE_NOT_FOUND
+        # Tokens issued before a password change are rejected as well
+        subscribed = MatchSubscription.objects.filter(match_id=match_id, user_id=user.pk,
+                                                      user__token_version=user.token_version,
+                                                      user__is_active=True)
+        if not subscribed.exists():
+            return CLOSE_NOT_SUBSCRIBED
+        return None
+
+    async def receive_messages(self, receive, send, match_id, user):
+        while True:
+            event = await receive()
+            if event['type'] == 'websocket.disconnect':
+                return
+            if event['type'] != 'websocket.receive':
+                continue
+            try:
+                text = self.parse_message(event)
+            except ValueError as error:
+                await self.send_json(send, {'errors': [str(error)]})
+                continue
+            get_writer().add(MatchChatMessage(match_id=match_id, user=user, message=text))
+
+    @staticmethod
+    def parse_message(event):
+        try:
+            data = json_loads(event.get('text') or event.get('bytes') or '')
+            text = data['message'].strip()
+        except (ValueError, TypeError, KeyError, AttributeError):
+            raise ValueError(_('Message is required'))
+        if not text:
+            raise ValueError(_('Message is required'))
+        if len(text) > settings.CHAT_MESSAGE_MAX_LENGTH:
+            raise ValueError(_('Message is too long'))
+        return text
+
+    async def forward_messages(self, subscription, send, user):
+        """
+        Send the messages of the match channel, until the user is unsubscribed.
+        """
+        while True:
+            message = await subscription.get()
+            if UNSUBSCRIBED in message:
+                if message[UNSUBSCRIBED] == user.pk:
+                    return
+                continue
+            await self.send_json(send, message)
+
+    @staticmethod
+    async def send_json(send, data):
+        await send({'type': 'websocket.send', 'text': json_dumps(data).decode('utf-8')})
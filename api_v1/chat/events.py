@@ -0,0 +1,18 @@
+from django.db import transaction
+from django.dispatch import receiver
+from django.db.models.signals import post_delete
+
+from api_v1.models import MatchSubscription
+from api_v1.chat.broker import get_broker, match_channel
+
+""" Key of the match channel message that disconnects an unsubscribed user """
+UNSUBSCRIBED = 'unsubscribed'
+
+
+@receiver(post_delete, sender=MatchSubscription)
+def subscription_deleted(sender, instance, **kwargs):
+    # Open chat connections of the user are closed once the delete is committed
+    broker = get_broker()
+    channel = match_channel(instance.match_id)
+    if broker.has_subscribers(channel):
+        transaction.on_commit(lambda: broker.publish(channel, {UNSUBSCRIBED: instance.user_id}))
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+
+from api_v1.models import MatchChatMessage
+from api_v1.serializers import MatchChatMessageSerializer
+from api_v1.utils.sync import database_sync_to_async
+from api_v1.chat.broker import get_broker, match_channel
+
+logger = logging.getLogger(__name__)
+
+# Queued by close() to stop run() once the messages queued before it are saved
+_STOP = object()
+
+
+class MessageBatchWriter:
+    """
+    Saves chat messages in batches (one INSERT for up to `batch_size`
+    messages, waiting at most `flush_interval` seconds for them), then
+    publishes each saved message to its match channel.
+    """
+    def __init__(self, batch_size=None, flush_interval=None):
+        self.batch_size = batch_size or settings.CHAT_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.CHAT_FLUSH_INTERVAL
+        self.loop = None
+        self.queue = None
+        self.task = None
+
+    def add(self, message):
+        """
+        Queue an unsaved MatchChatMessage, must be called from the event loop.
+        """
+        loop = asyncio.get_event_loop()
+        if self.loop is not loop:
+            self.loop = loop
+            self.queue = asyncio.Queue()
+            self.task = loop.create_task(self.run())
+        self.queue.put_nowait(message)
+
+    async def run(self):
+        queue = self.queue
+        stop = False
+        while not stop:
+            batch = [await queue.get()]
+            deadline = self.loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - self.loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            if _STOP in batch:
+                batch.remove(_STOP)
+                stop = True
+            if batch:
+                await self.flush(batch)
+
+    async def flush(self, batch):
+        try:
+            messages = await self.write(batch)
+        except Exception:
+            logger.exception('Could not save %d chat messages', len(batch))
+            return
+        try:
+            await self.publish(messages)
+        except Exception:
+            logger.exception('Could not publish %d chat messages', len(messages))
+
+    async def close(self):
+        """
+        Save and publish the queued messages, including the batch being
+        saved, and stop the writer.
+        """
+        if self.task is None:
+            return
+        self.queue.put_nowait(_STOP)
+        await self.task
+        # Messages added while stopping
+        batch = []
+        while not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        if batch:
+            await self.flush(batch)
+        self.loop = self.queue = self.task = None
+
+    @staticmethod
+    @sync_to_async
+    def publish(messages):
+        # The broker may block on the network (PostgresBroker)
+        broker = get_broker()
+        for message in messages:
+            broker.publish(match_channel(message['match_id']), message)
+
+    @staticmethod
+    @database_sync_to_async
+    def write(batch):
+        MatchChatMessage.objects.bulk_create(batch)
+        return MatchChatMessageSerializer(batch, many=True).data
+
+
+_writer = None
+
+
+def get_writer():
+    global _writer
+    if _writer is None:
+        _writer = MessageBatchWriter()
+    return _writer
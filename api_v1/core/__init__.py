@@ -1,2 +1,9 @@
+# The classes of settings.REST_FRAMEWORK are imported first, rest_framework.views
+# (imported by errors) loads them while this package is being imported
+from .json_backends import *
+from .authentication import *
+from .pagination import *
 from .errors import *
-from .permissions import *
\ No newline at end of file
+from .permissions import *
+from .mixins import *
+from .conditional import *
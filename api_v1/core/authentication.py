@@ -0,0 +1,73 @@
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.translation import gettext as _
+
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from api_v1.models import User
+
+TOKEN_VERSION_CLAIM = 'token_version'
+TOKEN_USER_CLAIM = 'user'
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that does not query the users table on safe (read-only)
+    requests: the request user is built from the verified token claims.
+
+    Write requests load the user row and reject tokens whose `token_version`
+    claim is older than the user's one (it is incremented on password changes)
+    and tokens of inactive users. Refresh tokens are checked the same way.
+
+    Read requests do not see the user row, so an access token keeps read
+    access until it expires (SIMPLE_JWT['ACCESS_TOKEN_LIFETIME']) after a
+    password change and after the user is deactivated, and so does a match
+    feed connection opened with it.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+
+        if request.method in SAFE_METHODS:
+            return self.get_token_user(validated_token), None
+        return self.get_user(validated_token), None
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        if user.token_version != validated_token.get(TOKEN_VERSION_CLAIM, 0):
+            raise InvalidToken(_('Token is invalid or expired'))
+        return user
+
+    def get_token_user(self, validated_token):
+        """
+        Unsaved User instance from the token claims. It has the user primary
+        key, so it can be compared with users and used in queries, but it has
+        no password.
+        """
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+            claims = validated_token[TOKEN_USER_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        date_joined = parse_datetime(claims.get('registred_date') or '')
+        if date_joined and timezone.is_naive(date_joined):
+            date_joined = timezone.make_aware(date_joined)
+
+        user = User(**{api_settings.USER_ID_FIELD: user_id}, username=claims.get('username'),
+                    first_name=claims.get('name'), email=claims.get('email'),
+                    level=claims.get('level'), date_joined=date_joined,
+                    token_version=validated_token.get(TOKEN_VERSION_CLAIM, 0))
+        user._state.adding = False
+        return user
@@ -0,0 +1,150 @@
+import hashlib
+
+from datetime import datetime
+
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_vary_headers, quote_etag
+from django.utils.http import http_date
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import SAFE_METHODS
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = _('The resource has been modified')
+    default_code = 'precondition_failed'
+
+
+def make_etag(*values):
+    # Datetimes by timestamp, their tzinfo differs between saved and loaded values
+    values = [v.timestamp() if isinstance(v, datetime) else v for v in values]
+    return quote_etag(hashlib.md5(repr(values).encode('utf-8')).hexdigest())
+
+
+class ConditionalMixin:
+    """
+    Conditional requests of generic views, by ETag and Last-Modified.
+
+    Retrieve responses have ETag and Last-Modified headers, and
+    `If-None-Match`/`If-Modified-Since` requests of an unchanged resource
+    get a 304 response, without serializing it. List responses have only
+    the ETag (rows leaving a list do not change any last modified date). Updates and deletes with
+    `If-Match`/`If-Unmodified-Since` lock the object, and get a 412
+    response if it has changed.
+
+    The version of an object is `get_object_version()`, the version of a
+    list page is the version of its rows (`get_row_version()`), with the
+    total count and the next cursor of the pagination, so a 304 costs the
+    page queries but no serialization, and no query over the whole
+    collection is added.
+    """
+    last_modified_field = None
+    # Annotation of the last modified value of the listed rows
+    last_modified_annotation = 'row_last_modified'
+
+    def get_object_version(self, instance):
+        """
+        Values identifying the object representation for the request user.
+        """
+        return (instance.pk, self.get_last_modified(instance))
+
+    def get_last_modified(self, instance):
+        if self.last_modified_field:
+            return getattr(instance, self.last_modified_field)
+        return None
+
+    def get_last_modified_expression(self):
+        return self.last_modified_field
+
+    def get_row_version(self, row):
+        """
+        Values identifying a listed object, a model instance or a
+        `.values()` row (see EagerLoadingMixin).
+        """
+        if isinstance(row, dict):
+            return (row['id'], row.get(self.last_modified_annotation))
+        return self.get_object_version(row)
+
+    def has_preconditions(self, request):
+        return any(header in request.META for header in ('HTTP_IF_MATCH', 'HTTP_IF_UNMODIFIED_SINCE'))
+
+    def get_conditional_response(self, request, etag, last_modified):
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request._request, etag=etag, last_modified=timestamp)
+        if response is None:
+            return None
+        if response.status_code == status.HTTP_412_PRECONDITION_FAILED:
+            raise PreconditionFailed()
+        return self.set_conditional_headers(Response(status=status.HTTP_304_NOT_MODIFIED),
+                                            etag, last_modified)
+
+    @staticmethod
+    def set_conditional_headers(response, etag, last_modified):
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        # Representations may depend on the authenticated user
+        patch_vary_headers(response, ('Authorization',))
+        return response
+
+    def get_object(self):
+        instance = super().get_object()
+        if self.request.method not in SAFE_METHODS:
+            etag = make_etag(*self.get_object_version(instance))
+            self.get_conditional_response(self.request, etag, self.get_last_modified(instance))
+        return instance
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method not in SAFE_METHODS and self.has_preconditions(self.request):
+            # Concurrent updates wait until the precondition is checked and the update is saved
+            queryset = queryset.select_for_update(of=('self',))
+        return queryset
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag = make_etag(*self.get_object_version(instance))
+        last_modified = self.get_last_modified(instance)
+        response = self.get_conditional_response(request, etag, last_modified)
+        if response is None:
+            response = Response(self.get_serializer(instance).data)
+        return self.set_conditional_headers(response, etag, last_modified)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.last_modified_field:
+            queryset = queryset.annotate(**{self.last_modified_annotation: self.get_last_modified_expression()})
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else list(queryset)
+
+        # Pages of the same collection (and parameters) are different resources
+        pagination = [getattr(self.paginator, name, None) for name in ('count', 'next_position')]
+        etag = make_etag(request.get_full_path(), *pagination, *[self.get_row_version(row) for row in rows])
+        response = self.get_conditional_response(request, etag, None)
+        if response is not None:
+            return self.set_conditional_headers(response, etag, None)
+
+        if page is not None:
+            response = self.get_paginated_response(self.get_serializer(page, many=True).data)
+        else:
+            response = Response(self.get_serializer(rows, many=True).data)
+        return self.set_conditional_headers(response, etag, None)
+
+    def update(self, request, *args, **kwargs):
+        with transaction.atomic():
+            response = super().update(request, *args, **kwargs)
+        instance = self.updated_instance
+        return self.set_conditional_headers(response, make_etag(*self.get_object_version(instance)),
+                                            self.get_last_modified(instance))
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        self.updated_instance = serializer.instance
+
+    def destroy(self, request, *args, **kwargs):
+        with transaction.atomic():
+            return super().destroy(request, *args, **kwargs)
@@ -0,0 +1,126 @@
+import json
+import threading
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils.duration import duration_string
+
+from rest_framework import renderers, parsers
+from rest_framework.exceptions import ParseError
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.json import strict_constant
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+_encoder = JSONEncoder()
+
+
+def encode_default(obj):
+    """
+    JSON value of the types not supported by the backends. Durations are
+    formatted as the serializers DurationField, the other types as DRF's
+    JSONEncoder (datetimes, Decimal, lazy strings, ...).
+    """
+    if isinstance(obj, timedelta):
+        return duration_string(obj)
+    return _encoder.default(obj)
+
+
+def escape_line_separators(content):
+    # Same as DRF's JSONRenderer, U+2028 and U+2029 are not valid in JavaScript strings
+    return content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class StdlibJSONBackend:
+    name = 'json'
+
+    @staticmethod
+    def dumps(data):
+        content = json.dumps(data, default=encode_default, ensure_ascii=False,
+                             separators=(',', ':'), allow_nan=False)
+        return escape_line_separators(content.encode('utf-8'))
+
+    @staticmethod
+    def loads(content):
+        if isinstance(content, bytes):
+            content = content.decode('utf-8')
+        return json.loads(content, parse_constant=strict_constant)
+
+
+class OrjsonJSONBackend:
+    name = 'orjson'
+
+    @staticmethod
+    def dumps(data):
+        # Datetimes are passed to encode_default, to be formatted as by DRF
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        return escape_line_separators(orjson.dumps(data, default=encode_default, option=option))
+
+    @staticmethod
+    def loads(content):
+        return orjson.loads(content)
+
+
+JSON_BACKENDS = {backend.name: backend for backend in (StdlibJSONBackend, OrjsonJSONBackend)}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_json_backend():
+    """
+    JSON backend of `settings.API_JSON_BACKEND`, the standard library one
+    if orjson is not installed.
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            name = settings.API_JSON_BACKEND
+            if name == OrjsonJSONBackend.name and orjson is None:
+                name = StdlibJSONBackend.name
+            _backend = JSON_BACKENDS[name]()
+        return _backend
+
+
+def json_dumps(data):
+    """
+    Compact UTF-8 encoded JSON of `data`.
+    """
+    return get_json_backend().dumps(data)
+
+
+def json_loads(content):
+    return get_json_backend().loads(content)
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """
+    JSONRenderer on the JSON backend, with the same output and media type.
+    Indented responses (`Accept: application/json; indent=4`) are still
+    rendered by DRF's JSONRenderer.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return json_dumps(data)
+
+
+class FastJSONParser(parsers.JSONParser):
+    """
+    JSONParser on the JSON backend.
+    """
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        if encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return json_loads(stream.read())
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
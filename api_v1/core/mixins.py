@@ -0,0 +1,12 @@
+class EagerLoadingMixin:
+    """
+    Apply the related-data loading plan declared by the serializer 
+    (`setup_eager_loading`), so listing N objects costs a constant 
+    number of queries.
+    """
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        serializer_class = self.get_serializer_class()
+        if hasattr(serializer_class, 'setup_eager_loading'):
+            queryset = serializer_class.setup_eager_loading(queryset)
+        return queryset
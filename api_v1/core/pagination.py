@@ -0,0 +1,120 @@
+import json
+import binascii
+
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from datetime import datetime
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.translation import gettext as _
+from django.core.exceptions import ValidationError
+
+from rest_framework.response import Response
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination with a keyset (cursor) mode. Passing the `cursor`
+    parameter (empty for the first page) pages through the queryset ordering,
+    for instance (-created_date, -id) or (knn_distance, id), filtering by the
+    last row of the previous page instead of using OFFSET, and without
+    running the count query. The response has only `next` and `results`.
+    """
+    cursor_query_param = 'cursor'
+    unique_ordering_field = 'id'
+
+    keyset = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.keyset = True
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.ordering = self.get_ordering(queryset)
+
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self.get_keyset_filter(self.ordering, position))
+
+        results = list(queryset.order_by(*self.ordering)[:self.limit + 1])
+        self.next_position = None
+        if len(results) > self.limit:
+            results = results[:self.limit]
+            self.next_position = self.get_position(results[-1], self.ordering)
+        return results
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_cursor_link()),
+            ('results', data)
+        ]))
+
+    def get_ordering(self, queryset):
+        """
+        Ordering of the queryset, ended by the unique field as tie breaker.
+        """
+        ordering = [f for f in queryset.query.order_by if isinstance(f, str)]
+        names = [f.lstrip('-') for f in ordering]
+        if self.unique_ordering_field not in names and 'pk' not in names:
+            descending = ordering and ordering[-1].startswith('-')
+            ordering.append(('-' if descending else '') + self.unique_ordering_field)
+        return ordering
+
+    @staticmethod
+    def get_keyset_filter(ordering, position):
+        """
+        Rows after `position` in `ordering`: (a > x) OR (a = x AND b > y) ...
+        """
+        keyset_filter = Q()
+        equals = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            keyset_filter |= equals & Q(**{f'{name}__{lookup}': value})
+            equals &= Q(**{name: value})
+        return keyset_filter
+
+    @staticmethod
+    def get_position(row, ordering):
+        names = [f.lstrip('-') for f in ordering]
+        if isinstance(row, dict):
+            return [row[name] for name in names]
+        return [getattr(row, name) for name in names]
+
+    def get_next_cursor_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.offset_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    @staticmethod
+    def encode_cursor(position):
+        values = [{'datetime': v.isoformat()} if isinstance(v, datetime) else v for v in position]
+        return urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            position = []
+            for value in values:
+                if isinstance(value, dict):
+                    value = parse_datetime(value['datetime'])
+                    if value is None:
+                        raise ValueError
+                position.append(value)
+        except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError):
+            raise ValidationError({self.cursor_query_param: [_('Invalid cursor')]})
+        return position
@@ -0,0 +1,4 @@
+from .index import *
+from .events import *
+from .hub import *
+from .consumer import *
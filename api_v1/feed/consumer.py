@@ -0,0 +1,103 @@
+import re
+import asyncio
+
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+from rest_framework.exceptions import APIException, NotAuthenticated
+
+from api_v1.core import StatelessJWTAuthentication, core_exception_handler, json_dumps
+from api_v1.feed.hub import get_feed
+from api_v1.utils.validation import validate_required_params, validate_float_values, \
+                                    validate_location, validate_radius
+
+
+class MatchFeedConsumer:
+    """
+    ASGI application of the Server-Sent Events feed of matches created,
+    updated or deleted within `radius` km (default 15) of `latitude` and
+    `longitude`, `GET /v1/matches/feed`.
+
+    The JWT access token is passed in the Authorization header or in the
+    `token` query parameter (EventSource cannot set headers). Events are
+    `created`, `updated` (data: `{"id": .., "match": {..}}`) and `deleted`
+    (data: `{"id": ..}`), also sent when a match moves out of the area.
+    """
+    path_regex = re.compile(r'^/v1/matches/feed/?$')
+
+    async def __call__(self, scope, receive, send):
+        query = {k: v[0] for k, v in parse_qs(scope.get('query_string', b'').decode('latin1')).items()}
+        try:
+            self.authenticate(scope, query)
+            origin, radius = self.get_area(query)
+        except (APIException, ValidationError) as exc:
+            return await self.send_error(send, exc)
+
+        feed = get_feed()
+        listener = feed.listen(origin.x, origin.y, radius)
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'Content-Type', b'text/event-stream'),
+                (b'Cache-Control', b'no-cache'),
+                (b'X-Accel-Buffering', b'no'),
+            ],
+        })
+        disconnect = asyncio.ensure_future(self.wait_disconnect(receive))
+        try:
+            while not disconnect.done():
+                event = asyncio.ensure_future(listener.get())
+                done, _ = await asyncio.wait({event, disconnect}, timeout=settings.FEED_HEARTBEAT_INTERVAL,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if event in done:
+                    name, data = event.result()
+                    data = json_dumps(data).decode('utf-8')
+                    await self.send_body(send, f'event: {name}\ndata: {data}\n\n')
+                else:
+                    event.cancel()
+                    if not disconnect.done():
+                        # Comment line, keeps proxies from closing the idle connection
+                        await self.send_body(send, ': keepalive\n\n')
+        finally:
+            disconnect.cancel()
+            feed.unlisten(listener)
+
+    @staticmethod
+    def authenticate(scope, query):
+        authentication = StatelessJWTAuthentication()
+        headers = dict(scope.get('headers', []))
+        raw_token = query.get('token', '').encode('latin1') or None
+        if raw_token is None and b'authorization' in headers:
+            raw_token = authentication.get_raw_token(headers[b'authorization'])
+        if raw_token is None:
+            raise NotAuthenticated()
+        return authentication.get_token_user(authentication.get_validated_token(raw_token))
+
+    @staticmethod
+    def get_area(query):
+        params = validate_required_params(query, ('latitude', 'longitude'))
+        params = validate_float_values({'latitude': params['latitude'], 'longitude': params['longitude']})
+        radius = validate_radius(query.get('radius', '15'))
+        return validate_location(params), radius
+
+    @staticmethod
+    async def wait_disconnect(receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    @staticmethod
+    async def send_body(send, text):
+        await send({'type': 'http.response.body', 'body': text.encode('utf-8'), 'more_body': True})
+
+    @staticmethod
+    async def send_error(send, exc):
+        response = core_exception_handler(exc)
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': [(b'Content-Type', b'application/json')],
+        })
+        await send({'type': 'http.response.body', 'body': json_dumps(response.data)})
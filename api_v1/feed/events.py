@@ -0,0 +1,70 @@
+from django.db import transaction
+from django.dispatch import receiver
+from django.db.models.signals import post_save, post_delete
+
+from api_v1.models import Match, participants_count_changed
+from api_v1.serializers import MatchSerializer
+from api_v1.chat.broker import get_broker
+
+FEED_CHANNEL = 'matches'
+
+""" Match events """
+CREATED = 'created'
+UPDATED = 'updated'
+DELETED = 'deleted'
+
+
+def coordinates(location):
+    return [location.x, location.y] if location else None
+
+
+def publish_match_event(name, match, previous_location):
+    """
+    Publish the match event to the feed channel once the transaction is
+    committed. Events have the current and the previous match location, so
+    listeners near a match that moved away are notified too. The broker
+    (settings.CHAT_BROKER, PostgreSQL LISTEN/NOTIFY by default) delivers
+    them to the feeds of every worker process.
+    """
+    broker = get_broker()
+    if not broker.has_subscribers(FEED_CHANNEL):
+        return
+
+    event = {
+        'event': name,
+        'id': match.pk,
+        'location': coordinates(match.location) if name != DELETED else None,
+        'previous_location': coordinates(previous_location),
+    }
+
+    def publish():
+        if name != DELETED:
+            event['match'] = MatchSerializer(match).data
+        broker.publish(FEED_CHANNEL, event)
+
+    transaction.on_commit(publish)
+
+
+@receiver(post_save, sender=Match)
+def match_saved(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        publish_match_event(CREATED if created else UPDATED, instance,
+                            getattr(instance, '_loaded_location', None))
+
+
+@receiver(post_delete, sender=Match)
+def match_deleted(sender, instance, **kwargs):
+    publish_match_event(DELETED, instance, instance.location)
+
+
+@receiver(participants_count_changed)
+def match_participants_changed(sender, match_ids, **kwargs):
+    if not get_broker().has_subscribers(FEED_CHANNEL):
+        return
+
+    def publish():
+        # The participants count was updated in the database only
+        for match in Match.objects.select_related('owner').filter(pk__in=match_ids):
+            publish_match_event(UPDATED, match, match.location)
+
+    transaction.on_commit(publish)
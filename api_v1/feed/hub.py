@@ -0,0 +1,89 @@
+import asyncio
+
+from django.conf import settings
+
+from api_v1.chat.broker import get_broker
+from api_v1.feed.index import Area, GridIndex
+from api_v1.feed.events import FEED_CHANNEL, DELETED
+
+
+class FeedListener(Area):
+    """
+    Area of a feed client, receiving the events in the event loop that
+    created it. Events are dropped when it is `max_pending` events behind.
+    """
+    def __init__(self, longitude, latitude, radius, max_pending=100):
+        super().__init__(longitude, latitude, radius)
+        self.loop = asyncio.get_event_loop()
+        self.queue = asyncio.Queue(maxsize=max_pending)
+
+    def notify(self, name, data):
+        if not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.put, (name, data))
+
+    def put(self, event):
+        if not self.queue.full():
+            self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class MatchFeed:
+    """
+    Match events of the feed channel, published by any worker process,
+    dispatched to the listeners whose area contains the match (before or
+    after the change) through a GridIndex, so an event does not go through
+    every listener.
+    """
+    def __init__(self, cell_size=None):
+        self.index = GridIndex(cell_size or settings.FEED_CELL_SIZE)
+        self.loop = None
+        self.task = None
+
+    def listen(self, longitude, latitude, radius):
+        """
+        Listener of the events within `radius` km, must be called from the event loop.
+        """
+        listener = FeedListener(longitude, latitude, radius)
+        self.index.add(listener)
+        self.start()
+        return listener
+
+    def unlisten(self, listener):
+        self.index.remove(listener)
+
+    def start(self):
+        if self.task is not None and not self.task.done() and not self.loop.is_closed():
+            return
+        self.loop = asyncio.get_event_loop()
+        self.task = self.loop.create_task(self.run())
+
+    async def run(self):
+        subscription = await get_broker().asubscribe(FEED_CHANNEL)
+        try:
+            while True:
+                self.dispatch(await subscription.get())
+        finally:
+            subscription.close()
+
+    def dispatch(self, event):
+        location, previous_location = event['location'], event['previous_location']
+        near_location = set(self.index.search(*location)) if location else set()
+        near_previous = set(self.index.search(*previous_location)) if previous_location else set()
+
+        for listener in near_location:
+            listener.notify(event['event'], {'id': event['id'], 'match': event.get('match')})
+        # Deleted, or moved out of the listener area
+        for listener in near_previous - near_location:
+            listener.notify(DELETED, {'id': event['id']})
+
+
+_feed = None
+
+
+def get_feed():
+    global _feed
+    if _feed is None:
+        _feed = MatchFeed()
+    return _feed
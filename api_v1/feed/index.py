@@ -0,0 +1,79 @@
+import math
+import threading
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+
+
+def distance_km(longitude1, latitude1, longitude2, latitude2):
+    """
+    Great-circle (haversine) distance between two points.
+    """
+    longitude1, latitude1, longitude2, latitude2 = map(math.radians,
+                                                       (longitude1, latitude1, longitude2, latitude2))
+    a = math.sin((latitude2 - latitude1) / 2) ** 2 + \
+        math.cos(latitude1) * math.cos(latitude2) * math.sin((longitude2 - longitude1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class Area:
+    """
+    Circle of `radius` km around (longitude, latitude).
+    """
+    def __init__(self, longitude, latitude, radius):
+        self.longitude = longitude
+        self.latitude = latitude
+        self.radius = radius
+
+    def contains(self, longitude, latitude):
+        return distance_km(self.longitude, self.latitude, longitude, latitude) <= self.radius
+
+
+class GridIndex:
+    """
+    Spatial index of areas in a grid of `cell_size` degrees cells. An area is
+    added to every cell its bounding box overlaps, so the areas that may
+    contain a point are the ones in the cell of the point.
+    """
+    def __init__(self, cell_size=0.1):
+        self.cell_size = cell_size
+        self._cells = {}
+        self._area_cells = {}
+        self._lock = threading.Lock()
+
+    def cell(self, longitude, latitude):
+        return (math.floor(longitude / self.cell_size), math.floor(latitude / self.cell_size))
+
+    def area_cells(self, area):
+        latitude_delta = area.radius / KM_PER_DEGREE
+        longitude_delta = area.radius / (KM_PER_DEGREE * max(math.cos(math.radians(area.latitude)), 0.01))
+        min_x, min_y = self.cell(area.longitude - longitude_delta, area.latitude - latitude_delta)
+        max_x, max_y = self.cell(area.longitude + longitude_delta, area.latitude + latitude_delta)
+        return [(x, y) for x in range(min_x, max_x + 1) for y in range(min_y, max_y + 1)]
+
+    def add(self, area):
+        cells = self.area_cells(area)
+        with self._lock:
+            self._area_cells[area] = cells
+            for cell in cells:
+                self._cells.setdefault(cell, set()).add(area)
+
+    def remove(self, area):
+        with self._lock:
+            for cell in self._area_cells.pop(area, ()):
+                areas = self._cells[cell]
+                areas.discard(area)
+                if not areas:
+                    del self._cells[cell]
+
+    def search(self, longitude, latitude):
+        """
+        Areas containing the point.
+        """
+        with self._lock:
+            candidates = list(self._cells.get(self.cell(longitude, latitude), ()))
+        return [area for area in candidates if area.contains(longitude, latitude)]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._area_cells)
@@ -1 +1,2 @@
 from .match import *
+from .user import *
@@ -2,21 +2,42 @@ from rest_framework import filters, status
 from rest_framework.response import Response
 
 from api_v1.models import Match, MatchStatus
+from api_v1.geocache import get_tile_cache, RADIUS_TOLERANCE
+from api_v1.models.functions import KNNDistance, GeographyDistance, GeographyDWithin
 from api_v1.utils.validation import validate_required_params, validate_location, \
                                     validate_float_values, validate_radius
 
 from django.contrib.gis.geos import Point
 from django.utils.translation import gettext as _
 from django.core.exceptions import ValidationError
+from django.db.models import F, Q, Case, When, Value, BooleanField
 from django.contrib.gis.measure import Distance as D
-from django.contrib.gis.db.models.functions import Distance
 
 
 class LocationRangeFilter(filters.BaseFilterBackend):
     """
     Filter to get objects by location range (centerpoint latitude, 
     centerpoint longitude and range). Range parameter must be in km.
+
+    Results are ordered by descending created date. Passing `ordering=distance`
+    switches to a nearest-first search, ordered by the PostGIS `<->` operator
+    so the GiST index of the location is walked nearest-first and the scan
+    stops once the page is full.
+
+    With the geohash tile cache (`settings.GEO_TILE_CACHE`) enabled, the
+    search is a primary key lookup of the cached candidate matches of the
+    tiles around the origin, instead of scanning the spatial index. Only the
+    candidates near the border of the range (by their spherical distance)
+    are checked by ST_DWithin.
     """
+    ordering_param = 'ordering'
+    ordering_choices = {
+        '-created_date': ('-created_date', '-id'),
+        'distance': ('knn_distance', 'id'),
+    }
+    default_ordering = '-created_date'
+    use_tile_cache = True
+
     def filter_queryset(self, request, queryset, view):
         params = validate_required_params(request.query_params, ('latitude', 'longitude'))
         params['radius'] = request.query_params.get('radius', '15')
@@ -25,10 +46,33 @@ class LocationRangeFilter(filters.BaseFilterBackend):
         params['radius'] = validate_radius(params['radius'])
 
         origin = validate_location(params)
-        
-        location_distance = (origin, D(km=params['radius']))
-        result = Match.objects.filter(location__distance_lte=location_distance)
-        return result.annotate(distance=Distance('location', origin)).order_by('-distance')
+        ordering = self.get_ordering(request)
+
+        within_range = GeographyDWithin('location', origin, D(km=params['radius']))
+        tile_cache = get_tile_cache() if self.use_tile_cache else None
+        candidates = None
+        if tile_cache is not None:
+            candidates = tile_cache.candidates(origin.x, origin.y, params['radius'])
+        if candidates is None:
+            # ST_DWithin on geography uses the functional GiST index 
+            # on location::geography (see migration 0005)
+            result = queryset.filter(within_range)
+        else:
+            inside = [match_id for match_id, distance in candidates.items()
+                      if distance <= params['radius'] / RADIUS_TOLERANCE]
+            result = queryset.filter(id__in=list(candidates)).filter(
+                Case(When(id__in=inside, then=Value(True)), default=within_range, output_field=BooleanField())
+            )
+        result = result.annotate(distance=GeographyDistance('location', origin))
+        if ordering == 'distance':
+            result = result.annotate(knn_distance=KNNDistance('location', origin))
+        return result.order_by(*self.ordering_choices[ordering])
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get(self.ordering_param) or self.default_ordering
+        if ordering not in self.ordering_choices:
+            raise ValidationError({self.ordering_param: [_('Choose a valid ordering value')]})
+        return ordering
 
 
 class MatchStatusFilter(filters.BaseFilterBackend):
@@ -43,7 +87,29 @@ class MatchStatusFilter(filters.BaseFilterBackend):
                     match_status = MatchStatus(status_value)
                 except ValueError:
                     raise ValidationError({'status': [_('Choose a valid status value')]})
+                # Same bounds used by MatchQuerySet.with_status, so the filter
+                # is a range scan over the (date, end_date) index
                 queryset_filter = match_status.get_queryset_filter()
                 return queryset.filter(**queryset_filter)
         return queryset
 
+
+
+class MatchVacancyFilter(filters.BaseFilterBackend):
+    """
+    Filter match object by vacancy (has_vacancy=true or has_vacancy=false),
+    using the participants count stored in the match.
+    """
+    choices = {'true': True, 'false': False}
+
+    def filter_queryset(self, request, queryset, view):
+        value = request.query_params.get('has_vacancy')
+        if value:
+            if value.lower() not in self.choices:
+                raise ValidationError({'has_vacancy': [_('Choose a valid has_vacancy value')]})
+            vacancy_filter = Q(limit_participants__isnull=True) | \
+                             Q(participants_count__lt=F('limit_participants'))
+            if self.choices[value.lower()]:
+                return queryset.filter(vacancy_filter)
+            return queryset.exclude(vacancy_filter)
+        return queryset
@@ -0,0 +1,52 @@
+import operator
+
+from functools import reduce
+
+from rest_framework import filters
+
+from django.db.models import Q, Case, When, Value, IntegerField, FloatField
+from django.db.models.functions import Cast, Greatest
+from django.contrib.postgres.search import TrigramSimilarity
+
+
+class TrigramSearchFilter(filters.SearchFilter):
+    """
+    Search filter backed by the `pg_trgm` GIN indexes of the search fields.
+    Every term must be contained in one of the fields. Terms shorter than
+    a trigram are prefix matched instead, using the pattern ops indexes.
+
+    Results are ranked: fields starting with the first term come first,
+    then by trigram similarity with the search, and by id as tie breaker.
+    """
+    min_trigram_length = 3
+    ordering = ('prefix_rank', '-similarity', 'id')
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+
+        if not search_fields or not search_terms:
+            return queryset
+
+        search_fields = [str(field).lstrip(''.join(self.lookup_prefixes)) for field in search_fields]
+
+        for term in search_terms:
+            lookup = 'istartswith' if len(term) < self.min_trigram_length else 'icontains'
+            queryset = queryset.filter(self.any_field(search_fields, lookup, term))
+
+        return queryset.annotate(
+            prefix_rank=Case(When(self.any_field(search_fields, 'istartswith', search_terms[0]), then=Value(0)),
+                             default=Value(1), output_field=IntegerField()),
+            similarity=self.get_similarity(search_fields, ' '.join(search_terms))
+        ).order_by(*self.ordering)
+
+    @staticmethod
+    def any_field(search_fields, lookup, term):
+        return reduce(operator.or_, (Q(**{f'{field}__{lookup}': term}) for field in search_fields))
+
+    @staticmethod
+    def get_similarity(search_fields, search):
+        similarities = [TrigramSimilarity(field, search) for field in search_fields]
+        similarity = Greatest(*similarities) if len(similarities) > 1 else similarities[0]
+        # SIMILARITY() is a real, as double precision it survives the keyset cursor round trip
+        return Cast(similarity, FloatField())
@@ -0,0 +1,3 @@
+from .geohash import *
+from .backends import *
+from .tiles import *
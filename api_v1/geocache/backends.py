@@ -0,0 +1,92 @@
+import time
+import threading
+
+from collections import OrderedDict
+
+from django.core.cache import caches
+
+
+class TileCacheBackend:
+    """
+    Storage of the cached tiles, by geohash.
+    """
+    def get_many(self, keys):
+        raise NotImplementedError
+
+    def set_many(self, values):
+        raise NotImplementedError
+
+    def delete_many(self, keys):
+        raise NotImplementedError
+
+
+class LRUTileBackend(TileCacheBackend):
+    """
+    In-process least recently used tiles, expiring after `timeout` seconds.
+    Each process has its own tiles, dropped by the invalidations published
+    by any process (MatchTileCache); an invalidation lost while the broker
+    listener reconnects is bounded by `timeout`.
+    """
+    def __init__(self, max_size=10000, timeout=30):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._tiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        values = {}
+        with self._lock:
+            for key in keys:
+                entry = self._tiles.get(key)
+                if entry is None:
+                    continue
+                expires, value = entry
+                if expires <= now:
+                    del self._tiles[key]
+                    continue
+                self._tiles.move_to_end(key)
+                values[key] = value
+        return values
+
+    def set_many(self, values):
+        expires = time.monotonic() + self.timeout
+        with self._lock:
+            for key, value in values.items():
+                self._tiles[key] = (expires, value)
+                self._tiles.move_to_end(key)
+            while len(self._tiles) > self.max_size:
+                self._tiles.popitem(last=False)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._tiles.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._tiles.clear()
+
+    def __len__(self):
+        return len(self._tiles)
+
+
+class DjangoTileBackend(TileCacheBackend):
+    """
+    Tiles in a Django cache (`CACHES[alias]`), shared by the processes when
+    it is a shared cache such as memcached or redis.
+    """
+    def __init__(self, alias='default', timeout=300, key_prefix='geotile:'):
+        self.cache = caches[alias]
+        self.timeout = timeout
+        self.key_prefix = key_prefix
+
+    def get_many(self, keys):
+        values = self.cache.get_many([self.key_prefix + key for key in keys])
+        return {key[len(self.key_prefix):]: value for key, value in values.items()}
+
+    def set_many(self, values):
+        self.cache.set_many({self.key_prefix + key: value for key, value in values.items()}, self.timeout)
+
+    def delete_many(self, keys):
+        self.cache.delete_many([self.key_prefix + key for key in keys])
@@ -0,0 +1,85 @@
+import math
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def cell_bits(precision):
+    """
+    (longitude bits, latitude bits) of a geohash of `precision` characters.
+    """
+    bits = precision * 5
+    return (bits + 1) // 2, bits // 2
+
+
+def cell_size(precision):
+    """
+    (width, height) in degrees of the geohash cells of `precision` characters.
+    """
+    longitude_bits, latitude_bits = cell_bits(precision)
+    return 360 / 2 ** longitude_bits, 180 / 2 ** latitude_bits
+
+
+def cell_position(longitude, latitude, precision):
+    """
+    (column, row) of the cell containing the point, counted from (-180, -90).
+    """
+    width, height = cell_size(precision)
+    longitude_bits, latitude_bits = cell_bits(precision)
+    x = min(max(math.floor((longitude + 180) / width), 0), 2 ** longitude_bits - 1)
+    y = min(max(math.floor((latitude + 90) / height), 0), 2 ** latitude_bits - 1)
+    return x, y
+
+
+def encode_cell(x, y, precision):
+    longitude_bits, latitude_bits = cell_bits(precision)
+    value = 0
+    # Bits are interleaved starting by the longitude
+    for i in range(precision * 5):
+        if i % 2 == 0:
+            longitude_bits -= 1
+            value = (value << 1) | ((x >> longitude_bits) & 1)
+        else:
+            latitude_bits -= 1
+            value = (value << 1) | ((y >> latitude_bits) & 1)
+    return ''.join(GEOHASH_ALPHABET[(value >> shift) & 31] for shift in range(precision * 5 - 5, -1, -5))
+
+
+def decode_cell(geohash):
+    """
+    (column, row) of the cell of the geohash.
+    """
+    precision = len(geohash)
+    value = 0
+    for char in geohash:
+        value = (value << 5) | GEOHASH_ALPHABET.index(char)
+    x = y = 0
+    for i in range(precision * 5):
+        bit = (value >> (precision * 5 - 1 - i)) & 1
+        if i % 2 == 0:
+            x = (x << 1) | bit
+        else:
+            y = (y << 1) | bit
+    return x, y
+
+
+def encode(longitude, latitude, precision):
+    return encode_cell(*cell_position(longitude, latitude, precision), precision)
+
+
+def bounds(geohash):
+    """
+    (min longitude, min latitude, max longitude, max latitude) of the geohash cell.
+    """
+    width, height = cell_size(len(geohash))
+    x, y = decode_cell(geohash)
+    return (-180 + x * width, -90 + y * height, -180 + (x + 1) * width, -90 + (y + 1) * height)
+
+
+def covering(min_longitude, min_latitude, max_longitude, max_latitude, precision):
+    """
+    Geohashes of the cells overlapping the bounding box. Boxes crossing the
+    antimeridian are clamped to it.
+    """
+    min_x, min_y = cell_position(min_longitude, min_latitude, precision)
+    max_x, max_y = cell_position(max_longitude, max_latitude, precision)
+    return [encode_cell(x, y, precision) for x in range(min_x, max_x + 1) for y in range(min_y, max_y + 1)]
@@ -0,0 +1,161 @@
+import math
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.dispatch import receiver
+from django.db.models.signals import post_save, post_delete
+from django.utils.module_loading import import_string
+from django.contrib.gis.geos import Polygon
+
+from api_v1.models import Match
+from api_v1.chat.broker import get_broker
+from api_v1.feed.index import distance_km, KM_PER_DEGREE
+from api_v1.geocache.geohash import bounds, covering, encode
+
+""" Cached value of the tiles with more than `max_candidates` matches """
+DENSE_TILE = 'dense'
+
+""" Margin over the radius for the spherical distance of the candidates, the
+    exact spheroid distance is checked by the database """
+RADIUS_TOLERANCE = 1.01
+
+""" Broker channel of the invalidated tiles, so every process drops them """
+TILES_CHANNEL = 'geotiles'
+
+
+class MatchTileCache:
+    """
+    Candidate matches of the location searches by geohash tile: the
+    `(id, longitude, latitude)` of the matches in each tile. A search is
+    snapped to the tiles covering its area (at most `max_tiles`, of the
+    finest precision allowed), so nearby searches share the same tiles.
+    Tiles are invalidated when a match is created, moved or deleted in them,
+    in every process (the keys are published to TILES_CHANNEL).
+    """
+    def __init__(self, backend, min_precision=3, max_precision=6, max_tiles=9, max_candidates=1000):
+        self.backend = backend
+        self.min_precision = min_precision
+        self.max_precision = max_precision
+        self.max_tiles = max_tiles
+        self.max_candidates = max_candidates
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def tiles(self, longitude, latitude, radius):
+        latitude_delta = radius / KM_PER_DEGREE
+        longitude_delta = radius / (KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+        box = (longitude - longitude_delta, latitude - latitude_delta,
+               longitude + longitude_delta, latitude + latitude_delta)
+        for precision in range(self.max_precision, self.min_precision, -1):
+            tiles = covering(*box, precision)
+            if len(tiles) <= self.max_tiles:
+                return tiles
+        return covering(*box, self.min_precision)
+
+    def candidates(self, longitude, latitude, radius):
+        """
+        Spherical distance (km) of the matches that may be within `radius` km
+        of the point, by id, or None if the area has too many matches to be
+        cached.
+        """
+        keys = self.tiles(longitude, latitude, radius)
+        tiles = self.backend.get_many(keys)
+        missing = [key for key in keys if key not in tiles]
+        with self._lock:
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+        if missing:
+            loaded = {key: self.load_tile(key) for key in missing}
+            self.backend.set_many(loaded)
+            tiles.update(loaded)
+
+        if any(tile == DENSE_TILE for tile in tiles.values()):
+            return None
+        candidates = {}
+        for tile in tiles.values():
+            for match_id, x, y in tile:
+                distance = distance_km(longitude, latitude, x, y)
+                if distance <= radius * RADIUS_TOLERANCE:
+                    candidates[match_id] = distance
+        return candidates
+
+    def load_tile(self, key):
+        area = Polygon.from_bbox(bounds(key))
+        area.srid = 4326
+        rows = Match.objects.filter(location__contained=area) \
+                            .values_list('id', 'location')[:self.max_candidates + 1]
+        tile = [(match_id, location.x, location.y) for match_id, location in rows]
+        return DENSE_TILE if len(tile) > self.max_candidates else tile
+
+    def invalidate(self, *locations):
+        """
+        Drop the tiles of the locations in this process, returns their keys.
+        """
+        keys = sorted({encode(location.x, location.y, precision)
+                       for location in locations if location is not None
+                       for precision in range(self.min_precision, self.max_precision + 1)})
+        self.delete_tiles(keys)
+        return keys
+
+    def delete_tiles(self, keys):
+        if keys:
+            self.backend.delete_many(keys)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else None,
+            }
+
+
+_tile_cache = None
+_tile_cache_lock = threading.Lock()
+
+
+def get_tile_cache():
+    """
+    Tile cache of the process, configured by `settings.GEO_TILE_CACHE`
+    (None disables it). It drops the tiles invalidated by any process.
+    """
+    global _tile_cache
+    if settings.GEO_TILE_CACHE is None:
+        return None
+    with _tile_cache_lock:
+        if _tile_cache is None:
+            config = dict(settings.GEO_TILE_CACHE)
+            backend = import_string(config.pop('BACKEND'))(**config.pop('OPTIONS', {}))
+            _tile_cache = MatchTileCache(backend, **{k.lower(): v for k, v in config.items()})
+            get_broker().subscribe(TILES_CHANNEL, _tile_cache.delete_tiles)
+        return _tile_cache
+
+
+def invalidate_match_tiles(*locations):
+    tile_cache = get_tile_cache()
+    if tile_cache is not None:
+        tile_cache.invalidate(*locations)
+
+        def invalidate_committed():
+            # Again after the commit, the tiles may have been loaded by other
+            # connections before the match was visible to them
+            keys = tile_cache.invalidate(*locations)
+            if keys:
+                get_broker().publish(TILES_CHANNEL, keys)
+
+        transaction.on_commit(invalidate_committed)
+
+
+@receiver(post_save, sender=Match)
+def match_saved_invalidate_tiles(sender, instance, created, raw=False, **kwargs):
+    previous_location = getattr(instance, '_loaded_location', None)
+    if created or raw or previous_location != instance.location:
+        invalidate_match_tiles(instance.location, previous_location)
+
+
+@receiver(post_delete, sender=Match)
+def match_deleted_invalidate_tiles(sender, instance, **kwargs):
+    invalidate_match_tiles(instance.location)
@@ -0,0 +1,249 @@
+import os
+import json
+import time
+
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
+from django.core.management.base import BaseCommand, CommandError
+
+from api_v1.models import User, Match, MatchCategory
+from api_v1.serializers import TokenObtainPairSerializer
+from api_v1.urls import urlpatterns
+from api_v1.utils.benchmark import summarize
+
+# Latencies depend on the machine and the seeded data, so the baseline is not
+# committed: create it on the environment that runs the benchmark, from the
+# code to compare against, then run the benchmark on the changed code.
+#
+# python manage.py seed --mode=scale --seed=1
+# python manage.py benchmark_endpoints --save-baseline
+# python manage.py benchmark_endpoints
+
+DEFAULT_BASELINE = os.path.join(settings.BASE_DIR, 'benchmarks', 'endpoints.json')
+
+"""
+Request of a route. `kwargs`, `query` and `data` are functions of the fixtures,
+`user` is the fixtures attribute of the authenticated user (None for anonymous).
+"""
+Scenario = namedtuple('Scenario', 'route method user kwargs query data')
+Scenario.__new__.__defaults__ = (None, None, None)
+
+SCENARIOS = (
+    Scenario('token_obtain_pair', 'POST', None,
+             data=lambda f: {'username': f.owner.username, 'password': f.password}),
+    Scenario('token_refresh', 'POST', None, data=lambda f: {'refresh': f.refresh_token}),
+    Scenario('signup_account', 'POST', None,
+             data=lambda f: {'username': 'benchmark', 'email': 'benchmark@applada.com.br', 'password': '1234'}),
+    Scenario('match_create_search', 'GET', 'member',
+             query=lambda f: {'latitude': f.match.location.y, 'longitude': f.match.location.x, 'radius': 15}),
+    Scenario('match_create_search', 'POST', 'member', data=lambda f: {
+        'title': 'Benchmark match', 'description': 'a description',
+        'location': {'latitude': f.match.location.y, 'longitude': f.match.location.x},
+        'date': (timezone.now() + timedelta(days=5)).isoformat(), 'duration': '01:00:00',
+        'category': str(MatchCategory.SOCCER)}),
+    Scenario('match_batch', 'GET', 'member',
+             query=lambda f: {'ids': ','.join(str(f.match.pk + i) for i in range(20))}),
+    Scenario('match_retrieve_update_delete', 'GET', 'member', kwargs=lambda f: {'pk': f.match.pk}),
+    Scenario('match_retrieve_update_delete', 'PATCH', 'owner', kwargs=lambda f: {'pk': f.match.pk},
+             data=lambda f: {'title': 'New title'}),
+    Scenario('match_retrieve_update_delete', 'DELETE', 'owner', kwargs=lambda f: {'pk': f.match.pk}),
+    Scenario('match_subscription', 'GET', 'owner', kwargs=lambda f: {'pk': f.match.pk}),
+    Scenario('match_subscription', 'POST', 'member', kwargs=lambda f: {'pk': f.match.pk}, data=lambda f: {}),
+    Scenario('match_chat_messages', 'GET', 'owner', kwargs=lambda f: {'pk': f.match.pk}),
+    Scenario('users_search', 'GET', 'member', query=lambda f: {'search': f.owner.username[:4]}),
+    Scenario('user_retrieve_update', 'GET', 'member', kwargs=lambda f: {'username': f.owner.username}),
+    Scenario('user_retrieve_update', 'PATCH', 'owner', kwargs=lambda f: {'username': f.owner.username},
+             data=lambda f: {'name': 'New name'}),
+    Scenario('users_match', 'GET', 'owner', kwargs=lambda f: {'username': f.owner.username}),
+)
+
+
+def route_names():
+    return {pattern.name for pattern in urlpatterns}
+
+
+class Fixtures:
+    """
+    Objects of the seeded database requested by the scenarios: an upcoming match
+    with vacancies, its owner and a user not subscribed to it.
+    """
+    def __init__(self, password):
+        self.password = password
+        vacancy = Q(limit_participants__isnull=True) | Q(participants_count__lt=F('limit_participants'))
+        self.match = Match.objects.filter(vacancy, date__gt=timezone.now()) \
+                                  .select_related('owner').order_by('id').first()
+        if self.match is None:
+            raise CommandError('No upcoming matches with vacancies, seed the database first '
+                               '(manage.py seed --mode=scale)')
+        self.owner = self.match.owner
+        self.member = User.objects.filter(is_staff=False).exclude(matchsubscription__match=self.match) \
+                                  .order_by('id').first()
+        if self.member is None:
+            raise CommandError('All users are subscribed to the benchmark match')
+        token = TokenObtainPairSerializer.get_token(self.owner)
+        self.refresh_token = str(token)
+        self.tokens = {
+            'owner': str(token.access_token),
+            'member': str(TokenObtainPairSerializer.get_token(self.member).access_token),
+        }
+
+
+class RowCounter:
+    """
+    Database execute wrapper counting the rows returned or affected by the queries.
+    """
+    def __init__(self):
+        self.rows = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        self.rows += max(context['cursor'].rowcount, 0)
+        return result
+
+
+class Command(BaseCommand):
+    help = ("benchmark every route of api_v1.urls against the seeded database (manage.py seed "
+            "--mode=scale), recording the p50/p95/p99 latency, SQL queries and rows returned of "
+            "each scenario. The results are compared against the baseline file, and the command "
+            "fails when a scenario goes over its budget: more queries than the baseline, or rows "
+            "and p95 latency over the baseline plus the tolerance. Requests are rolled back. The "
+            "baseline is specific to the environment, create it with --save-baseline first.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--baseline', type=str, default=DEFAULT_BASELINE, help="Baseline file")
+        parser.add_argument('--save-baseline', action='store_true',
+                            help="Save the results as the new baseline instead of comparing them")
+        parser.add_argument('--requests', type=int, default=200, help="Requests per scenario")
+        parser.add_argument('--warmup', type=int, default=10, help="Requests made before measuring")
+        parser.add_argument('--route', type=str, action='append', default=None,
+                            help="Benchmark only the route (may be repeated)")
+        parser.add_argument('--latency-tolerance', type=float, default=0.25,
+                            help="Allowed p95 latency increase over the baseline (fraction)")
+        parser.add_argument('--latency-slack', type=float, default=2.0,
+                            help="Allowed p95 latency increase over the baseline (ms), for fast routes")
+        parser.add_argument('--rows-tolerance', type=float, default=0.1,
+                            help="Allowed rows increase over the baseline (fraction)")
+        parser.add_argument('--password', type=str, default='1234', help="Password of the seeded users")
+
+    def handle(self, *args, **options):
+        missing = route_names() - {scenario.route for scenario in SCENARIOS}
+        if missing:
+            raise CommandError(f'Routes without benchmark scenarios: {", ".join(sorted(missing))}')
+
+        fixtures = Fixtures(options['password'])
+        client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost')
+        scenarios = [s for s in SCENARIOS if not options['route'] or s.route in options['route']]
+
+        results = {}
+        for scenario in scenarios:
+            request = self.prepare(client, scenario, fixtures)
+            results[f'{scenario.route} {scenario.method}'] = self.run_scenario(request, options)
+
+        if options['save_baseline']:
+            baseline = {}
+            if options['route'] and os.path.exists(options['baseline']):
+                baseline = self.load_baseline(options['baseline'])
+            baseline.update(results)
+            os.makedirs(os.path.dirname(os.path.abspath(options['baseline'])), exist_ok=True)
+            with open(options['baseline'], 'w') as baseline_file:
+                json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+                baseline_file.write('\n')
+            for name, result in results.items():
+                self.stdout.write(self.format_result(name, result))
+            self.stdout.write(f'baseline saved to {options["baseline"]}')
+            return
+
+        baseline = self.load_baseline(options['baseline'])
+        failures = 0
+        for name, result in results.items():
+            problems = self.check_budget(result, baseline.get(name), options)
+            line = self.format_result(name, result)
+            if name not in baseline:
+                self.stdout.write(f'{line} (no baseline)')
+            elif problems:
+                failures += 1
+                self.stdout.write(self.style.ERROR(f'{line} OVER BUDGET: {"; ".join(problems)}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'{line} OK'))
+        if failures:
+            raise CommandError(f'{failures} scenario(s) over budget')
+
+    @staticmethod
+    def prepare(client, scenario, fixtures):
+        path = reverse(scenario.route, kwargs=scenario.kwargs(fixtures) if scenario.kwargs else None)
+        extra = {}
+        if scenario.user:
+            extra['HTTP_AUTHORIZATION'] = f'Bearer {fixtures.tokens[scenario.user]}'
+        if scenario.method == 'GET':
+            query = scenario.query(fixtures) if scenario.query else {}
+            return lambda: client.get(path, query, **extra)
+        data = json.dumps(scenario.data(fixtures)) if scenario.data else ''
+        return lambda: client.generic(scenario.method, path, data, content_type='application/json', **extra)
+
+    def run_scenario(self, request, options):
+        def rolled_back():
+            with transaction.atomic():
+                response = request()
+                transaction.set_rollback(True)
+            return response
+
+        for _ in range(options['warmup']):
+            rolled_back()
+
+        # Queries and rows are counted apart, the capture slows down the requests
+        counter = RowCounter()
+        with CaptureQueriesContext(connection) as queries, connection.execute_wrapper(counter):
+            response = rolled_back()
+        if response.status_code >= 400:
+            raise CommandError(f'{response.status_code} response to {response.request["PATH_INFO"]}: '
+                               f'{response.content.decode("utf-8")}')
+
+        samples = []
+        for _ in range(options['requests']):
+            with transaction.atomic():
+                start = time.perf_counter()
+                request()
+                samples.append((time.perf_counter() - start) * 1000)
+                transaction.set_rollback(True)
+        result = {k: round(v, 3) for k, v in summarize(samples).items() if k != 'mean'}
+        result.update(status=response.status_code, queries=len(queries), rows=counter.rows)
+        return result
+
+    @staticmethod
+    def check_budget(result, budget, options):
+        if budget is None:
+            return []
+        problems = []
+        if result['status'] != budget['status']:
+            problems.append(f'status {result["status"]}, baseline {budget["status"]}')
+        if result['queries'] > budget['queries']:
+            problems.append(f'{result["queries"]} queries, budget {budget["queries"]}')
+        max_rows = budget['rows'] * (1 + options['rows_tolerance'])
+        if result['rows'] > max_rows:
+            problems.append(f'{result["rows"]} rows, budget {max_rows:.0f}')
+        max_p95 = budget['p95'] * (1 + options['latency_tolerance']) + options['latency_slack']
+        if result['p95'] > max_p95:
+            problems.append(f'p95 {result["p95"]:.3f}ms, budget {max_p95:.3f}ms')
+        return problems
+
+    @staticmethod
+    def load_baseline(path):
+        try:
+            with open(path) as baseline_file:
+                return json.load(baseline_file)
+        except FileNotFoundError:
+            raise CommandError(f'Baseline {path} not found. Baselines are specific to the environment, '
+                               'create it with --save-baseline on the code to compare against')
+
+    @staticmethod
+    def format_result(name, result):
+        return (f'{name:<40} p50={result["p50"]:.3f}ms p95={result["p95"]:.3f}ms p99={result["p99"]:.3f}ms '
+                f'queries={result["queries"]} rows={result["rows"]}')
@@ -0,0 +1,125 @@
+import random
+
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.contrib.gis.geos import Point
+from django.contrib.gis.measure import Distance as D
+from django.core.management.base import BaseCommand
+
+from rest_framework.request import Request
+
+from api_v1.models import User, Match
+from api_v1.filters import LocationRangeFilter
+from api_v1.geocache import get_tile_cache
+from api_v1.utils.benchmark import measure, format_summary
+
+# python manage.py benchmark_geo_search --matches=2000000 --queries=200
+#
+# The tile cache only holds the tiles with up to MAX_CANDIDATES matches
+# (settings.GEO_TILE_CACHE), denser tiles fall back to the spatial index:
+# compare it in sparse areas, e.g. with --matches=50000.
+
+""" (longitude, latitude) of the synthetic match clusters """
+CLUSTERS = (
+    (-34.8770, -8.0476),   # Recife
+    (-46.6333, -23.5505),  # São Paulo
+    (-43.1729, -22.9068),  # Rio de Janeiro
+    (-38.5016, -3.7172),   # Fortaleza
+    (-51.2177, -30.0346),  # Porto Alegre
+)
+
+""" Spread (in degrees) of the matches around each cluster center """
+CLUSTER_SPREAD = 0.8
+
+INSERT_MATCHES_SQL = """
+INSERT INTO api_v1_match (title, owner_id, duration, location, date, end_date,
+                          category, participants_count, updated_date, created_date)
+SELECT 'Benchmark match ' || i, %(owner)s, interval '1 hour',
+       ST_SetSRID(ST_MakePoint(
+           (%(longitudes)s::float8[])[1 + i %% %(clusters)s] + (random() - 0.5) * %(spread)s,
+           (%(latitudes)s::float8[])[1 + i %% %(clusters)s] + (random() - 0.5) * %(spread)s
+       ), 4326),
+       now() + interval '1 day', now() + interval '1 day 1 hour', 'soccer', 0, now(), now()
+FROM generate_series(1, %(total)s) AS i
+"""
+
+
+class Command(BaseCommand):
+    help = ("benchmark the match radius search. Synthetic matches are inserted "
+            "in a transaction that is rolled back at the end.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--matches', type=int, default=2000000,
+                            help="Synthetic matches to insert before the benchmark")
+        parser.add_argument('--queries', type=int, default=200, help="Searches per strategy")
+        parser.add_argument('--radius', type=float, default=15, help="Search radius in km")
+        parser.add_argument('--seed', type=int, default=42, help="Random seed")
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        with transaction.atomic():
+            self.populate(options['matches'], options['seed'])
+            origins = [self.random_origin() for _ in range(options['queries'])]
+            self.run_benchmark(origins, options['radius'])
+            transaction.set_rollback(True)
+
+    def populate(self, total, seed):
+        self.stdout.write(f'inserting {total} synthetic matches...')
+        owner = User.objects.create_user(username='geo_benchmark', email='geo_benchmark@applada.com.br',
+                                         password=None)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT setseed(%s)', [(seed % 1000) / 1000])
+            cursor.execute(INSERT_MATCHES_SQL, {
+                'owner': owner.id,
+                'longitudes': [c[0] for c in CLUSTERS],
+                'latitudes': [c[1] for c in CLUSTERS],
+                'clusters': len(CLUSTERS),
+                'spread': CLUSTER_SPREAD,
+                'total': total,
+            })
+            cursor.execute('ANALYZE api_v1_match')
+
+    def random_origin(self):
+        longitude, latitude = random.choice(CLUSTERS)
+        return {'longitude': longitude + (random.random() - 0.5) * CLUSTER_SPREAD,
+                'latitude': latitude + (random.random() - 0.5) * CLUSTER_SPREAD}
+
+    def run_benchmark(self, origins, radius):
+        factory = RequestFactory()
+        location_filter = LocationRangeFilter()
+        location_filter.use_tile_cache = False
+        cached_location_filter = LocationRangeFilter()
+
+        def geometry_search(origin):
+            # Previous strategy: ST_DistanceSphere on the geometry column, per row
+            point = Point(origin['longitude'], origin['latitude'], srid=4326)
+            queryset = Match.objects.filter(location__distance_lte=(point, D(km=radius)))
+            return list(queryset.values_list('id', flat=True)[:20]), queryset.count()
+
+        def geography_search(origin, ordering, backend=location_filter):
+            params = {**origin, 'radius': radius, 'ordering': ordering}
+            request = Request(factory.get('/v1/matches', params))
+            queryset = backend.filter_queryset(request, Match.objects.all(), None)
+            return list(queryset.values_list('id', flat=True)[:20]), queryset.count()
+
+        strategies = (
+            ('geometry distance_lte', geometry_search),
+            ('geography ST_DWithin', lambda o: geography_search(o, '-created_date')),
+            ('geography ST_DWithin + KNN', lambda o: geography_search(o, 'distance')),
+        )
+        tile_cache = get_tile_cache()
+        if tile_cache is not None:
+            # Measured with the tiles of the origins already loaded
+            for origin in origins:
+                geography_search(origin, '-created_date', cached_location_filter)
+            strategies += (
+                ('tile cache candidates by primary key',
+                 lambda o: geography_search(o, '-created_date', cached_location_filter)),
+            )
+        for name, search in strategies:
+            samples = []
+            for origin in origins:
+                samples += measure(lambda: search(origin))
+            self.stdout.write(format_summary(name, samples))
+        if tile_cache is not None:
+            self.stdout.write(f'tile cache: {tile_cache.stats()}')
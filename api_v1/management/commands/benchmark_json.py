@@ -0,0 +1,70 @@
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.utils import timezone
+from django.core.management.base import BaseCommand
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api_v1.core import JSON_BACKENDS, orjson
+from api_v1.core.json_backends import StdlibJSONBackend
+from api_v1.utils.benchmark import measure, format_summary
+
+import io
+
+# python manage.py benchmark_json --page-size=20 --requests=5000
+
+
+def match_search_page(page_size):
+    """
+    Page of the match search, with the structure and values of the API responses.
+    """
+    date = timezone.now() + timedelta(days=1)
+    results = [OrderedDict((
+        ('match', OrderedDict((
+            ('id', 100000 + i),
+            ('title', f'Pelada de sábado {i}'),
+            ('description', 'Futebol society, levar chuteira e colete'),
+            ('limit_participants', 14),
+            ('participants_count', i % 14),
+            ('category', 'soccer'),
+            ('location', {'latitude': -8.0476 + i * 0.00137, 'longitude': -34.8770 - i * 0.00091}),
+            ('date', date.strftime('%Y-%m-%d %H:%M:%S')),
+            ('duration', '01:30:00'),
+            ('status', 'on_hold'),
+            ('owner', f'player{i}'),
+            ('created_date', date.strftime('%Y-%m-%d %H:%M:%S')),
+        ))),
+        ('distance', 0.1234 * i),
+    )) for i in range(page_size)]
+    return OrderedDict((('count', 1342), ('next', 'http://applada.com.br/v1/matches?cursor=W10='),
+                        ('previous', None), ('results', results)))
+
+
+class Command(BaseCommand):
+    help = ("benchmark rendering and parsing a match search page, DRF's JSON renderer "
+            "and parser against the JSON backends (api_v1.core.json_backends).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=20, help="Matches per page")
+        parser.add_argument('--requests', type=int, default=5000, help="Pages rendered and parsed per backend")
+
+    def handle(self, *args, **options):
+        data = match_search_page(options['page_size'])
+        content = JSONRenderer().render(data)
+        self.stdout.write(f'page: {len(content)} bytes')
+
+        self.report('DRF JSONRenderer', lambda: JSONRenderer().render(data), options['requests'])
+        self.report('DRF JSONParser', lambda: JSONParser().parse(io.BytesIO(content)), options['requests'])
+
+        for name, backend in JSON_BACKENDS.items():
+            if backend is not StdlibJSONBackend and orjson is None:
+                self.stdout.write(f'{name}: not installed')
+                continue
+            self.report(f'{name} dumps', lambda: backend.dumps(data), options['requests'])
+            self.report(f'{name} loads', lambda: backend.loads(content), options['requests'])
+
+    def report(self, name, func, requests):
+        measure(func, repeat=min(requests, 100))
+        self.stdout.write(format_summary(name, measure(func, repeat=requests)))
@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.test import RequestFactory, override_settings
+from django.core.handlers.base import BaseHandler
+from django.core.management.base import BaseCommand
+
+from api_v1.utils.benchmark import measure, summarize
+
+# python manage.py benchmark_middleware --path=/v1/users?search=user --token=<access token>
+
+
+class Command(BaseCommand):
+    help = ("benchmark the full and the lean API middleware chains. The time of each "
+            "middleware is the difference between the chains ending before and after it.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', type=str, default=f'{settings.API_PATH_PREFIX}not-found',
+                            help="Requested path, the default one does not query the database")
+        parser.add_argument('--requests', type=int, default=2000, help="Requests per chain")
+        parser.add_argument('--token', type=str, default=None, help="JWT access token")
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        headers = {'HTTP_HOST': settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost'}
+        if options['token']:
+            headers['HTTP_AUTHORIZATION'] = f'Bearer {options["token"]}'
+
+        lean_middleware = [settings.API_EXEMPT_MIDDLEWARE.get(m, m) for m in settings.FULL_MIDDLEWARE]
+        for name, middleware in (('full', settings.FULL_MIDDLEWARE), ('lean', lean_middleware)):
+            self.stdout.write(f'{name} chain ({options["path"]}):')
+            previous = self.benchmark_chain([], factory, options['path'], headers, options['requests'])
+            self.stdout.write(f'  {"view (no middleware)":<55} p50={previous:.4f}ms')
+            for i, path in enumerate(middleware, start=1):
+                current = self.benchmark_chain(middleware[:i], factory, options['path'],
+                                               headers, options['requests'])
+                self.stdout.write(f'  {path:<55} +{current - previous:.4f}ms (p50={current:.4f}ms)')
+                previous = current
+            self.stdout.write(f'  total p50={previous:.4f}ms')
+
+    @staticmethod
+    def benchmark_chain(middleware, factory, path, headers, requests):
+        """
+        Median time (in ms) of a request through the `middleware` chain.
+        """
+        with override_settings(MIDDLEWARE=middleware):
+            handler = BaseHandler()
+            handler.load_middleware()
+        request = lambda: handler.get_response(factory.get(path, **headers))
+        measure(request, repeat=min(requests, 100))
+        return summarize(measure(request, repeat=requests))['p50']
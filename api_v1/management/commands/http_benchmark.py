@@ -0,0 +1,88 @@
+import time
+import threading
+import urllib.error
+import urllib.request
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from api_v1.utils.benchmark import format_summary
+
+# python manage.py http_benchmark http://localhost:80/v1/users?search=user --token=<access token>
+
+
+class Command(BaseCommand):
+    help = ("benchmark the throughput and latency of a running server, for instance "
+            "`manage.py runserver` against gunicorn (applada/gunicorn.conf.py). "
+            "Background clients requesting a slow URL can be added, to measure how "
+            "much they delay the other clients.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', type=str, help="URL requested by the benchmark clients")
+        parser.add_argument('--requests', type=int, default=1000, help="Total requests")
+        parser.add_argument('--concurrency', type=int, default=16, help="Concurrent clients")
+        parser.add_argument('--token', type=str, default=None, help="JWT access token")
+        parser.add_argument('--warmup', type=int, default=20, help="Requests made before measuring")
+        parser.add_argument('--status', type=int, default=None,
+                            help="Expected response status (by default, any status below 400)")
+        parser.add_argument('--background-url', type=str, default=None,
+                            help="URL (e.g. a slow search) requested in loop while benchmarking")
+        parser.add_argument('--background-concurrency', type=int, default=4,
+                            help="Clients requesting the background URL")
+
+    def handle(self, *args, **options):
+        headers = {'Accept': 'application/json'}
+        if options['token']:
+            headers['Authorization'] = f'Bearer {options["token"]}'
+
+        status = options['status']
+        for _ in range(options['warmup']):
+            self.request(options['url'], headers)
+
+        stop = threading.Event()
+        background = []
+        if options['background_url']:
+            for _ in range(options['background_concurrency']):
+                thread = threading.Thread(target=self.request_until, daemon=True,
+                                          args=(options['background_url'], headers, stop))
+                thread.start()
+                background.append(thread)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            results = list(executor.map(lambda _: self.request(options['url'], headers, status),
+                                        range(options['requests'])))
+        elapsed = time.perf_counter() - start
+
+        stop.set()
+        for thread in background:
+            thread.join()
+
+        samples = [latency for latency, ok in results if ok]
+        errors = len(results) - len(samples)
+        self.stdout.write(format_summary(options['url'], samples))
+        self.stdout.write(f'throughput: {len(results) / elapsed:.1f} req/s, '
+                          f'errors: {errors}, concurrency: {options["concurrency"]}')
+
+    @staticmethod
+    def request(url, headers, status=None):
+        """
+        Latency (in ms) of a request and if it succeeded (responded with
+        `status`, or below 400 if it is None).
+        """
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, headers=headers)) as response:
+                response.read()
+                ok = response.status < 400 if status is None else response.status == status
+        except urllib.error.HTTPError as error:
+            error.read()
+            ok = error.code == status
+        except (urllib.error.URLError, ConnectionError):
+            ok = False
+        return (time.perf_counter() - start) * 1000, ok
+
+    def request_until(self, url, headers, stop):
+        while not stop.is_set():
+            self.request(url, headers)
@@ -1,8 +1,16 @@
+import io
+import random
+
+from datetime import datetime, timedelta
+
+from django.db import connection, transaction
 from django.utils import timezone
+from django.contrib.auth.hashers import make_password
 from django.core.management.base import BaseCommand
-from api_v1.models import User, Match, MatchCategory, MatchSubscription
+from api_v1.models import User, Match, MatchCategory, MatchSubscription, MatchChatMessage
 
 # python manage.py seed --mode=refresh
+# python manage.py seed --mode=scale --users=1000000 --matches=2000000 --seed=42
 
 """ Clear all data and creates addresses """
 MODE_REFRESH = 'refresh'
@@ -10,15 +18,66 @@ MODE_REFRESH = 'refresh'
 """ Clear all data and do not create any object """
 MODE_CLEAR = 'clear'
 
+""" Clear all data and bulk generate users, matches, subscriptions and chat messages """
+MODE_SCALE = 'scale'
+
+""" (longitude, latitude, weight) of the cities the matches are clustered around """
+CITIES = (
+    (-46.6333, -23.5505, 12.3),  # São Paulo
+    (-43.1729, -22.9068, 6.7),   # Rio de Janeiro
+    (-47.8825, -15.7942, 3.0),   # Brasília
+    (-38.5016, -3.7172, 2.7),    # Fortaleza
+    (-38.5108, -12.9714, 2.9),   # Salvador
+    (-43.9378, -19.9208, 2.5),   # Belo Horizonte
+    (-34.8770, -8.0476, 1.6),    # Recife
+    (-51.2177, -30.0346, 1.5),   # Porto Alegre
+    (-49.2733, -25.4284, 1.9),   # Curitiba
+    (-60.0217, -3.1190, 2.2),    # Manaus
+)
+
+NAMES = ('Ana', 'Bruno', 'Carla', 'Diego', 'Eduarda', 'Felipe', 'Gabriela', 'Henrique', 'Igor',
+         'Júlia', 'Lucas', 'Mariana', 'Pedro', 'Rafaela', 'Thiago', 'Vitória')
+
+MESSAGES = ('Bora!', 'Quem leva a bola?', 'Chego 10 minutos atrasado', 'Tem vaga ainda?',
+            'Confirmado', 'Vai chover, mantemos?', 'Levo o colete', 'Valeu, até a próxima')
+
+""" (value, weight) distributions of the matches """
+CATEGORIES = ((str(MatchCategory.SOCCER), 6), (str(MatchCategory.VOLEYBALL), 2),
+              (str(MatchCategory.BASKETBALL), 2))
+DURATIONS = ((timedelta(hours=1), 5), (timedelta(hours=1, minutes=30), 3), (timedelta(hours=2), 2))
+LIMITS = ((None, 3), (10, 2), (14, 3), (22, 2))
+
+KM_PER_DEGREE = 111.32
+
+
 class Command(BaseCommand):
     help = "seed database for testing and development."
 
     def add_arguments(self, parser):
-        parser.add_argument('--mode', type=str, help="Mode")
+        parser.add_argument('--mode', type=str, help="Mode (refresh, clear or scale)")
+        scale = parser.add_argument_group('scale mode')
+        scale.add_argument('--users', type=int, default=100000, help="Users")
+        scale.add_argument('--matches', type=int, default=200000, help="Matches")
+        scale.add_argument('--participants-mean', type=float, default=8,
+                           help="Mean subscriptions per match (exponential distribution)")
+        scale.add_argument('--messages-mean', type=float, default=5,
+                           help="Mean chat messages per match (exponential distribution)")
+        scale.add_argument('--spread', type=float, default=10,
+                           help="Standard deviation (km) of the matches around the city centers")
+        scale.add_argument('--past-ratio', type=float, default=0.7,
+                           help="Fraction of matches in the past, the others are in the next 30 days")
+        scale.add_argument('--owner-skew', type=float, default=2.0,
+                           help="Skew of the match owners, 1 is uniform, higher values concentrate "
+                                "matches in fewer users")
+        scale.add_argument('--seed', type=int, default=42, help="Random seed")
+        scale.add_argument('--batch-size', type=int, default=10000, help="Matches per COPY batch")
 
     def handle(self, *args, **options):
         self.stdout.write('seeding data...')
-        run_seed(self, options['mode'])
+        if options['mode'] == MODE_SCALE:
+            ScaleSeed(self, options).run()
+        else:
+            run_seed(self, options['mode'])
         self.stdout.write('done.')
 
 
@@ -53,4 +112,154 @@ def run_seed(self, mode):
 
     MatchSubscription(user=igorfc, match=match_1).save()
     match_1.limit_participants = None
-    match_1.save()
\ No newline at end of file
+    match_1.save()
+
+
+def copy_value(value):
+    """
+    Value in the COPY text format.
+    """
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, str):
+        return value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+    return str(value)
+
+
+def copy_rows(cursor, model, fields, rows):
+    """
+    Insert the rows (tuples of the `fields` values) in the model table with COPY.
+    """
+    columns = ', '.join(connection.ops.quote_name(model._meta.get_field(f).column) for f in fields)
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(map(copy_value, row)))
+        buffer.write('\n')
+    buffer.seek(0)
+    cursor.copy_expert(f'COPY {model._meta.db_table} ({columns}) FROM STDIN', buffer)
+
+
+class ScaleSeed:
+    """
+    Bulk generation of realistic data volumes: users, matches clustered
+    around the largest cities, their subscriptions and chat messages.
+    Rows are inserted with COPY, bypassing save() and the signals, so the
+    denormalized fields (end_date, participants_count) are computed here.
+    Generated data depends only on the options, `--seed` included.
+    """
+    user_fields = ('id', 'password', 'is_superuser', 'username', 'first_name', 'last_name', 'email',
+                   'is_staff', 'is_active', 'date_joined', 'level', 'token_version', 'version')
+    match_fields = ('id', 'title', 'description', 'limit_participants', 'owner_id', 'duration', 'location',
+                    'date', 'end_date', 'category', 'participants_count', 'updated_date', 'created_date')
+    subscription_fields = ('match_id', 'user_id', 'date')
+    message_fields = ('match_id', 'user_id', 'message', 'date')
+
+    def __init__(self, command, options):
+        self.command = command
+        self.options = options
+        self.random = random.Random(options['seed'])
+        self.now = timezone.now()
+        self.counts = {'users': 0, 'matches': 0, 'subscriptions': 0, 'messages': 0}
+
+    def run(self):
+        with transaction.atomic(), connection.cursor() as cursor:
+            self.clear(cursor)
+            self.copy_users(cursor)
+            self.copy_matches(cursor)
+            self.reset_sequences(cursor)
+        with connection.cursor() as cursor:
+            for model in (User, Match, MatchSubscription, MatchChatMessage):
+                cursor.execute(f'ANALYZE {model._meta.db_table}')
+        self.command.stdout.write(', '.join(f'{count} {name}' for name, count in self.counts.items()))
+
+    @staticmethod
+    def clear(cursor):
+        tables = ', '.join(model._meta.db_table for model in (MatchChatMessage, MatchSubscription, Match, User))
+        cursor.execute(f'TRUNCATE {tables} RESTART IDENTITY CASCADE')
+
+    def copy_users(self, cursor):
+        password = make_password('1234')
+        total = self.options['users']
+        for start in range(1, total + 1, self.options['batch_size']):
+            end = min(start + self.options['batch_size'], total + 1)
+            copy_rows(cursor, User, self.user_fields, (self.user_row(i, password) for i in range(start, end)))
+            self.command.stdout.write(f'users: {end - 1}/{total}')
+        self.counts['users'] = total
+
+    def user_row(self, user_id, password):
+        date_joined = self.now - timedelta(days=self.random.uniform(0, 730))
+        return (user_id, password, False, f'player{user_id}', self.random.choice(NAMES), '',
+                f'player{user_id}@seed.applada.com.br', False, True, date_joined, 1, 0, 0)
+
+    def copy_matches(self, cursor):
+        total = self.options['matches']
+        for start in range(1, total + 1, self.options['batch_size']):
+            end = min(start + self.options['batch_size'], total + 1)
+            matches, subscriptions, messages = [], [], []
+            for match_id in range(start, end):
+                self.generate_match(match_id, matches, subscriptions, messages)
+            copy_rows(cursor, Match, self.match_fields, matches)
+            copy_rows(cursor, MatchSubscription, self.subscription_fields, subscriptions)
+            copy_rows(cursor, MatchChatMessage, self.message_fields, messages)
+            self.counts['subscriptions'] += len(subscriptions)
+            self.counts['messages'] += len(messages)
+            self.command.stdout.write(f'matches: {end - 1}/{total}')
+        self.counts['matches'] = total
+
+    def generate_match(self, match_id, matches, subscriptions, messages):
+        rng = self.random
+        users = self.options['users']
+        owner_id = 1 + int(users * rng.random() ** self.options['owner_skew'])
+        owner_id = min(owner_id, users)
+
+        if rng.random() < self.options['past_ratio']:
+            date = self.now - timedelta(days=rng.uniform(1, 365))
+        else:
+            date = self.now + timedelta(days=rng.uniform(1 / 24, 30))
+        duration = self.weighted_choice(DURATIONS)
+        created_date = min(date - timedelta(days=rng.uniform(0, 14)), self.now)
+        limit = self.weighted_choice(LIMITS)
+
+        participants = 1 + int(rng.expovariate(1 / self.options['participants_mean'])) \
+            if self.options['participants_mean'] > 0 else 1
+        participants = min(participants, limit or participants, users)
+        participant_ids = {owner_id}
+        while len(participant_ids) < participants:
+            participant_ids.add(rng.randint(1, users))
+
+        matches.append((
+            match_id, f'Match {match_id}', rng.choice((None, 'Levar chuteira', 'Quadra coberta')), limit,
+            owner_id, duration, self.location(), date, date + duration, self.weighted_choice(CATEGORIES),
+            len(participant_ids), created_date, created_date,
+        ))
+        for user_id in participant_ids:
+            subscriptions.append((match_id, user_id, created_date + timedelta(minutes=rng.uniform(0, 60))))
+
+        total_messages = int(rng.expovariate(1 / self.options['messages_mean'])) \
+            if self.options['messages_mean'] > 0 else 0
+        participant_ids = sorted(participant_ids)
+        for _ in range(total_messages):
+            message_date = created_date + (min(date, self.now) - created_date) * rng.random()
+            messages.append((match_id, rng.choice(participant_ids), rng.choice(MESSAGES), message_date))
+
+    def location(self):
+        longitude, latitude, _ = self.weighted_choice((city, city[2]) for city in CITIES)
+        spread = self.options['spread'] / KM_PER_DEGREE
+        latitude += self.random.gauss(0, spread)
+        longitude += self.random.gauss(0, spread)
+        return f'SRID=4326;POINT({longitude} {latitude})'
+
+    def weighted_choice(self, choices):
+        values, weights = zip(*choices)
+        return self.random.choices(values, weights)[0]
+
+    @staticmethod
+    def reset_sequences(cursor):
+        for model in (User, Match, MatchSubscription, MatchChatMessage):
+            table = model._meta.db_table
+            cursor.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                           f"COALESCE(MAX(id), 0) + 1, false) FROM {table}")
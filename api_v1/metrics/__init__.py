@@ -0,0 +1,3 @@
+from .collectors import *
+from .middleware import *
+from .views import *
@@ -0,0 +1,86 @@
+import time
+import threading
+
+from django.conf import settings
+from django.db import connections
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from api_v1.geocache.tiles import get_tile_cache
+
+"""
+Metrics of the API. Values are kept by each process (in files of the
+`prometheus_multiproc_dir` directory with gunicorn) and aggregated by the
+metrics view, so updating them only takes the short per-process lock of
+prometheus_client.
+"""
+REQUEST_LATENCY = Histogram('applada_http_request_duration_seconds', 'Request latency by route',
+                            ['route', 'method'])
+REQUESTS = Counter('applada_http_requests_total', 'Requests by route and response status',
+                   ['route', 'method', 'status'])
+
+MATCHES_CREATED = Counter('applada_matches_created_total', 'Created matches')
+
+""" Subscription actions """
+SUBSCRIBE = 'subscribe'
+UNSUBSCRIBE = 'unsubscribe'
+
+SUBSCRIPTIONS = Counter('applada_match_subscriptions_total', 'Match subscriptions and unsubscriptions',
+                        ['action'])
+SIGN_INS = Counter('applada_sign_ins_total', 'Obtained JWT token pairs')
+TOKEN_REFRESHES = Counter('applada_token_refreshes_total', 'Refreshed JWT access tokens')
+
+DB_POOL_CONNECTIONS = Gauge('applada_db_pool_connections', 'Pooled database connections by state',
+                            ['state'], multiprocess_mode='livesum')
+DB_POOL_EVENTS = Counter('applada_db_pool_events_total', 'Database connection pool events', ['event'])
+GEO_TILE_CACHE_LOOKUPS = Counter('applada_geo_tile_cache_lookups_total',
+                                 'Match location search tile cache lookups', ['result'])
+
+POOL_STATES = ('in_use', 'idle', 'waiting')
+POOL_EVENTS = ('checkouts', 'created', 'discarded', 'health_check_failures', 'timeouts')
+
+_published = {}
+_last_publish = 0
+_publish_lock = threading.Lock()
+
+
+def _publish_total(counter, label, total):
+    """
+    Increment a labelled counter by the growth of a cumulative total of this process.
+    """
+    key = (counter, label)
+    delta = total - _published.get(key, 0)
+    if delta > 0:
+        counter.labels(label).inc(delta)
+    _published[key] = total
+
+
+def publish_process_stats(force=False):
+    """
+    Publish the statistics kept by the process itself (connection pools and
+    tile cache), at most every `settings.METRICS['PROCESS_STATS_INTERVAL']`
+    seconds. A thread publishing makes the others skip it instead of waiting.
+    """
+    global _last_publish
+    now = time.monotonic()
+    if not force and now - _last_publish < settings.METRICS['PROCESS_STATS_INTERVAL']:
+        return
+    if not _publish_lock.acquire(blocking=False):
+        return
+    try:
+        _last_publish = now
+        pool_stats = getattr(connections['default'], 'pool_stats', None)
+        if pool_stats is not None:
+            pools = pool_stats()
+            for state in POOL_STATES:
+                DB_POOL_CONNECTIONS.labels(state).set(sum(pool[state] for pool in pools))
+            for event in POOL_EVENTS:
+                _publish_total(DB_POOL_EVENTS, event, sum(pool[event] for pool in pools))
+
+        tile_cache = get_tile_cache()
+        if tile_cache is not None:
+            stats = tile_cache.stats()
+            _publish_total(GEO_TILE_CACHE_LOOKUPS, 'hit', stats['hits'])
+            _publish_total(GEO_TILE_CACHE_LOOKUPS, 'miss', stats['misses'])
+    finally:
+        _publish_lock.release()
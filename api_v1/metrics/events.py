@@ -0,0 +1,22 @@
+from django.dispatch import receiver
+from django.db.models.signals import post_save, post_delete
+
+from api_v1.models import Match, MatchSubscription
+from api_v1.metrics.collectors import MATCHES_CREATED, SUBSCRIPTIONS, SUBSCRIBE, UNSUBSCRIBE
+
+
+@receiver(post_save, sender=Match)
+def match_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        MATCHES_CREATED.inc()
+
+
+@receiver(post_save, sender=MatchSubscription)
+def subscription_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        SUBSCRIPTIONS.labels(SUBSCRIBE).inc()
+
+
+@receiver(post_delete, sender=MatchSubscription)
+def subscription_deleted(sender, instance, **kwargs):
+    SUBSCRIPTIONS.labels(UNSUBSCRIBE).inc()
@@ -0,0 +1,27 @@
+import time
+
+from api_v1.metrics.collectors import REQUEST_LATENCY, REQUESTS, publish_process_stats
+
+UNMATCHED_ROUTE = 'unmatched'
+
+
+class MetricsMiddleware:
+    """
+    Count the requests and observe their latency by route, the URL pattern
+    name (e.g. 'match_create_search'), so the labels do not grow with the
+    requested paths.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        resolver_match = request.resolver_match
+        route = resolver_match.view_name if resolver_match else UNMATCHED_ROUTE
+        REQUEST_LATENCY.labels(route, request.method).observe(elapsed)
+        REQUESTS.labels(route, request.method, str(response.status_code)).inc()
+        publish_process_stats()
+        return response
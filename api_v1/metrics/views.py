@@ -0,0 +1,37 @@
+import os
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+
+from prometheus_client import REGISTRY, CollectorRegistry, CONTENT_TYPE_LATEST, generate_latest
+from prometheus_client.multiprocess import MultiProcessCollector
+
+from api_v1.metrics.collectors import publish_process_stats
+
+
+def get_registry():
+    """
+    Registry of the metrics of all the processes in multi-process mode, or of this process.
+    """
+    if 'prometheus_multiproc_dir' not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry)
+    return registry
+
+
+def metrics_view(request):
+    """
+    Metrics in the Prometheus text format. `settings.METRICS['TOKEN']` is
+    required as Bearer token, without it the metrics are only served in
+    DEBUG mode.
+    """
+    token = settings.METRICS.get('TOKEN')
+    if not token:
+        if not settings.DEBUG:
+            return HttpResponse(status=403)
+    elif not constant_time_compare(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'):
+        return HttpResponse(status=401)
+    publish_process_stats(force=True)
+    return HttpResponse(generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST)
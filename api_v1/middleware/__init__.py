@@ -1,14 +1,59 @@
 from rest_framework import status
 
+from django.conf import settings
 from django.utils.deprecation import MiddlewareMixin
-from django.http import JsonResponse
+from django.http import HttpResponse
+from django.middleware.csrf import CsrfViewMiddleware
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.messages.middleware import MessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.middleware.clickjacking import XFrameOptionsMiddleware
 
-from api_v1.core import not_found_json
+from api_v1.core import not_found_json, json_dumps
 
 
 class NotFoundMiddleware(MiddlewareMixin):
     def process_response(self, request, response):
         if (response.status_code == status.HTTP_404_NOT_FOUND
                 and 'application/json' != response.get('Content-Type')):
-            return JsonResponse(not_found_json(), status=status.HTTP_404_NOT_FOUND)
-        return response
\ No newline at end of file
+            return HttpResponse(json_dumps(not_found_json()), content_type='application/json',
+                                status=status.HTTP_404_NOT_FOUND)
+        return response
+
+
+def is_api_request(request):
+    return request.path_info.startswith(settings.API_PATH_PREFIX)
+
+
+class APIExemptMixin:
+    """
+    Skip the middleware for API requests (`settings.API_PATH_PREFIX`), which
+    are authenticated by JWT and have no sessions, cookies or HTML pages.
+    """
+    def __call__(self, request):
+        if is_api_request(request):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class APIExemptSessionMiddleware(APIExemptMixin, SessionMiddleware):
+    pass
+
+
+class APIExemptCsrfViewMiddleware(APIExemptMixin, CsrfViewMiddleware):
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        if is_api_request(request):
+            return None
+        return super().process_view(request, callback, callback_args, callback_kwargs)
+
+
+class APIExemptAuthenticationMiddleware(APIExemptMixin, AuthenticationMiddleware):
+    pass
+
+
+class APIExemptMessageMiddleware(APIExemptMixin, MessageMiddleware):
+    pass
+
+
+class APIExemptXFrameOptionsMiddleware(APIExemptMixin, XFrameOptionsMiddleware):
+    pass
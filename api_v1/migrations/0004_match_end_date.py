@@ -0,0 +1,35 @@
+# Generated by Django 3.0.2 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+def fill_end_date(apps, schema_editor):
+    Match = apps.get_model('api_v1', 'Match')
+    end_date = models.ExpressionWrapper(models.F('date') + models.F('duration'),
+                                        output_field=models.DateTimeField())
+    Match.objects.update(end_date=end_date)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_v1', '0003_auto_20200123_1132'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='end_date',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='end date'),
+        ),
+        migrations.RunPython(fill_end_date, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='match',
+            name='end_date',
+            field=models.DateTimeField(blank=True, editable=False, verbose_name='end date'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['date', 'end_date'], name='api_v1_match_date_end_idx'),
+        ),
+    ]
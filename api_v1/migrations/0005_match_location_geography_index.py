@@ -0,0 +1,20 @@
+# Generated by Django 3.0.2 on 2026-10-18 11:03
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_v1', '0004_match_end_date'),
+    ]
+
+    operations = [
+        # Functional index used by the geography search functions 
+        # (api_v1.models.functions): ST_DWithin, ST_Distance and <->
+        migrations.RunSQL(
+            'CREATE INDEX api_v1_match_location_geog_idx '
+            'ON api_v1_match USING GIST ((location::geography));',
+            'DROP INDEX IF EXISTS api_v1_match_location_geog_idx;'
+        ),
+    ]
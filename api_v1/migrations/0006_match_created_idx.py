@@ -0,0 +1,17 @@
+# Generated by Django 3.0.2 on 2026-10-18 11:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_v1', '0005_match_location_geography_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['created_date', 'id'], name='api_v1_match_created_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 3.0.2 on 2026-10-18 12:20
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def fill_participants_count(apps, schema_editor):
+    Match = apps.get_model('api_v1', 'Match')
+    MatchSubscription = apps.get_model('api_v1', 'MatchSubscription')
+    subscriptions = MatchSubscription.objects.filter(match=models.OuterRef('pk')) \
+                                             .order_by().values('match') \
+                                             .annotate(total=models.Count('id')).values('total')
+    Match.objects.update(participants_count=Coalesce(
+        models.Subquery(subscriptions, output_field=models.IntegerField()), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_v1', '0006_match_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='participants_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='participants count'),
+        ),
+        migrations.RunPython(fill_participants_count, migrations.RunPython.noop),
+    ]
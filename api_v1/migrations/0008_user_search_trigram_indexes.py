@@ -0,0 +1,32 @@
+# Generated by Django 3.0.2 on 2026-10-18 13:12
+
+from django.db import migrations
+from django.contrib.postgres.operations import TrigramExtension
+
+# Django case-insensitive lookups compare UPPER("column"::text), the indexes
+# are on the same expression so the planner can match them.
+SEARCH_INDEXES = (
+    # icontains: UPPER(col::text) LIKE '%TERM%'
+    ('api_v1_user_username_trgm_idx', 'username', 'GIN', 'gin_trgm_ops'),
+    ('api_v1_user_first_name_trgm_idx', 'first_name', 'GIN', 'gin_trgm_ops'),
+    # istartswith: UPPER(col::text) LIKE 'TERM%', for terms too short for trigrams
+    ('api_v1_user_username_prefix_idx', 'username', 'BTREE', 'text_pattern_ops'),
+    ('api_v1_user_first_name_prefix_idx', 'first_name', 'BTREE', 'text_pattern_ops'),
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_v1', '0007_match_participants_count'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+    ] + [
+        migrations.RunSQL(
+            f'CREATE INDEX {name} ON api_v1_user USING {method} ((UPPER("{column}"::text)) {opclass});',
+            f'DROP INDEX IF EXISTS {name};'
+        )
+        for name, column, method, opclass in SEARCH_INDEXES
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.0.2 on 2026-10-18 15:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_v1', '0009_user_token_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='matchchatmessage',
+            index=models.Index(fields=['match', 'date', 'id'], name='api_v1_chat_match_date_idx'),
+        ),
+    ]
@@ -0,0 +1,81 @@
+from django.db.models import Func, BooleanField, FloatField, Value
+from django.contrib.gis.measure import Distance as D
+from django.contrib.gis.db.models import GeometryField
+from django.contrib.gis.db.models.sql import DistanceField
+
+
+def geometry_value(geometry):
+    # Field names and expressions are kept, geometries become typed values
+    if isinstance(geometry, str) or hasattr(geometry, 'resolve_expression'):
+        return geometry
+    return Value(geometry, output_field=GeometryField(srid=geometry.srid))
+
+
+class AsGeography(Func):
+    """
+    Cast a geometry to geography. Its SQL is the same expression of the
+    functional GiST index on `api_v1_match.location`, so PostgreSQL can
+    use that index for the geography functions below.
+    """
+    template = '%(expressions)s::geography'
+    output_field = GeometryField(geography=True)
+
+    def __init__(self, expression, **extra):
+        super().__init__(geometry_value(expression), **extra)
+
+
+class KNNDistance(Func):
+    """
+    PostGIS `<->` (nearest neighbour) distance operator. Ordering by it
+    makes PostgreSQL walk the GiST index of the field nearest-first, so
+    a LIMIT stops the scan once the page is full. Both operands are cast
+    to geography, so the distance is in meters.
+    """
+    arg_joiner = ' <-> '
+    template = '(%(expressions)s)'
+    output_field = FloatField()
+
+    def __init__(self, expression, geometry, **extra):
+        super().__init__(AsGeography(expression), AsGeography(geometry), **extra)
+
+
+class GeographyDistance(Func):
+    """
+    Spheroid distance (ST_Distance on geography) between two geometries.
+    """
+    function = 'ST_Distance'
+    output_field = DistanceField(GeometryField(geography=True))
+
+    def __init__(self, expression, geometry, **extra):
+        super().__init__(AsGeography(expression), AsGeography(geometry), **extra)
+
+
+class GeographyDWithin(Func):
+    """
+    Index-assisted ST_DWithin on geography: true if both geometries are
+    within `distance` (a Distance object or meters) of each other.
+    """
+    function = 'ST_DWithin'
+    output_field = BooleanField()
+
+    def __init__(self, expression, geometry, distance, **extra):
+        if isinstance(distance, D):
+            distance = distance.m
+        super().__init__(AsGeography(expression), AsGeography(geometry),
+                         Value(float(distance)), **extra)
+
+
+class PointX(Func):
+    """
+    X (longitude) coordinate of a point, ST_X.
+    """
+    function = 'ST_X'
+    output_field = FloatField()
+
+
+class PointY(Func):
+    """
+    Y (latitude) coordinate of a point, ST_Y.
+    """
+    function = 'ST_Y'
+    output_field = FloatField()
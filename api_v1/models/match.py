@@ -1,7 +1,13 @@
-from django.db import models
+import threading
+
+from collections import Counter
+
+from django.db import models, transaction
+from django.db.utils import IntegrityError
 from django.utils import timezone
-from django.dispatch import receiver
-from django.db.models.signals import post_save
+from django.dispatch import receiver, Signal
+from django.db.models.signals import post_save, post_delete
+from django.db.models.functions import Greatest
 from django.core.validators import MinValueValidator
 from django.utils.translation import gettext_lazy as _
 from django.contrib.gis.db import models as gis_models
@@ -14,6 +20,10 @@ from datetime import timedelta
 
 from . import User
 
+""" Sent when the participants count of the matches `match_ids` is updated by
+    their subscriptions (QuerySet.update, which sends no post_save) """
+participants_count_changed = Signal(providing_args=['match_ids'])
+
 
 class MatchCategory(Enum):
     SOCCER = ('soccer', _('Soccer'))
@@ -29,9 +39,9 @@ class MatchCategory(Enum):
 
 
 class MatchStatus(Enum):
-    ON_HOLD = 'on_hold', lambda now, duration: dict(date__lt=now)
-    ON_GOING = 'on_going', lambda now, duration: dict(date__range=(now, now + duration))
-    FINISHED = 'finished', lambda now, duration: dict(date__gte=now)
+    ON_HOLD = 'on_hold', lambda now: dict(date__gt=now)
+    ON_GOING = 'on_going', lambda now: dict(date__lte=now, end_date__gt=now)
+    FINISHED = 'finished', lambda now: dict(end_date__lte=now)
 
     def __new__(cls, value, queryset_filter):
         obj = object.__new__(cls)
@@ -42,8 +52,22 @@ class MatchStatus(Enum):
     def __str__(self):
         return str(self.value)
     
-    def get_queryset_filter(self):
-        return self.queryset_filter(timezone.now())
+    def get_queryset_filter(self, now=None):
+        return self.queryset_filter(now or timezone.now())
+
+    @staticmethod
+    def get_queryset_expression(now=None):
+        """
+        Expression that computes the match status in database, using the same
+        bounds of `get_queryset_filter` (backed by the (date, end_date) index).
+        """
+        now = now or timezone.now()
+        return gis_models.Case(
+            *[gis_models.When(then=gis_models.Value(status.value), **status.get_queryset_filter(now))
+              for status in (MatchStatus.ON_HOLD, MatchStatus.ON_GOING)],
+            default=gis_models.Value(MatchStatus.FINISHED.value),
+            output_field=gis_models.CharField()
+        )
 
     @staticmethod
     def get_match_status(match):
@@ -56,7 +80,38 @@ class MatchStatus(Enum):
         return MatchStatus.ON_HOLD
 
 
+class MatchQuerySet(gis_models.QuerySet):
+    def with_status(self, now=None):
+        """
+        Annotate each match with its status computed by the database,
+        available as `current_status` (read by `Match.status`).
+        """
+        return self.annotate(current_status=MatchStatus.get_queryset_expression(now))
+
+    def filter_status(self, match_status, now=None):
+        return self.filter(**match_status.get_queryset_filter(now))
+
+    @staticmethod
+    def last_modified_expression(now=None):
+        """
+        Expression that computes `Match.last_modified` in database.
+        """
+        now = now or timezone.now()
+        return Greatest(
+            'updated_date',
+            gis_models.Case(gis_models.When(date__lte=now, then='date')),
+            gis_models.Case(gis_models.When(end_date__lte=now, then='end_date')),
+            output_field=gis_models.DateTimeField()
+        )
+
+
 class Match(gis_models.Model):
+    class Meta:
+        indexes = [
+            gis_models.Index(fields=['date', 'end_date'], name='api_v1_match_date_end_idx'),
+            gis_models.Index(fields=['created_date', 'id'], name='api_v1_match_created_idx'),
+        ]
+
     title = gis_models.CharField(_('title'), max_length=50)
     description = gis_models.CharField(_('description'), max_length=255, null=True, blank=True)
     limit_participants = gis_models.PositiveIntegerField(_('limit participants'), null=True, blank=True)
@@ -64,11 +119,20 @@ class Match(gis_models.Model):
     duration = gis_models.DurationField(_('duration'))
     location = gis_models.PointField(_('location'))
     date = gis_models.DateTimeField(_('date'))
+    # Denormalized `date + duration`, kept by `save()`. It makes match status 
+    # queries index range scans (an expression index on `date + duration` is not 
+    # possible, timestamptz + interval is not an immutable operation).
+    end_date = gis_models.DateTimeField(_('end date'), editable=False, blank=True)
     category = gis_models.CharField(_('category'), max_length=15, default=None, 
                                 choices=MatchCategory.choices())
+    # Denormalized total of subscriptions, kept by MatchSubscription
+    participants_count = gis_models.PositiveIntegerField(_('participants count'), default=0,
+                                                         editable=False)
     updated_date = gis_models.DateTimeField(auto_now=True)
     created_date = gis_models.DateTimeField(auto_now_add=True)
 
+    objects = MatchQuerySet.as_manager()
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._current_date = self.date
@@ -81,8 +145,20 @@ class Match(gis_models.Model):
     def longitude(self):
         return self.location.x
 
+    @property
+    def last_modified(self):
+        """
+        Last change of the match representation: its last update, or the
+        start or end of the match (status changes) if already reached.
+        """
+        now = timezone.now()
+        return max([self.updated_date] + [d for d in (self.date, self.end_date) if d and d <= now])
+
     @property
     def status(self):
+        # Status already computed by the database (see MatchQuerySet.with_status)
+        if 'current_status' in self.__dict__:
+            return MatchStatus(self.current_status)
         return MatchStatus.get_match_status(self)
     
     def clean(self):
@@ -91,9 +167,11 @@ class Match(gis_models.Model):
         if self.id and self.status == MatchStatus.FINISHED:
             raise ValidationError(_('Finished match cannot be edited'))
 
-        if self.limit_participants:
-            subscriptions = MatchSubscription.objects.filter(match=self.id)
-            if self.limit_participants < len(subscriptions):
+        if self.limit_participants is not None:
+            # The owner is subscribed when the match is created
+            if self.limit_participants < 1:
+                raise ValidationError(_('Limit participants must be at least 1'))
+            if self.limit_participants < self.participants_count:
                 raise ValidationError(_('Limit participants must be grater '
                                         'than current total participants'))
         
@@ -104,15 +182,36 @@ class Match(gis_models.Model):
             raise ValidationError(_('Match date must be at least one hour longer than now'))
         
     def save(self, *args, **kwargs):
+        if self.date and self.duration is not None:
+            self.end_date = self.date + self.duration
         self.full_clean()
-        super().save(*args, **kwargs)
+        if not self._state.adding and 'update_fields' not in kwargs:
+            # Participants count is updated only by subscriptions, atomically.
+            # A stale value in memory must not overwrite it.
+            kwargs['update_fields'] = [f.name for f in self._meta.concrete_fields
+                                       if not f.primary_key and f.name != 'participants_count']
+        # A new match is saved together with the owner subscription (post_save)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+        # The annotated status may not reflect the saved date anymore
+        self.__dict__.pop('current_status', None)
+        self._loaded_location = self.location
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Location stored in the database, post_save receivers use it to
+        # know where the match was before an update
+        instance._loaded_location = instance.__dict__.get('location')
+        return instance
     
     @staticmethod
     @receiver(post_save, sender='api_v1.Match')
     def post_save(created, instance, **kwargs):
-        # Create owner's match subscription always a match is created
+        # Create owner's match subscription always a match is created, its
+        # participants count is sent with the match itself
         if created:
-            MatchSubscription.objects.create(match=instance, user=instance.owner)
+            MatchSubscription(match=instance, user=instance.owner).save(send_count_changed=False)
 
 
 class MatchSubscription(models.Model):
@@ -127,12 +226,79 @@ class MatchSubscription(models.Model):
         if self.match and self.match.status == MatchStatus.FINISHED:
             raise ValidationError(_('You cannot subscribe for a finished match'))
 
-    def save(self, *args, **kwargs):
+    def save(self, *args, send_count_changed=True, **kwargs):
         self.full_clean()
-        super().save(*args, **kwargs)
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+
+        with transaction.atomic():
+            # Conditional UPDATE: takes a seat only if the match has a vacancy. It locks
+            # the match row until the subscription is inserted, so concurrent
+            # subscriptions cannot oversubscribe the match.
+            vacancy = models.Q(limit_participants__isnull=True) | \
+                      models.Q(participants_count__lt=models.F('limit_participants'))
+            seat_taken = Match.objects.filter(vacancy, pk=self.match_id) \
+                .update(participants_count=models.F('participants_count') + 1,
+                        updated_date=timezone.now())
+            if not seat_taken:
+                raise ValidationError(_('This match is full'))
+            try:
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+            except IntegrityError:
+                # Concurrent subscription of the same user, the seat is released by the rollback
+                raise ValidationError(_('Match subscription with this Match and User already exists.'))
+            if send_count_changed:
+                participants_count_changed.send(sender=MatchSubscription, match_ids=[self.match_id])
+        self.match.participants_count += 1
+
+    @staticmethod
+    def delete_many(queryset):
+        """
+        Delete the subscriptions of `queryset` (QuerySet.delete()), updating
+        the participants count of each match once, instead of once per
+        subscription. Returns the number of subscriptions deleted.
+        """
+        with transaction.atomic():
+            _deleted_subscriptions.counts = Counter()
+            try:
+                deleted, _ = queryset.delete()
+                counts = _deleted_subscriptions.counts
+            finally:
+                del _deleted_subscriptions.counts
+            for match_id, count in counts.items():
+                Match.objects.filter(pk=match_id) \
+                    .update(participants_count=models.F('participants_count') - count,
+                            updated_date=timezone.now())
+            if counts:
+                participants_count_changed.send(sender=MatchSubscription, match_ids=list(counts))
+        return deleted
+
+    @staticmethod
+    @receiver(post_delete, sender='api_v1.MatchSubscription')
+    def post_delete(instance, **kwargs):
+        counts = getattr(_deleted_subscriptions, 'counts', None)
+        if counts is not None:
+            # Updated by delete_many
+            counts[instance.match_id] += 1
+            return
+        Match.objects.filter(pk=instance.match_id) \
+            .update(participants_count=models.F('participants_count') - 1,
+                    updated_date=timezone.now())
+        participants_count_changed.send(sender=MatchSubscription, match_ids=[instance.match_id])
+
+
+# Subscriptions deleted by MatchSubscription.delete_many in the thread, by match
+_deleted_subscriptions = threading.local()
 
 
 class MatchChatMessage(models.Model):
+    class Meta:
+        indexes = [
+            # Chat history, keyset paginated by (-date, -id)
+            models.Index(fields=['match', 'date', 'id'], name='api_v1_chat_match_date_idx'),
+        ]
+
     match = models.ForeignKey(Match, on_delete=models.CASCADE)
     user = models.ForeignKey(User, null=False, on_delete=models.CASCADE)
     message = models.TextField(null=False, blank=False)
@@ -15,6 +15,10 @@ class User(AbstractUser):
                                   blank=True, null=True, default=None)
     email = models.EmailField(_('email'), unique=True)
     level = models.PositiveIntegerField(default=1)
+    # Incremented on password changes, invalidates previously issued tokens
+    token_version = models.PositiveIntegerField(default=0, editable=False)
+    # Incremented on every save, identifies the user representation (ETag)
+    version = models.PositiveIntegerField(default=0, editable=False)
 
     def __repr__(self):
         return f'User(username={repr(self.username)}, name={repr(self.first_name)}, ' \
@@ -22,4 +26,7 @@ class User(AbstractUser):
     
     def save(self, *args, **kwargs):
         self.full_clean()
+        self.version += 1
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = set(kwargs['update_fields']) | {'version'}
         super().save(*args, **kwargs)
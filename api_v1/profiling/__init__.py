@@ -0,0 +1,4 @@
+from .profile import *
+from .formatters import *
+from .middleware import *
+from .mixins import *
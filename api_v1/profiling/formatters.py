@@ -0,0 +1,23 @@
+import json
+import logging
+
+from datetime import datetime, timezone
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Log records as JSON lines, with the fields of the `data` extra. It is
+    loaded by the logging configuration, before the apps, so it does not
+    use the API JSON backends.
+    """
+    def format(self, record):
+        data = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        data.update(getattr(record, 'data', {}))
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
@@ -0,0 +1,45 @@
+import logging
+
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from api_v1.profiling.profile import RequestProfile, is_sampled
+
+logger = logging.getLogger('api_v1.profiling')
+
+
+class ProfilingMiddleware:
+    """
+    Profile a sample of the requests (`settings.PROFILING`): total time, SQL
+    count and time, slowest statement, and the steps timed by the views
+    (`ProfilingMixin`). The profile is logged to the 'api_v1.profiling'
+    logger and, if enabled, returned in the `Server-Timing` header.
+    Requests that are not sampled only pay for the sampling draw.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not is_sampled():
+            return self.get_response(request)
+
+        profile = request.profile = RequestProfile()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile.execute))
+            response = self.get_response(request)
+        profile.finish()
+
+        if settings.PROFILING.get('SERVER_TIMING'):
+            response['Server-Timing'] = profile.server_timing()
+        resolver_match = request.resolver_match
+        logger.info('request profile', extra={'data': {
+            'method': request.method,
+            'path': request.path,
+            'route': resolver_match.url_name if resolver_match else None,
+            'status': response.status_code,
+            **profile.as_dict(),
+        }})
+        return response
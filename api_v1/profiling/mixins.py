@@ -0,0 +1,69 @@
+import time
+
+from api_v1.profiling.profile import get_profile, profile_timer
+
+
+class TimedFilterBackend:
+    """
+    Filter backend timed in the request profile, by its class name.
+    """
+    def __init__(self, backend, request):
+        self.backend = backend
+        self.request = request
+
+    def __call__(self):
+        # Instantiated by GenericAPIView.filter_queryset
+        return self
+
+    def filter_queryset(self, request, queryset, view):
+        with profile_timer(self.request, self.backend.__name__):
+            return self.backend().filter_queryset(request, queryset, view)
+
+
+class ProfilingMixin:
+    """
+    Time the steps of a Rest Framework view in the request profile
+    (`ProfilingMiddleware`): authentication, permissions, each filter
+    backend, and serialization, which is the rest of the view time (the
+    handler and the response rendering) without the SQL time.
+    """
+    def dispatch(self, request, *args, **kwargs):
+        profile = get_profile(request)
+        if profile is None:
+            return super().dispatch(request, *args, **kwargs)
+
+        start, db_start, timed = time.perf_counter(), profile.db_time, sum(profile.timings.values())
+        response = super().dispatch(request, *args, **kwargs)
+        elapsed = (time.perf_counter() - start) * 1000
+        steps = sum(profile.timings.values()) - timed
+        profile.add('serialization', elapsed - steps - (profile.db_time - db_start))
+        return response
+
+    def perform_authentication(self, request):
+        with profile_timer(request, 'authentication'):
+            super().perform_authentication(request)
+
+    def check_permissions(self, request):
+        with profile_timer(request, 'permissions'):
+            super().check_permissions(request)
+
+    def check_object_permissions(self, request, obj):
+        with profile_timer(request, 'permissions'):
+            super().check_object_permissions(request, obj)
+
+    def filter_queryset(self, queryset):
+        if get_profile(self.request) is None:
+            return super().filter_queryset(queryset)
+        backends = self.filter_backends
+        self.filter_backends = [TimedFilterBackend(backend, self.request) for backend in backends]
+        try:
+            return super().filter_queryset(queryset)
+        finally:
+            self.filter_backends = backends
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if get_profile(request) is not None and hasattr(response, 'render'):
+            # Rendered here to be timed with the view, instead of by the handler
+            response.render()
+        return response
@@ -0,0 +1,91 @@
+import time
+import random
+
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+
+from django.conf import settings
+
+SLOWEST_QUERY_MAX_LENGTH = 1000
+
+
+class RequestProfile:
+    """
+    Timings of a request, in ms. `timings` holds the named steps (e.g.
+    authentication, a filter backend), each excluding the SQL time spent
+    inside it, which is accumulated apart by the database execute wrapper
+    (`execute`) with the query count and the slowest statement.
+    """
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.total = None
+        self.timings = OrderedDict()
+        self.queries = 0
+        self.db_time = 0
+        self.slowest_query = None
+        self.slowest_query_time = 0
+
+    def add(self, name, elapsed):
+        self.timings[name] = self.timings.get(name, 0) + elapsed
+
+    @contextmanager
+    def timer(self, name):
+        start, db_start = time.perf_counter(), self.db_time
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.add(name, elapsed - (self.db_time - db_start))
+
+    def execute(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.queries += 1
+            self.db_time += elapsed
+            if elapsed >= self.slowest_query_time:
+                self.slowest_query, self.slowest_query_time = sql, elapsed
+
+    def finish(self):
+        self.total = (time.perf_counter() - self.start) * 1000
+
+    def server_timing(self):
+        """
+        `Server-Timing` header value.
+        """
+        metrics = [f'total;dur={self.total:.3f}']
+        metrics.extend(f'{name};dur={elapsed:.3f}' for name, elapsed in self.timings.items())
+        metrics.append(f'db;dur={self.db_time:.3f};desc="{self.queries} queries"')
+        return ', '.join(metrics)
+
+    def as_dict(self):
+        return {
+            'total_ms': round(self.total, 3),
+            'timings_ms': {name: round(elapsed, 3) for name, elapsed in self.timings.items()},
+            'db_ms': round(self.db_time, 3),
+            'queries': self.queries,
+            'slowest_query': self.slowest_query[:SLOWEST_QUERY_MAX_LENGTH] if self.slowest_query else None,
+            'slowest_query_ms': round(self.slowest_query_time, 3),
+        }
+
+
+def is_sampled():
+    """
+    If a request should be profiled, by `settings.PROFILING['SAMPLE_RATE']`.
+    """
+    rate = settings.PROFILING.get('SAMPLE_RATE', 0)
+    return rate >= 1 or random.random() < rate
+
+
+def get_profile(request):
+    """
+    Profile of a (Django or Rest Framework) request, None if it is not sampled.
+    """
+    return getattr(request, 'profile', None)
+
+
+def profile_timer(request, name):
+    profile = get_profile(request)
+    return profile.timer(name) if profile is not None else nullcontext()
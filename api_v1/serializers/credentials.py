@@ -1,6 +1,11 @@
 import rest_framework_simplejwt.serializers
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.exceptions import InvalidToken
 from rest_framework_simplejwt.serializers import PasswordField
 
+from api_v1.models import User
+from api_v1.core import TOKEN_VERSION_CLAIM, TOKEN_USER_CLAIM
 from api_v1.serializers import UserSerializer
 
 from django.utils.translation import gettext as _
@@ -15,9 +20,18 @@ class TokenObtainPairSerializer(rest_framework_simplejwt.serializers.TokenObtain
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
-        del token['user_id']  # remove default field in payload
-        token['user'] = UserSerializer(user).data
+        token[TOKEN_VERSION_CLAIM] = user.token_version
+        token[TOKEN_USER_CLAIM] = UserSerializer(user).data
         return token
 
 class TokenRefreshSerializer(rest_framework_simplejwt.serializers.TokenRefreshSerializer):
-    pass
+
+    def validate(self, attrs):
+        refresh = RefreshToken(attrs['refresh'])
+        # Refresh tokens issued before a password change cannot be used
+        valid_user = User.objects.filter(**{api_settings.USER_ID_FIELD: refresh.get(api_settings.USER_ID_CLAIM)},
+                                         token_version=refresh.get(TOKEN_VERSION_CLAIM, 0),
+                                         is_active=True).exists()
+        if not valid_user:
+            raise InvalidToken(_('Token is invalid or expired'))
+        return super().validate(attrs)
@@ -1,11 +1,16 @@
 from rest_framework import serializers
 
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import F
 from django.utils.translation import gettext as _
 from api_v1.utils.validation import validate_location
 
 from api_v1.fields import LocationField
 from api_v1.serializers import UserSerializer
-from api_v1.models import Match, MatchStatus, MatchSubscription
+from api_v1.models import Match, MatchStatus, MatchSubscription, MatchChatMessage
+from api_v1.models.functions import PointX, PointY
 
 
 class MatchSerializer(serializers.ModelSerializer):
@@ -15,9 +20,13 @@ class MatchSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Match
-        fields = ('id', 'title', 'description', 'limit_participants', 'category', 
-                  'location', 'date', 'duration', 'status', 'owner', 'created_date')
+        fields = ('id', 'title', 'description', 'limit_participants', 'participants_count', 
+                  'category', 'location', 'date', 'duration', 'status', 'owner', 'created_date')
     
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related('owner')
+
     def get_status(self, obj):
         return obj.status.value
     
@@ -39,11 +48,64 @@ class MatchSearchResultSerializer(serializers.ModelSerializer):
     class Meta:
         model = Match
         fields = ('match', 'distance')
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return MatchSerializer.setup_eager_loading(queryset)
     
     def get_distance_value(self, obj):
         return obj.distance.km
 
 
+class MatchValuesSerializer(serializers.BaseSerializer):
+    """
+    Read-only MatchSerializer of lists. It builds the same representation
+    from the `.values()` rows of `setup_eager_loading`, without model
+    instances and without binding fields per row. The queryset must have
+    the status annotation (`MatchQuerySet.with_status`).
+    """
+    values_fields = ('id', 'title', 'description', 'limit_participants', 'participants_count',
+                     'category', 'date', 'duration', 'created_date')
+
+    # Unbound fields, only their output formatting is used
+    datetime_field = serializers.DateTimeField()
+    duration_field = serializers.DurationField()
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        # Annotations (status, distances) are kept for the representation and the pagination
+        return queryset.values(*cls.values_fields, *queryset.query.annotations,
+                               owner_username=F('owner__username'),
+                               latitude=PointY('location'), longitude=PointX('location'))
+
+    def to_representation(self, row):
+        return OrderedDict((
+            ('id', row['id']),
+            ('title', row['title']),
+            ('description', row['description']),
+            ('limit_participants', row['limit_participants']),
+            ('participants_count', row['participants_count']),
+            ('category', row['category']),
+            ('location', {'latitude': row['latitude'], 'longitude': row['longitude']}),
+            ('date', self.datetime_field.to_representation(row['date'])),
+            ('duration', self.duration_field.to_representation(row['duration'])),
+            ('status', row['current_status']),
+            ('owner', row['owner_username']),
+            ('created_date', self.datetime_field.to_representation(row['created_date'])),
+        ))
+
+
+class MatchSearchResultValuesSerializer(MatchValuesSerializer):
+    """
+    Read-only MatchSearchResultSerializer of `.values()` rows.
+    """
+    def to_representation(self, row):
+        return OrderedDict((
+            ('match', super().to_representation(row)),
+            ('distance', row['distance'].km),
+        ))
+
+
 class MatchSubscriptionSerializer(serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
     date = serializers.DateTimeField(read_only=True)
@@ -54,7 +116,29 @@ class MatchSubscriptionSerializer(serializers.ModelSerializer):
         model = MatchSubscription
         fields = ('match_id', 'date', 'user')
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related('user')
+
     def validate(self, data):
         validated_data = super().validate(data)
         validated_data['user'] = self.context['request'].user
-        return validated_data
\ No newline at end of file
+        return validated_data
+
+
+class MatchSubscriptionBulkSerializer(serializers.Serializer):
+    usernames = serializers.ListField(child=serializers.CharField(), allow_empty=False,
+                                      max_length=settings.MATCH_SUBSCRIPTIONS_BULK_MAX_SIZE)
+
+
+class MatchChatMessageSerializer(serializers.ModelSerializer):
+    match_id = serializers.IntegerField(read_only=True)
+    user = serializers.SlugRelatedField(slug_field='username', read_only=True)
+
+    class Meta:
+        model = MatchChatMessage
+        fields = ('id', 'match_id', 'user', 'message', 'date')
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.select_related('user')
@@ -45,5 +45,6 @@ class UserSerializer(serializers.ModelSerializer):
         instance = super().update(instance, validated_data)
         if 'password' in validated_data:
             instance.set_password(validated_data['password'])
+            instance.token_version += 1
             instance.save()
         return instance
@@ -80,3 +80,42 @@ class UserEndpointTestCase(TestCase):
         self.assertIn('user', decodedAccessToken)
         expected_keys = {'username', 'name', 'email', 'level', 'registred_date'}
         self.assertJSONContains(decodedAccessToken['user'], expected_keys)
+
+    def test_read_request_without_user_query(self):
+        """GET /users/{username}: Read requests authenticated by token should not query the user"""
+        test_user = User.objects.create_user(username='test', email='test@gmail.com', password='1234')
+        access_token = self._sign_in(test_user.username, '1234')['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token}')
+        with self.assertNumQueries(1):
+            response = self.client.get(f'{URL_PREFFIX}/users/{test_user.username}', follow=True)
+        self.assertEquals(response.status_code, 200)
+        self.assertIn('email', response.json())
+
+    def test_password_change_invalidates_tokens(self):
+        """PATCH /users/{username}: Changing the password should invalidate the issued tokens"""
+        test_user = User.objects.create_user(username='test', email='test@gmail.com', password='1234')
+        tokens = self._sign_in(test_user.username, '1234')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens["access"]}')
+        response = self.client.patch(f'{URL_PREFFIX}/users/{test_user.username}',
+                                     {'old_password': '1234', 'password': '4321'}, format='json', follow=True)
+        self.assertEquals(response.status_code, 200)
+
+        response = self.client.patch(f'{URL_PREFFIX}/users/{test_user.username}',
+                                     {'name': 'Test'}, format='json', follow=True)
+        self.assertEquals(response.status_code, 401)
+
+        self.client.credentials()
+        response = self.client.post(f'{URL_PREFFIX}/sign-in/refresh', {'refresh': tokens['refresh']},
+                                    format='json', follow=True)
+        self.assertEquals(response.status_code, 401)
+
+        tokens = self._sign_in(test_user.username, '4321')
+        response = self.client.post(f'{URL_PREFFIX}/sign-in/refresh', {'refresh': tokens['refresh']},
+                                    format='json', follow=True)
+        self.assertEquals(response.status_code, 200)
+
+    def _sign_in(self, username, password):
+        response = self.client.post(f'{URL_PREFFIX}/sign-in', {'username': username, 'password': password},
+                                    format='json', follow=True)
+        self.assertEquals(response.status_code, 200)
+        return response.json()
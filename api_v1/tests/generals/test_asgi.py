@@ -0,0 +1,58 @@
+from applada.handlers import ThreadPoolASGIHandler
+
+from django.http import HttpResponse
+from django.test import SimpleTestCase, override_settings
+from django.core.handlers.base import BaseHandler
+
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+
+import json
+import time
+import asyncio
+import unittest.mock as mock
+
+URL_PREFFIX = '/v1'
+
+
+class ASGIHandlerTestCase(SimpleTestCase):
+    """ASGI Handler"""
+
+    def test_json_error_response(self):
+        """ASGI requests should keep the JSON error envelope"""
+        status, body = async_to_sync(self._request)(ThreadPoolASGIHandler(), f'{URL_PREFFIX}/some-invalid-url')
+        self.assertEquals(status, 404)
+        self.assertEquals(json.loads(body), {'errors': ['Resource or item not found']})
+
+    @override_settings(ASGI_THREADS=8)
+    def test_concurrent_requests(self):
+        """Slow requests should be handled concurrently, up to ASGI_THREADS"""
+        def slow_response(request):
+            time.sleep(0.3)
+            return HttpResponse('ok')
+
+        async def concurrent_requests(application, total):
+            return await asyncio.gather(*[self._request(application, f'{URL_PREFFIX}/matches')
+                                          for _ in range(total)])
+
+        with mock.patch.object(BaseHandler, 'get_response', side_effect=slow_response):
+            start = time.perf_counter()
+            responses = async_to_sync(concurrent_requests)(ThreadPoolASGIHandler(), 8)
+            elapsed = time.perf_counter() - start
+        self.assertEquals([status for status, _ in responses], [200] * 8)
+        self.assertLess(elapsed, 0.3 * 4)
+
+    @staticmethod
+    async def _request(application, path):
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': path,
+            'query_string': b'',
+            'headers': [(b'host', b'testserver')],
+        }
+        communicator = ApplicationCommunicator(application, scope)
+        await communicator.send_input({'type': 'http.request'})
+        start = await communicator.receive_output(timeout=5)
+        body = await communicator.receive_output(timeout=5)
+        return start['status'], body['body']
@@ -0,0 +1,91 @@
+from applada.backends.postgis_pool.pool import ConnectionPool, PoolTimeout
+
+from django.db import connection
+from django.test import SimpleTestCase
+
+from psycopg2 import OperationalError, extensions
+
+import unittest.mock as mock
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+    def get_transaction_status(self):
+        return self.transaction_status
+
+    def rollback(self):
+        self.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+    def cursor(self):
+        return mock.MagicMock()
+
+    def close(self):
+        self.closed = 1
+
+
+class ConnectionPoolTestCase(SimpleTestCase):
+    """Database Connection Pool"""
+
+    def test_reuse_connection(self):
+        """Returned connections should be reused"""
+        pool = ConnectionPool(FakeConnection, max_size=2)
+        conn = pool.getconn()
+        pool.putconn(conn)
+        self.assertIs(pool.getconn(), conn)
+        self.assertEquals(pool.stats()['created'], 1)
+
+    def test_min_size(self):
+        """The first checkout should open the minimum number of connections"""
+        pool = ConnectionPool(FakeConnection, min_size=3, max_size=5)
+        pool.getconn()
+        stats = pool.stats()
+        self.assertEquals(stats['size'], 3)
+        self.assertEquals(stats['idle'], 2)
+        self.assertEquals(stats['in_use'], 1)
+
+    def test_max_size_timeout(self):
+        """A checkout should time out when all connections are in use"""
+        pool = ConnectionPool(FakeConnection, max_size=1, timeout=0.01)
+        pool.getconn()
+        with self.assertRaises(PoolTimeout):
+            pool.getconn()
+        self.assertEquals(pool.stats()['timeouts'], 1)
+
+    def test_discard_unusable_connection(self):
+        """Closed connections or in unknown state should not return to the pool"""
+        pool = ConnectionPool(FakeConnection, max_size=2)
+        closed, unknown = pool.getconn(), pool.getconn()
+        closed.close()
+        unknown.transaction_status = extensions.TRANSACTION_STATUS_UNKNOWN
+        pool.putconn(closed)
+        pool.putconn(unknown)
+        self.assertTrue(unknown.closed)
+        self.assertEquals(pool.stats()['size'], 0)
+        self.assertEquals(pool.stats()['discarded'], 2)
+
+    def test_rollback_returned_connection(self):
+        """Connections returned inside a transaction should be rolled back"""
+        pool = ConnectionPool(FakeConnection, max_size=1)
+        conn = pool.getconn()
+        conn.transaction_status = extensions.TRANSACTION_STATUS_INTRANS
+        pool.putconn(conn)
+        self.assertEquals(conn.transaction_status, extensions.TRANSACTION_STATUS_IDLE)
+        self.assertIs(pool.getconn(), conn)
+
+    def test_health_check(self):
+        """Idle connections failing the health check should be replaced"""
+        pool = ConnectionPool(FakeConnection, max_size=1, health_check_interval=0)
+        conn = pool.getconn()
+        pool.putconn(conn)
+        conn.cursor = mock.Mock(side_effect=OperationalError)
+        self.assertIsNot(pool.getconn(), conn)
+        self.assertEquals(pool.stats()['health_check_failures'], 1)
+
+    def test_backend_pool_stats(self):
+        """The database backend should expose the pool statistics"""
+        if not hasattr(connection, 'pool_stats'):
+            self.skipTest('Database connection pool is disabled')
+        self.assertIsInstance(connection.pool_stats(), list)
@@ -1,6 +1,18 @@
 from api_v1.utils import TestCase
+from api_v1.models import User
+from api_v1.core import JSON_BACKENDS, FastJSONRenderer, orjson
+
+from django.test import override_settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
 
 from rest_framework.test import APIClient
+from rest_framework.renderers import JSONRenderer
+
+import unittest.mock as mock
+from decimal import Decimal
+from datetime import timedelta
+from collections import OrderedDict
 
 URL_PREFFIX = '/v1'
 DEFAULT_ENCODE = 'utf-8'
@@ -13,4 +25,79 @@ class GeneralTestCase(TestCase):
         """Request a invalid url should return 404 error response"""
         response = self.client.get(f'{URL_PREFFIX}/some-invalid-url', follow=True)
         self.assertEquals(response.status_code, 404)
-        self.assertJSONEqual(response, {'errors': ['Resource or item not found']})
\ No newline at end of file
+        self.assertJSONEqual(response, {'errors': ['Resource or item not found']})
+
+    def test_lean_api_middleware(self):
+        """API requests should skip session, CSRF and clickjacking middlewares, admin requests should not"""
+        response = self.client.get(f'{URL_PREFFIX}/some-invalid-url', follow=True)
+        self.assertNotIn('X-Frame-Options', response)
+        self.assertNotIn('Cookie', response.get('Vary', ''))
+        response = self.client.get('/admin/login/', follow=True)
+        self.assertEquals(response.status_code, 200)
+        self.assertIn('X-Frame-Options', response)
+        self.assertIn('csrftoken', response.cookies)
+
+    def test_json_renderer(self):
+        """JSON backends should render the same JSON of DRF's JSONRenderer"""
+        data = OrderedDict((
+            ('id', 1), ('title', 'Pelada de sábado'), ('description', None), ('distance', 1.25),
+            ('date', timezone.now()), ('price', Decimal('10.50')), ('errors', [gettext_lazy('Match not found')]),
+        ))
+        expected = JSONRenderer().render(data)
+        backends = [name for name in JSON_BACKENDS if name != 'orjson' or orjson is not None]
+        for name in backends:
+            with mock.patch('api_v1.core.json_backends._backend', JSON_BACKENDS[name]()):
+                self.assertEquals(FastJSONRenderer().render(data), expected)
+                self.assertEquals(FastJSONRenderer().render({'duration': timedelta(hours=1, minutes=30)}),
+                                  b'{"duration":"01:30:00"}')
+
+    def test_invalid_json_body(self):
+        """Requests with an invalid JSON body should return 400 error response"""
+        response = self.client.post(f'{URL_PREFFIX}/sign-in', '{"username": ', content_type='application/json')
+        self.assertEquals(response.status_code, 400)
+        self.assertIn('errors', response.json())
+        self.assertEquals(response['Content-Type'], 'application/json')
+
+    def test_request_profiling(self):
+        """Sampled requests should have a Server-Timing header with the view steps and the SQL time"""
+        user = User.objects.create_user(username='test', email='test@gmail.com', password='1234')
+        client = APIClient()
+        client.force_authenticate(user=user)
+        with override_settings(PROFILING={'SAMPLE_RATE': 1, 'SERVER_TIMING': True}), \
+                self.assertLogs('api_v1.profiling', level='INFO') as logs:
+            response = client.get(f'{URL_PREFFIX}/matches?latitude=-8.0651966&longitude=-34.944717')
+        self.assertEquals(response.status_code, 200)
+        metrics = [metric.split(';')[0] for metric in response['Server-Timing'].split(', ')]
+        for metric in ('total', 'authentication', 'permissions', 'LocationRangeFilter',
+                       'MatchStatusFilter', 'serialization', 'db'):
+            self.assertIn(metric, metrics)
+        self.assertEquals(logs.records[0].data['route'], 'match_create_search')
+        self.assertGreater(logs.records[0].data['queries'], 0)
+
+        with override_settings(PROFILING={'SAMPLE_RATE': 0, 'SERVER_TIMING': True}):
+            response = client.get(f'{URL_PREFFIX}/matches?latitude=-8.0651966&longitude=-34.944717')
+        self.assertNotIn('Server-Timing', response)
+
+    def test_metrics(self):
+        """GET /metrics: Requests should be counted by route, and the token should be required"""
+        self.client.get(f'{URL_PREFFIX}/matches')
+        with override_settings(METRICS={'TOKEN': 'secret', 'PROCESS_STATS_INTERVAL': 5}):
+            self.assertEquals(self.client.get('/metrics').status_code, 401)
+            response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEquals(response.status_code, 200)
+        content = response.content.decode(DEFAULT_ENCODE)
+        self.assertIn('applada_http_requests_total{method="GET",route="match_create_search",status="401"}',
+                      content)
+        self.assertIn('applada_http_request_duration_seconds_bucket', content)
+
+        # Without token, only in DEBUG mode
+        with override_settings(METRICS={'TOKEN': None, 'PROCESS_STATS_INTERVAL': 5}):
+            self.assertEquals(self.client.get('/metrics').status_code, 403)
+            with override_settings(DEBUG=True):
+                self.assertEquals(self.client.get('/metrics').status_code, 200)
+
+    def test_endpoint_benchmark_scenarios(self):
+        """Every API route should have a benchmark scenario"""
+        from api_v1.management.commands.benchmark_endpoints import SCENARIOS, route_names
+        self.assertFalse(None in route_names())
+        self.assertEquals(route_names() - {scenario.route for scenario in SCENARIOS}, set())
@@ -0,0 +1,78 @@
+from api_v1.chat import InProcessBroker
+from api_v1.geocache import encode, bounds, covering, LRUTileBackend, MatchTileCache, TILES_CHANNEL
+
+from django.test import SimpleTestCase
+
+import unittest.mock as mock
+
+
+class GeohashTestCase(SimpleTestCase):
+    """Geohash tiles"""
+
+    def test_encode(self):
+        """Points should be encoded as standard geohashes"""
+        self.assertEquals(encode(-0.1257, 51.5085, 7), 'gcpvj0u')
+        self.assertEquals(encode(-5.603, 42.605, 5), 'ezs42')
+
+    def test_bounds(self):
+        """The bounds of a geohash should contain the encoded point"""
+        min_longitude, min_latitude, max_longitude, max_latitude = bounds('ezs42')
+        self.assertTrue(min_longitude <= -5.603 <= max_longitude)
+        self.assertTrue(min_latitude <= 42.605 <= max_latitude)
+
+    def test_covering(self):
+        """Covering tiles should overlap the whole bounding box"""
+        tiles = covering(-35.0, -8.1, -34.8, -7.9, 4)
+        for longitude, latitude in ((-35.0, -8.1), (-34.8, -7.9), (-34.9, -8.0)):
+            self.assertIn(encode(longitude, latitude, 4), tiles)
+
+    def test_search_tiles(self):
+        """Searches should be snapped to a bounded number of tiles"""
+        tile_cache = MatchTileCache(LRUTileBackend(), max_tiles=9)
+        for radius in (1, 5, 15):
+            tiles = tile_cache.tiles(-34.944717, -8.0651966, radius)
+            self.assertLessEqual(len(tiles), 9)
+            self.assertIn(encode(-34.944717, -8.0651966, len(tiles[0])), tiles)
+
+
+class LRUTileBackendTestCase(SimpleTestCase):
+    """In-process tile cache backend"""
+
+    def test_least_recently_used_eviction(self):
+        """The least recently used tile should be evicted when the cache is full"""
+        backend = LRUTileBackend(max_size=2)
+        backend.set_many({'a': [], 'b': []})
+        backend.get_many(['a'])
+        backend.set_many({'c': []})
+        self.assertEquals(set(backend.get_many(['a', 'b', 'c'])), {'a', 'c'})
+
+    def test_expiration(self):
+        """Tiles should expire after the timeout"""
+        backend = LRUTileBackend(timeout=30)
+        with mock.patch('api_v1.geocache.backends.time.monotonic', return_value=0):
+            backend.set_many({'a': []})
+        with mock.patch('api_v1.geocache.backends.time.monotonic', return_value=31):
+            self.assertEquals(backend.get_many(['a']), {})
+
+
+class MatchTileCacheTestCase(SimpleTestCase):
+    """Candidate matches of the tiles"""
+
+    def test_candidates_distance(self):
+        """Candidates should be the matches of the tiles within the radius, with their distance"""
+        tile_cache = MatchTileCache(LRUTileBackend())
+        tile = [(1, -34.944717, -8.0651966), (2, -34.944717, -8.1), (3, -34.944717, -9.0651966)]
+        with mock.patch.object(MatchTileCache, 'load_tile', return_value=tile):
+            candidates = tile_cache.candidates(-34.944717, -8.0651966, 15)
+        self.assertEquals(set(candidates), {1, 2})
+        self.assertAlmostEquals(candidates[1], 0)
+        self.assertAlmostEquals(candidates[2], 3.87, places=1)
+
+    def test_invalidation_published(self):
+        """Tiles invalidated by other processes should be dropped through the broker"""
+        tile_cache = MatchTileCache(LRUTileBackend())
+        broker = InProcessBroker()
+        broker.subscribe(TILES_CHANNEL, tile_cache.delete_tiles)
+        tile_cache.backend.set_many({'7nxh': [], '7nx': []})
+        broker.publish(TILES_CHANNEL, ['7nxh'])
+        self.assertEquals(set(tile_cache.backend.get_many(['7nxh', '7nx'])), {'7nx'})
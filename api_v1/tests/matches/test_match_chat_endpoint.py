@@ -0,0 +1,80 @@
+from api_v1.utils import TestCase
+from api_v1.models import User, Match, MatchChatMessage, MatchCategory
+
+from django.utils import timezone
+from django.contrib.gis.geos import Point
+
+from rest_framework.test import APIClient
+
+from datetime import timedelta
+
+URL_PREFFIX = '/v1'
+
+
+class MatchChatEndpointTestCase(TestCase):
+    """Match Chat History Endpoint"""
+    expected_structure = {'id': None, 'match_id': None, 'user': None, 'message': None, 'date': None}
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_not_authenticated_get_messages(self):
+        """GET /matches/{id}/messages: Non-Authenticated request should return 401 response code"""
+        response = self.client.get(f'{URL_PREFFIX}/matches/1/messages', follow=True)
+        self.assertEquals(response.status_code, 401)
+
+    def test_get_messages_match_not_created(self):
+        """GET /matches/{id}/messages: Get messages of a match that does not exist should return 404"""
+        self.client.force_authenticate(user=self._create_test_user())
+        response = self.client.get(f'{URL_PREFFIX}/matches/1/messages', follow=True)
+        self.assertEquals(response.status_code, 404)
+        self.assertJSONEqual(response, {'errors': ['Match not found']})
+
+    def test_not_subscribed_get_messages(self):
+        """GET /matches/{id}/messages: Only subscribed users can read the match chat"""
+        test_user = self._create_test_user()
+        other_user = User.objects.create_user(username='other', email='other@gmail.com', password='1234')
+        test_match = self._create_test_match(owner=other_user)
+        self.client.force_authenticate(user=test_user)
+        response = self.client.get(f'{URL_PREFFIX}/matches/{test_match.id}/messages', follow=True)
+        self.assertEquals(response.status_code, 403)
+        self.assertJSONEqual(response, {'errors': ['You are not subscribed for this match']})
+
+    def test_get_messages_history(self):
+        """GET /matches/{id}/messages: Should return the match messages, newest first, paginated by cursor"""
+        test_user = self._create_test_user()
+        test_match = self._create_test_match(owner=test_user)
+        other_match = self._create_test_match(owner=test_user)
+        for i in range(5):
+            MatchChatMessage.objects.create(match=test_match, user=test_user, message=f'message {i}')
+        MatchChatMessage.objects.create(match=other_match, user=test_user, message='other match')
+        self.client.force_authenticate(user=test_user)
+
+        with self.assertMaxNumQueries(3):
+            response = self.client.get(f'{URL_PREFFIX}/matches/{test_match.id}/messages?cursor=&limit=3',
+                                       follow=True)
+        self.assertEquals(response.status_code, 200)
+        data = response.json()
+        self.assertJSONContains(data['results'][0], self.expected_structure)
+        self.assertEquals(data['results'][0]['user'], test_user.username)
+        self.assertEquals([m['message'] for m in data['results']], ['message 4', 'message 3', 'message 2'])
+
+        response = self.client.get(data['next'], follow=True)
+        data = response.json()
+        self.assertEquals([m['message'] for m in data['results']], ['message 1', 'message 0'])
+        self.assertIsNone(data['next'])
+
+    def _create_test_user(self):
+        return User.objects.create_user(username='whatever', email='whatever@gmail.com', password='1234')
+
+    def _create_test_match(self, **kwargs):
+        match_properties = {
+            'title': kwargs.get('title', 'Match title'),
+            'description': kwargs.get('description', 'a description'),
+            'location': Point(kwargs.get('longitude', -34.944717), kwargs.get('latitude', -8.0651966)),
+            'date': kwargs.get('date', timezone.now() + timedelta(days=5)),
+            'duration': kwargs.get('duration', timedelta(hours=1)),
+            'owner': kwargs.get('owner'),
+            'category': kwargs.get('category', str(MatchCategory.SOCCER))
+        }
+        return Match.objects.create(**match_properties)
@@ -0,0 +1,148 @@
+from api_v1.chat import MatchChatConsumer, PostgresBroker, get_writer, match_channel, \
+    CLOSE_UNAUTHENTICATED, CLOSE_NOT_SUBSCRIBED
+from api_v1.models import User, Match, MatchSubscription, MatchChatMessage, MatchCategory
+from api_v1.serializers import TokenObtainPairSerializer
+from api_v1.utils.sync import database_sync_to_async
+
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+from django.contrib.gis.geos import Point
+
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+
+import json
+import asyncio
+from datetime import timedelta
+
+
+@override_settings(CHAT_FLUSH_INTERVAL=0.05)
+class MatchChatWebSocketTestCase(TransactionTestCase):
+    """Match Chat WebSocket"""
+
+    def test_not_authenticated_connect(self):
+        """WS /matches/{id}/chat: Connections without a valid token should be closed"""
+        owner = self._create_test_user('owner')
+        test_match = self._create_test_match(owner=owner)
+        message = async_to_sync(self._connect)(test_match.id, token='invalid')
+        self.assertEquals(message, {'type': 'websocket.close', 'code': CLOSE_UNAUTHENTICATED})
+
+    def test_not_subscribed_connect(self):
+        """WS /matches/{id}/chat: Users not subscribed for the match cannot connect"""
+        owner = self._create_test_user('owner')
+        test_user = self._create_test_user('whatever')
+        test_match = self._create_test_match(owner=owner)
+        message = async_to_sync(self._connect)(test_match.id, token=self._access_token(test_user))
+        self.assertEquals(message, {'type': 'websocket.close', 'code': CLOSE_NOT_SUBSCRIBED})
+
+    def test_send_message(self):
+        """WS /matches/{id}/chat: Messages should be saved and sent to every connected participant"""
+        owner = self._create_test_user('owner')
+        test_user = self._create_test_user('whatever')
+        test_match = self._create_test_match(owner=owner)
+        MatchSubscription.objects.create(match=test_match, user=test_user)
+
+        async def chat():
+            owner_ws = await self._communicator(test_match.id, self._access_token(owner))
+            user_ws = await self._communicator(test_match.id, self._access_token(test_user))
+            await user_ws.send_input({'type': 'websocket.receive', 'text': json.dumps({'message': 'hi!'})})
+            received = [json.loads((await ws.receive_output(timeout=5))['text']) for ws in (owner_ws, user_ws)]
+            for ws in (owner_ws, user_ws):
+                await ws.send_input({'type': 'websocket.disconnect', 'code': 1000})
+                await ws.wait(timeout=1)
+            await get_writer().close()
+            return received
+
+        received = async_to_sync(chat)()
+        saved = MatchChatMessage.objects.get(match=test_match)
+        for message in received:
+            self.assertEquals(message['id'], saved.id)
+            self.assertEquals(message['user'], test_user.username)
+            self.assertEquals(message['message'], 'hi!')
+
+    def test_send_empty_message(self):
+        """WS /matches/{id}/chat: Empty messages should be answered with an error"""
+        owner = self._create_test_user('owner')
+        test_match = self._create_test_match(owner=owner)
+
+        async def chat():
+            ws = await self._communicator(test_match.id, self._access_token(owner))
+            await ws.send_input({'type': 'websocket.receive', 'text': json.dumps({'message': ' '})})
+            response = json.loads((await ws.receive_output(timeout=5))['text'])
+            await ws.send_input({'type': 'websocket.disconnect', 'code': 1000})
+            await ws.wait(timeout=1)
+            return response
+
+        self.assertEquals(async_to_sync(chat)(), {'errors': ['Message is required']})
+
+    def test_unsubscribed_disconnect(self):
+        """WS /matches/{id}/chat: Users unsubscribed from the match should be disconnected"""
+        owner = self._create_test_user('owner')
+        test_user = self._create_test_user('whatever')
+        test_match = self._create_test_match(owner=owner)
+        subscription = MatchSubscription.objects.create(match=test_match, user=test_user)
+
+        async def chat():
+            owner_ws = await self._communicator(test_match.id, self._access_token(owner))
+            user_ws = await self._communicator(test_match.id, self._access_token(test_user))
+            await database_sync_to_async(subscription.delete)()
+            message = await user_ws.receive_output(timeout=5)
+            await user_ws.wait(timeout=1)
+            # Other participants stay connected
+            self.assertTrue(await owner_ws.receive_nothing(timeout=0.5))
+            await owner_ws.send_input({'type': 'websocket.disconnect', 'code': 1000})
+            await owner_ws.wait(timeout=1)
+            return message
+
+        self.assertEquals(async_to_sync(chat)(), {'type': 'websocket.close', 'code': CLOSE_NOT_SUBSCRIBED})
+
+    def test_broker_between_processes(self):
+        """WS /matches/{id}/chat: Messages published by a process should reach the subscribers of the others"""
+        # Each broker has its own connections, as the broker of another worker process
+        publisher, listener = PostgresBroker(), PostgresBroker()
+
+        async def receive():
+            subscription = await listener.asubscribe(match_channel(1))
+            publisher.publish(match_channel(2), {'message': 'other match'})
+            publisher.publish(match_channel(1), {'message': 'hi!'})
+            try:
+                return await asyncio.wait_for(subscription.get(), timeout=5)
+            finally:
+                subscription.close()
+
+        self.assertEquals(async_to_sync(receive)(), {'message': 'hi!'})
+        publisher.close_publish_connection()
+
+    async def _connect(self, match_id, token):
+        communicator = ApplicationCommunicator(MatchChatConsumer(), self._scope(match_id, token))
+        await communicator.send_input({'type': 'websocket.connect'})
+        return await communicator.receive_output(timeout=5)
+
+    async def _communicator(self, match_id, token):
+        communicator = ApplicationCommunicator(MatchChatConsumer(), self._scope(match_id, token))
+        await communicator.send_input({'type': 'websocket.connect'})
+        self.assertEquals(await communicator.receive_output(timeout=5), {'type': 'websocket.accept'})
+        return communicator
+
+    @staticmethod
+    def _scope(match_id, token):
+        return {
+            'type': 'websocket',
+            'path': f'/v1/matches/{match_id}/chat',
+            'query_string': f'token={token}'.encode('latin1'),
+            'headers': [],
+        }
+
+    @staticmethod
+    def _access_token(user):
+        return str(TokenObtainPairSerializer.get_token(user).access_token)
+
+    @staticmethod
+    def _create_test_user(username):
+        return User.objects.create_user(username=username, email=f'{username}@gmail.com', password='1234')
+
+    def _create_test_match(self, **kwargs):
+        return Match.objects.create(title='Match title', description='a description',
+                                    location=Point(-34.944717, -8.0651966),
+                                    date=timezone.now() + timedelta(days=5), duration=timedelta(hours=1),
+                                    owner=kwargs.get('owner'), category=str(MatchCategory.SOCCER))
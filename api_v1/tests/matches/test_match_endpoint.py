@@ -3,6 +3,7 @@ from api_v1.models import User, Match, MatchSubscription, MatchCategory
 
 from django.conf import settings
 from django.utils import timezone
+from django.utils.http import http_date
 from django.contrib.gis.geos import Point
 
 from rest_framework.test import APIClient
@@ -20,7 +21,8 @@ class MatchEndpointTestCase(TestCase):
     expected_structure = {'id': None, 'title': None, 'description': None, 
                           'owner': None, 'duration': None, 'category': None,
                           'location': {'latitude', 'longitude'}, 'date': None,
-                          'status': None, 'created_date': None, 'limit_participants': None}
+                          'status': None, 'created_date': None, 'limit_participants': None,
+                          'participants_count': None}
 
     def setUp(self):
         self.client = APIClient()
@@ -148,6 +150,25 @@ class MatchEndpointTestCase(TestCase):
         self.assertEquals(response.status_code, 400)
         self.assertJSONEqual(response, {'errors': ['Match date cannot be in the past']})
     
+    def test_cant_create_match_without_vacancies(self):
+        """POST /matches: Limit participants must be at least 1, the owner is subscribed"""
+        test_user = self._create_test_user()
+        self.client.force_authenticate(user=test_user)
+        match_properties = {
+            'title': 'Match title',
+            'description': 'a description',
+            'location': {'latitude': -8.0651966, 'longitude': -34.944717},
+            'date': timezone.now() + timedelta(days=1),
+            'duration': '01:00:00',
+            'category': str(MatchCategory.SOCCER),
+            'limit_participants': 0
+        }
+        response = self.client.post(f'{URL_PREFFIX}/matches', 
+                                    match_properties, format='json', follow=True)
+        self.assertEquals(response.status_code, 400)
+        self.assertJSONEqual(response, {'errors': ['Limit participants must be at least 1']})
+        self.assertFalse(Match.objects.exists())
+
     def test_cant_create_match_longer_than_one_hour(self):
         """POST /matches: Match date must be at least one hour longer than current time"""
         test_user = self._create_test_user()
@@ -224,6 +245,127 @@ class MatchEndpointTestCase(TestCase):
         self.assertEquals(response.status_code, 400)
         self.assertJSONEqual(response, {'errors': ['Limit participants must be grater than current total participants']})
 
+    def test_match_participants_count(self):
+        """GET /matches/{id}: Participants count should follow match subscriptions"""
+        test_user = self._create_test_user()
+        test_match = self._create_test_match(owner=test_user)
+        self.assertEquals(test_match.participants_count, 1)
+
+        other_user = User.objects.create_user(username='other', email='other@gmail.com', password='1234')
+        subscription = MatchSubscription.objects.create(match=test_match, user=other_user)
+
+        self.client.force_authenticate(user=test_user)
+        response = self.client.get(f'{URL_PREFFIX}/matches/{test_match.id}', follow=True)
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(response.json()['participants_count'], 2)
+
+        subscription.delete()
+        response = self.client.get(f'{URL_PREFFIX}/matches/{test_match.id}', follow=True)
+        self.assertEquals(response.json()['participants_count'], 1)
+
+    def test_match_conditional_get(self):
+        """GET /matches/{id}: Should return 304 while the match is not modified"""
+        test_user = self._create_test_user()
+        test_match = self._create_test_match(owner=test_user)
+        self.client.force_authenticate(user=test_user)
+        url = f'{URL_PREFFIX}/matches/{test_match.id}'
+
+        response = self.client.get(url, follow=True)
+        self.assertEquals(response.status_code, 200)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, follow=True)
+        self.assertEquals(response.status_code, 304)
+        self.assertEquals(response.content, b'')
+
+        other_user = User.objects.create_user(username='other', email='other@gmail.com', password='1234')
+        MatchSubscription.objects.create(match=test_match, user=other_user)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, follow=True)
+        self.assertEquals(response.status_code, 200)
+        self.assertNotEquals(response['ETag'], etag)
+
+    def test_match_conditional_get_owner_renamed(self):
+        """GET /matches/{id}: The ETag should change when the owner username changes"""
+        test_user = self._create_test_user()
+        test_match = self._create_test_match(owner=test_user)
+        self.client.force_authenticate(user=test_user)
+        url = f'{URL_PREFFIX}/matches/{test_match.id}'
+        etag = self.client.get(url, follow=True)['ETag']
+        list_etag = self.client.get(f'{URL_PREFFIX}/users/{test_user.username}/matches', follow=True)['ETag']
+
+        test_user.username = 'renamed'
+        test_user.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, follow=True)
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(response.json()['owner'], 'renamed')
+        response = self.client.get(f'{URL_PREFFIX}/users/renamed/matches', HTTP_IF_NONE_MATCH=list_etag, follow=True)
+        self.assertEquals(response.status_code, 200)
+
+    def test_match_conditional_update(self):
+        """PATCH /matches/{id}: Updates with an outdated If-Match should return 412"""
+        test_user = self._create_test_user()
+        test_match = self._create_test_match(owner=test_user)
+        self.client.force_authenticate(user=test_user)
+        url = f'{URL_PREFFIX}/matches/{test_match.id}'
+        etag = self.client.get(url, follow=True)['ETag']
+
+        response = self.client.patch(url, {'title': 'New title'}, format='json', HTTP_IF_MATCH=etag, follow=True)
+        self.assertEquals(response.status_code, 200)
+        self.assertNotEquals(response['ETag'], etag)
+        self.assertEquals(response['ETag'], self.client.get(url, follow=True)['ETag'])
+
+        response = self.client.patch(url, {'title': 'Other title'}, format='json', HTTP_IF_MATCH=etag, follow=True)
+        self.assertEquals(response.status_code, 412)
+        self.assertJSONEqual(response, {'errors': ['The resource has been modified']})
+        self.assertEquals(Match.objects.get(id=test_match.id).title, 'New title')
+
+    def test_user_matches_conditional_get(self):
+        """GET /users/{username}/matches: Should return 304 while the matches are not modified"""
+        test_user = self._create_test_user()
+        self.client.force_authenticate(user=test_user)
+        test_match = self._create_test_match(owner=test_user)
+        url = f'{URL_PREFFIX}/users/{test_user.username}/matches'
+        etag = self.client.get(url, follow=True)['ETag']
+
+        # User, count and page
+        with self.assertNumQueries(3):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, follow=True)
+        self.assertEquals(response.status_code, 304)
+
+        # Matches leaving the list do not change any last modified date, only the ETag is checked
+        response = self.client.get(url, follow=True)
+        self.assertNotIn('Last-Modified', response)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(), follow=True)
+        self.assertEquals(response.status_code, 200)
+
+        test_match.title = 'New title'
+        test_match.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, follow=True)
+        self.assertEquals(response.status_code, 200)
+
+    def test_user_matches_vacancy_filter(self):
+        """GET /users/{username}/matches: Should filter matches by vacancy"""
+        test_user = self._create_test_user()
+        self.client.force_authenticate(user=test_user)
+        self._create_test_match(owner=test_user, title='Open match')
+        full_match = self._create_test_match(owner=test_user, title='Full match')
+        full_match.limit_participants = 1
+        full_match.save()
+
+        url = f'{URL_PREFFIX}/users/{test_user.username}/matches'
+        response = self.client.get(f'{url}?has_vacancy=true', follow=True)
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals([m['title'] for m in response.json()['results']], ['Open match'])
+
+        response = self.client.get(f'{url}?has_vacancy=false', follow=True)
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals([m['title'] for m in response.json()['results']], ['Full match'])
+
+        response = self.client.get(f'{url}?has_vacancy=maybe', follow=True)
+        self.assertEquals(response.status_code, 400)
+        self.assertJSONEqual(response, {'errors': ['Choose a valid has_vacancy value']})
+
     def test_user_matches_pagination(self):
         """GET /users/{username}/matches: Should return pagination fields (count, next, previous and results)"""
         test_user = self._create_test_user()
@@ -245,6 +387,47 @@ class MatchEndpointTestCase(TestCase):
         self.assertEquals(len(response.json()['results']), 1)
         self.assertIn('title', response.json()['results'][0])
 
+    def test_user_matches_query_count(self):
+        """GET /users/{username}/matches: A page of matches should cost a constant number of queries"""
+        test_user = self._create_test_user()
+        self.client.force_authenticate(user=test_user)
+        for i in range(20):
+            owner = User.objects.create_user(username=f'user{i}', email=f'user{i}@gmail.com', password='1234')
+            test_match = self._create_test_match(owner=owner)
+            MatchSubscription.objects.create(match=test_match, user=test_user)
+
+        with self.assertMaxNumQueries(3):
+            response = self.client.get(f'{URL_PREFFIX}/users/{test_user.username}/matches', follow=True)
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(len(response.json()['results']), 20)
+
+    def test_user_matches_status_filter(self):
+        """GET /users/{username}/matches: Should filter matches by status value"""
+        test_user = self._create_test_user()
+        self.client.force_authenticate(user=test_user)
+        on_hold_match = self._create_test_match(owner=test_user, title='On hold match')
+
+        testtime = timezone.now() - timedelta(days=1)
+        with mock.patch('django.utils.timezone.now') as mock_now:
+            mock_now.return_value = testtime
+            on_going_match = self._create_test_match(owner=test_user, title='On going match',
+                                                     date=(timezone.now() + timedelta(days=1)))
+            finished_match = self._create_test_match(owner=test_user, title='Finished match',
+                                                     date=(timezone.now() + timedelta(hours=2)))
+
+        url = f'{URL_PREFFIX}/users/{test_user.username}/matches'
+        for match_status, test_match in (('on_hold', on_hold_match), ('on_going', on_going_match),
+                                         ('finished', finished_match)):
+            response = self.client.get(f'{url}?status={match_status}', follow=True)
+            self.assertEquals(response.status_code, 200)
+            self.assertEquals(len(response.json()['results']), 1)
+            self.assertEquals(response.json()['results'][0]['title'], test_match.title)
+            self.assertEquals(response.json()['results'][0]['status'], match_status)
+
+        response = self.client.get(f'{url}?status=invalid', follow=True)
+        self.assertEquals(response.status_code, 400)
+        self.assertJSONEqual(response, {'errors': ['Choose a valid status value']})
+
     def test_not_found_user_matches(self):
         """GET /users/{username}/matches: Should return a 404 error if user does not exist"""
         test_user = self._create_test_user()
@@ -253,6 +436,35 @@ class MatchEndpointTestCase(TestCase):
         self.assertEquals(response.status_code, 404)
         self.assertJSONEqual(response, {'errors': ['User not found']})
     
+    def test_match_batch(self):
+        """GET /matches/batch: Should return the matches in the requested order, with not found markers, in one query"""
+        test_user = self._create_test_user()
+        self.client.force_authenticate(user=test_user)
+        first_match = self._create_test_match(owner=test_user, title='First match')
+        second_match = self._create_test_match(owner=test_user, title='Second match')
+        missing_id = second_match.id + 1
+        with self.assertMaxNumQueries(1):
+            response = self.client.get(f'{URL_PREFFIX}/matches/batch?ids={second_match.id},{missing_id},'
+                                       f'{first_match.id},{second_match.id}')
+        self.assertEquals(response.status_code, 200)
+        results = response.json()
+        self.assertEquals(len(results), 3)
+        self.assertJSONContains(results[0], self.expected_structure)
+        self.assertEquals(results[0]['title'], second_match.title)
+        self.assertEquals(results[0]['owner'], test_user.username)
+        self.assertEquals(results[1], {'id': missing_id, 'errors': ['Match not found']})
+        self.assertEquals(results[2]['id'], first_match.id)
+
+    def test_invalid_match_batch(self):
+        """GET /matches/batch: Ids are required, must be integers and at most MATCH_BATCH_MAX_SIZE"""
+        test_user = self._create_test_user()
+        self.client.force_authenticate(user=test_user)
+        for query in ('', '?ids=', '?ids=1,a',
+                      '?ids=' + ','.join(str(i) for i in range(settings.MATCH_BATCH_MAX_SIZE + 1))):
+            response = self.client.get(f'{URL_PREFFIX}/matches/batch{query}')
+            self.assertEquals(response.status_code, 400)
+            self.assertIn('errors', response.json())
+
     def _create_test_user(self):
         return User.objects.create_user(username='whatever', email='whatever@gmail.com', password='1234')
     
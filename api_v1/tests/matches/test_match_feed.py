@@ -0,0 +1,184 @@
+from api_v1.feed import GridIndex, Area, MatchFeed, MatchFeedConsumer, get_feed, CREATED, UPDATED, DELETED
+from api_v1.models import User, Match, MatchCategory, MatchSubscription
+from api_v1.serializers import TokenObtainPairSerializer
+from api_v1.utils.sync import database_sync_to_async
+from api_v1.chat import PostgresBroker
+
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from django.contrib.gis.geos import Point
+
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+
+import json
+import asyncio
+import unittest.mock as mock
+from datetime import timedelta
+
+
+class GridIndexTestCase(SimpleTestCase):
+    """Match feed spatial index"""
+
+    def test_search(self):
+        """Only the areas containing the point should be found"""
+        index = GridIndex(cell_size=0.1)
+        recife = Area(-34.8770, -8.0476, 15)
+        sao_paulo = Area(-46.6333, -23.5505, 15)
+        index.add(recife)
+        index.add(sao_paulo)
+        self.assertEquals(index.search(-34.9, -8.1), [recife])
+        self.assertEquals(index.search(-46.6, -23.5), [sao_paulo])
+        self.assertEquals(index.search(-35.5, -8.0476), [])
+
+    def test_remove(self):
+        """Removed areas should not be found"""
+        index = GridIndex(cell_size=0.1)
+        area = Area(-34.8770, -8.0476, 15)
+        index.add(area)
+        index.remove(area)
+        self.assertEquals(index.search(-34.8770, -8.0476), [])
+        self.assertEquals(len(index), 0)
+
+    def test_dispatch(self):
+        """Listeners should get the events near them, and a deleted event when the match moves away"""
+        async def dispatch():
+            feed = MatchFeed(cell_size=0.1)
+            near = feed.listen(-34.8770, -8.0476, 15)
+            far = feed.listen(-46.6333, -23.5505, 15)
+            feed.task.cancel()
+            feed.dispatch({'event': CREATED, 'id': 1, 'location': [-34.9, -8.1],
+                           'previous_location': None, 'match': {'id': 1}})
+            feed.dispatch({'event': UPDATED, 'id': 1, 'location': [-46.6, -23.5],
+                           'previous_location': [-34.9, -8.1], 'match': {'id': 1}})
+            await asyncio.sleep(0)
+            return [await near.get(), await near.get(), await far.get()]
+
+        self.assertEquals(async_to_sync(dispatch)(), [
+            (CREATED, {'id': 1, 'match': {'id': 1}}),
+            (DELETED, {'id': 1}),
+            (UPDATED, {'id': 1, 'match': {'id': 1}}),
+        ])
+
+
+@override_settings(FEED_HEARTBEAT_INTERVAL=1)
+class MatchFeedTestCase(TransactionTestCase):
+    """Match Feed Server-Sent Events"""
+
+    def test_not_authenticated(self):
+        """GET /matches/feed: Requests without a token should be denied"""
+        start, body = async_to_sync(self._request)('latitude=-8.0476&longitude=-34.8770')
+        self.assertEquals(start['status'], 401)
+        self.assertIn('errors', json.loads(body['body']))
+
+    def test_invalid_location(self):
+        """GET /matches/feed: Latitude and longitude are required"""
+        owner = self._create_test_user('owner')
+        start, body = async_to_sync(self._request)(f'latitude=-8.0476&token={self._access_token(owner)}')
+        self.assertEquals(start['status'], 400)
+
+    def test_created_match_event(self):
+        """GET /matches/feed: Matches created near the location should be sent"""
+        owner = self._create_test_user('owner')
+
+        async def feed():
+            communicator = self._communicator(f'latitude=-8.0476&longitude=-34.8770&token={self._access_token(owner)}')
+            await communicator.send_input({'type': 'http.request'})
+            start = await communicator.receive_output(timeout=5)
+            await asyncio.sleep(0.1)
+            match = await database_sync_to_async(self._create_test_match)(owner=owner)
+            body = await communicator.receive_output(timeout=5)
+            await communicator.send_input({'type': 'http.disconnect'})
+            await communicator.wait(timeout=2)
+            get_feed().task.cancel()
+            return start, body['body'].decode('utf-8'), match
+
+        start, body, match = async_to_sync(feed)()
+        self.assertEquals(start['status'], 200)
+        self.assertEquals(dict(start['headers'])[b'Content-Type'], b'text/event-stream')
+        event, data = body.strip().split('\n')
+        self.assertEquals(event, f'event: {CREATED}')
+        data = json.loads(data[len('data: '):])
+        self.assertEquals(data['id'], match.id)
+        self.assertEquals(data['match']['title'], match.title)
+
+    def test_subscription_updated_event(self):
+        """GET /matches/feed: The participants count of matches near the location should be sent"""
+        owner = self._create_test_user('owner')
+        user = self._create_test_user('user')
+        match = self._create_test_match(owner=owner)
+
+        async def feed():
+            communicator = self._communicator(f'latitude=-8.0476&longitude=-34.8770&token={self._access_token(owner)}')
+            await communicator.send_input({'type': 'http.request'})
+            await communicator.receive_output(timeout=5)
+            await asyncio.sleep(0.1)
+            await database_sync_to_async(MatchSubscription.objects.create)(match=match, user=user)
+            body = await communicator.receive_output(timeout=5)
+            await communicator.send_input({'type': 'http.disconnect'})
+            await communicator.wait(timeout=2)
+            get_feed().task.cancel()
+            return body['body'].decode('utf-8')
+
+        event, data = async_to_sync(feed)().strip().split('\n')
+        self.assertEquals(event, f'event: {UPDATED}')
+        data = json.loads(data[len('data: '):])
+        self.assertEquals(data['id'], match.id)
+        self.assertEquals(data['match']['participants_count'], 2)
+
+    def test_event_from_other_process(self):
+        """GET /matches/feed: Matches created by other worker processes should be sent"""
+        owner = self._create_test_user('owner')
+        # Broker of another worker process, with its own connections
+        publisher = PostgresBroker()
+
+        async def feed():
+            communicator = self._communicator(f'latitude=-8.0476&longitude=-34.8770&token={self._access_token(owner)}')
+            await communicator.send_input({'type': 'http.request'})
+            await communicator.receive_output(timeout=5)
+            await asyncio.sleep(0.1)
+            with mock.patch('api_v1.feed.events.get_broker', return_value=publisher):
+                match = await database_sync_to_async(self._create_test_match)(owner=owner)
+            body = await communicator.receive_output(timeout=5)
+            await communicator.send_input({'type': 'http.disconnect'})
+            await communicator.wait(timeout=2)
+            get_feed().task.cancel()
+            return body['body'].decode('utf-8'), match
+
+        body, match = async_to_sync(feed)()
+        publisher.close_publish_connection()
+        event, data = body.strip().split('\n')
+        self.assertEquals(event, f'event: {CREATED}')
+        self.assertEquals(json.loads(data[len('data: '):])['id'], match.id)
+
+    async def _request(self, query_string):
+        communicator = self._communicator(query_string)
+        await communicator.send_input({'type': 'http.request'})
+        start = await communicator.receive_output(timeout=5)
+        body = await communicator.receive_output(timeout=5)
+        return start, body
+
+    @staticmethod
+    def _communicator(query_string):
+        return ApplicationCommunicator(MatchFeedConsumer(), {
+            'type': 'http',
+            'method': 'GET',
+            'path': '/v1/matches/feed',
+            'query_string': query_string.encode('latin1'),
+            'headers': [],
+        })
+
+    @staticmethod
+    def _access_token(user):
+        return str(TokenObtainPairSerializer.get_token(user).access_token)
+
+    @staticmethod
+    def _create_test_user(username):
+        return User.objects.create_user(username=username, email=f'{username}@gmail.com', password='1234')
+
+    @staticmethod
+    def _create_test_match(**kwargs):
+        return Match.objects.create(title='Match title', description='a description',
+                                    location=Point(-34.944717, -8.0651966),
+                                    date=timezone.now() + timedelta(days=5), duration=timedelta(hours=1),
+                                    owner=kwargs.get('owner'), category=str(MatchCategory.SOCCER))
@@ -0,0 +1,92 @@
+from api_v1.models import User, Match, MatchSubscription, MatchCategory
+
+from django.db import connection
+from django.test import TransactionTestCase
+from django.utils import timezone
+from django.contrib.gis.geos import Point
+
+from rest_framework.test import APIClient
+
+import threading
+from datetime import timedelta
+
+URL_PREFFIX = '/v1'
+
+
+class MatchSubscriptionConcurrencyTestCase(TransactionTestCase):
+    """Match Subscription Endpoint under concurrent requests"""
+    parallel_clients = 12
+
+    def test_concurrent_subscriptions_respect_limit(self):
+        """POST /matches/{id}/subscriptions: Concurrent subscriptions cannot exceed the match limit"""
+        owner = User.objects.create_user(username='owner', email='owner@gmail.com', password='1234')
+        test_match = self._create_test_match(owner=owner, limit_participants=5)
+        users = [User.objects.create_user(username=f'user{i}', email=f'user{i}@gmail.com', password='1234')
+                 for i in range(self.parallel_clients)]
+
+        status_codes = self._subscribe_in_parallel(test_match, users)
+
+        self.assertEquals(status_codes.count(201), 4)
+        self.assertEquals(status_codes.count(400), self.parallel_clients - 4)
+        test_match.refresh_from_db()
+        self.assertEquals(test_match.participants_count, 5)
+        self.assertEquals(MatchSubscription.objects.filter(match=test_match).count(), 5)
+
+    def test_concurrent_subscriptions_without_limit(self):
+        """POST /matches/{id}/subscriptions: Concurrent subscriptions keep the participants count"""
+        owner = User.objects.create_user(username='owner', email='owner@gmail.com', password='1234')
+        test_match = self._create_test_match(owner=owner)
+        users = [User.objects.create_user(username=f'user{i}', email=f'user{i}@gmail.com', password='1234')
+                 for i in range(self.parallel_clients)]
+
+        status_codes = self._subscribe_in_parallel(test_match, users)
+
+        self.assertEquals(status_codes.count(201), self.parallel_clients)
+        test_match.refresh_from_db()
+        self.assertEquals(test_match.participants_count, self.parallel_clients + 1)
+
+    def test_concurrent_resubscriptions(self):
+        """POST /matches/{id}/subscriptions: Concurrent requests of the same user subscribe only once"""
+        owner = User.objects.create_user(username='owner', email='owner@gmail.com', password='1234')
+        test_user = User.objects.create_user(username='whatever', email='whatever@gmail.com', password='1234')
+        test_match = self._create_test_match(owner=owner, limit_participants=5)
+
+        status_codes = self._subscribe_in_parallel(test_match, [test_user] * self.parallel_clients)
+
+        self.assertEquals(status_codes.count(201), 1)
+        test_match.refresh_from_db()
+        self.assertEquals(test_match.participants_count, 2)
+
+    def _subscribe_in_parallel(self, match, users):
+        barrier = threading.Barrier(len(users))
+        status_codes = []
+
+        def subscribe(user):
+            client = APIClient()
+            client.force_authenticate(user=user)
+            try:
+                barrier.wait()
+                response = client.post(f'{URL_PREFFIX}/matches/{match.id}/subscriptions', follow=True)
+                status_codes.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=subscribe, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return status_codes
+
+    def _create_test_match(self, **kwargs):
+        match_properties = {
+            'title': kwargs.get('title', 'Match title'),
+            'description': kwargs.get('description', 'a description'),
+            'location': Point(kwargs.get('longitude', -34.944717), kwargs.get('latitude', -8.0651966)),
+            'date': kwargs.get('date', timezone.now() + timedelta(days=5)),
+            'duration': kwargs.get('duration', timedelta(hours=1)),
+            'owner': kwargs.get('owner'),
+            'limit_participants': kwargs.get('limit_participants'),
+            'category': kwargs.get('category', str(MatchCategory.SOCCER))
+        }
+        return Match.objects.create(**match_properties)
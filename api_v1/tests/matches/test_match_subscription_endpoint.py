@@ -1,5 +1,5 @@
 from api_v1.utils import TestCase
-from api_v1.models import User, Match, MatchCategory
+from api_v1.models import User, Match, MatchCategory, MatchSubscription
 
 from django.conf import settings
 from django.utils import timezone
@@ -53,6 +53,20 @@ class MatchSubscriptionEndpointTestCase(TestCase):
         self.assertEquals(len(response.json()['results']), 1)
         self.assertJSONContains(response.json()['results'][0], self.expected_structure)
     
+    def test_get_match_subscriptions_queries(self):
+        """GET /matches/{id}/subscriptions: The number of queries should not grow with the subscribers"""
+        test_user = self._create_test_user()
+        self.client.force_authenticate(user=test_user)
+        test_match = self._create_test_match(owner=test_user)
+        for i in range(5):
+            user = User.objects.create_user(username=f'player{i}', email=f'player{i}@gmail.com', password='1234')
+            MatchSubscription.objects.create(match=test_match, user=user)
+        with self.assertMaxNumQueries(3):
+            response = self.client.get(f'{URL_PREFFIX}/matches/{test_match.id}/subscriptions', follow=True)
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(len(response.json()['results']), 1)
+        self.assertJSONContains(response.json()['results'][0], self.expected_structure)
+
     def test_subscribe_to_match(self):
         """POST /matches/{id}/subscriptions: Subscribe for the match"""
         test_user = self._create_test_user()
@@ -91,6 +105,22 @@ class MatchSubscriptionEndpointTestCase(TestCase):
         self.assertEquals(response.status_code, 400)
         self.assertJSONEqual(response, {'errors':['You cannot subscribe for a finished match']})
     
+    def test_cant_subscribe_in_full_match(self):
+        """POST /matches/{id}/subscriptions: User cannot subscribe for a match without vacancies"""
+        test_user = self._create_test_user()
+        other_user = User.objects.create_user(username='other', email='other@gmail.com', password='1234')
+        late_user = User.objects.create_user(username='late', email='late@gmail.com', password='1234')
+        test_match = self._create_test_match(owner=test_user, limit_participants=2)
+        self.client.force_authenticate(user=other_user)
+        response = self.client.post(f'{URL_PREFFIX}/matches/{test_match.id}/subscriptions', follow=True)
+        self.assertEquals(response.status_code, 201)
+        self.client.force_authenticate(user=late_user)
+        response = self.client.post(f'{URL_PREFFIX}/matches/{test_match.id}/subscriptions', follow=True)
+        self.assertEquals(response.status_code, 400)
+        self.assertJSONEqual(response, {'errors':['This match is full']})
+        test_match.refresh_from_db()
+        self.assertEquals(test_match.participants_count, 2)
+
     def test_unsubscribe_match(self):
         """DELETE /matches/{id}/subscriptions: User should be able to unsubscribe for a match"""
         test_user = self._create_test_user()
@@ -113,6 +143,74 @@ class MatchSubscriptionEndpointTestCase(TestCase):
         self.assertEquals(response.status_code, 400)
         self.assertJSONEqual(response, {'errors':['You are not subscribed for this match']})
 
+    def test_bulk_subscribe_to_match(self):
+        """POST /matches/{id}/subscriptions: The match owner should subscribe a list of users, with results per user"""
+        test_user = self._create_test_user()
+        self.client.force_authenticate(user=test_user)
+        for i in range(3):
+            User.objects.create_user(username=f'player{i}', email=f'player{i}@gmail.com', password='1234')
+        test_match = self._create_test_match(owner=test_user, limit_participants=5)
+        usernames = ['player0', 'unknown', test_user.username, 'player1', 'player2', 'player0']
+        with self.assertMaxNumQueries(9):
+            response = self.client.post(f'{URL_PREFFIX}/matches/{test_match.id}/subscriptions',
+                                        {'usernames': usernames}, format='json')
+        self.assertEquals(response.status_code, 200)
+        results = response.json()
+        self.assertEquals(len(results), 5)
+        self.assertEquals([r.get('user', r)['username'] for r in results],
+                          ['player0', 'unknown', test_user.username, 'player1', 'player2'])
+        self.assertJSONContains(results[0], self.expected_structure)
+        self.assertEquals(results[1], {'username': 'unknown', 'errors': ['User not found']})
+        self.assertEquals(results[2], {'username': test_user.username,
+                                       'errors': ['You already registered in this match']})
+        test_match.refresh_from_db()
+        self.assertEquals(test_match.participants_count, 4)
+        self.assertEquals(test_match.matchsubscription_set.count(), 4)
+
+    def test_cant_bulk_subscribe_over_match_limit(self):
+        """POST /matches/{id}/subscriptions: Bulk subscriptions over the match vacancies should be rejected"""
+        test_user = self._create_test_user()
+        self.client.force_authenticate(user=test_user)
+        for i in range(2):
+            User.objects.create_user(username=f'player{i}', email=f'player{i}@gmail.com', password='1234')
+        test_match = self._create_test_match(owner=test_user, limit_participants=2)
+        response = self.client.post(f'{URL_PREFFIX}/matches/{test_match.id}/subscriptions',
+                                    {'usernames': ['player0', 'player1']}, format='json')
+        self.assertEquals(response.status_code, 400)
+        self.assertJSONEqual(response, {'errors': ['This match is full']})
+        test_match.refresh_from_db()
+        self.assertEquals(test_match.participants_count, 1)
+
+    def test_only_owner_can_bulk_subscribe(self):
+        """POST /matches/{id}/subscriptions: Only the match owner should subscribe other users"""
+        test_user = self._create_test_user()
+        self.client.force_authenticate(user=test_user)
+        other_user = User.objects.create_user(username='other', email='other@gmail.com', password='1234')
+        test_match = self._create_test_match(owner=other_user)
+        response = self.client.post(f'{URL_PREFFIX}/matches/{test_match.id}/subscriptions',
+                                    {'usernames': [test_user.username]}, format='json')
+        self.assertEquals(response.status_code, 403)
+        self.assertJSONEqual(response, {'errors': ['You do not have permission to perform this action.']})
+
+    def test_bulk_unsubscribe_match(self):
+        """DELETE /matches/{id}/subscriptions: The match owner should unsubscribe a list of users"""
+        test_user = self._create_test_user()
+        self.client.force_authenticate(user=test_user)
+        for i in range(2):
+            User.objects.create_user(username=f'player{i}', email=f'player{i}@gmail.com', password='1234')
+        test_match = self._create_test_match(owner=test_user)
+        self.client.post(f'{URL_PREFFIX}/matches/{test_match.id}/subscriptions',
+                         {'usernames': ['player0', 'player1']}, format='json')
+        response = self.client.delete(f'{URL_PREFFIX}/matches/{test_match.id}/subscriptions',
+                                      {'usernames': ['player0', 'player1', 'unknown']}, format='json')
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(response.json(), [
+            {'username': 'player0'}, {'username': 'player1'},
+            {'username': 'unknown', 'errors': ['You are not subscribed for this match']},
+        ])
+        test_match.refresh_from_db()
+        self.assertEquals(test_match.participants_count, 1)
+
     def _create_test_user(self):
         return User.objects.create_user(username='whatever', email='whatever@gmail.com', password='1234')
     
@@ -124,6 +222,7 @@ class MatchSubscriptionEndpointTestCase(TestCase):
             'date': kwargs.get('date', timezone.now() + timedelta(days=5)),
             'duration': kwargs.get('duration', timedelta(hours=1)),
             'owner': kwargs.get('owner'),
+            'limit_participants': kwargs.get('limit_participants'),
             'category': kwargs.get('category', str(MatchCategory.SOCCER))
         }
         return Match.objects.create(**match_properties)
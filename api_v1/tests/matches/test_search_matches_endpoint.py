@@ -1,10 +1,15 @@
 from api_v1.utils import TestCase
 from api_v1.models import User, Match, MatchCategory
+from api_v1.models.functions import GeographyDistance
+from api_v1.serializers import MatchSerializer, MatchSearchResultSerializer, \
+                               MatchValuesSerializer, MatchSearchResultValuesSerializer
+from api_v1.geocache import get_tile_cache
 
 from django.utils import timezone
 from django.contrib.gis.geos import Point
 
 from rest_framework.test import APIClient
+from rest_framework.renderers import JSONRenderer
 
 from datetime import timedelta
 
@@ -18,7 +23,8 @@ class SearchMatchEndpointTestCase(TestCase):
     match_expected_structure = {'id': None, 'title': None, 'description': None, 
                                 'owner': None, 'duration': None, 'category': None,
                                 'location': {'latitude', 'longitude'}, 'date': None,
-                                'status': None, 'created_date': None, 'limit_participants': None}
+                                'status': None, 'created_date': None, 'limit_participants': None,
+                                'participants_count': None}
     
     def setUp(self):
         self.client = APIClient()
@@ -285,6 +291,155 @@ class SearchMatchEndpointTestCase(TestCase):
         self.assertEquals(response.json()['results'][0]['match']['title'], 'Match title 1')
         self.assertEquals(response.json()['results'][1]['match']['title'], 'Match title 0')
 
+    def test_search_matches_query_count(self):
+        """GET /matches: A page of matches should cost a constant number of queries"""
+        test_user = self._create_test_user()
+        self.client.force_authenticate(user=test_user)
+
+        lat, lon, rad = -8.0651966, -34.944717, 15
+        for i in range(20):
+            owner = User.objects.create_user(username=f'user{i}', email=f'user{i}@gmail.com', password='1234')
+            self._create_test_match(owner=owner, latitude=lat, longitude=lon)
+
+        url = f'{URL_PREFFIX}/matches?latitude={lat}&longitude={lon}&radius={rad}'
+        # Loads the geohash tiles of the area in the tile cache
+        self.client.get(url, follow=True)
+        with self.assertMaxNumQueries(2):
+            response = self.client.get(url, follow=True)
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(len(response.json()['results']), 20)
+
+    def test_search_matches_cursor_pagination(self):
+        """GET /matches: Passing cursor parameter should paginate by keyset, without count"""
+        test_user = self._create_test_user()
+        self.client.force_authenticate(user=test_user)
+
+        lat, lon, rad = -8.0651966, -34.944717, 15
+
+        total_matches = 25
+        for i in range(total_matches):
+            self._create_test_match(owner=test_user, latitude=lat, longitude=lon,
+                                    title=f'Match title {i}')
+
+        for ordering in ('-created_date', 'distance'):
+            url = f'{URL_PREFFIX}/matches?latitude={lat}&longitude={lon}&radius={rad}&ordering={ordering}&cursor='
+            response = self.client.get(url, follow=True)
+            self.assertEquals(response.status_code, 200)
+            self.assertJSONContains(response, {'next', 'results'})
+
+            data = response.json()
+            self.assertEquals(len(data['results']), 20)
+            self.assertNotEquals(data['next'], None)
+
+            response_next_page = self.client.get(data['next'], follow=True)
+            self.assertEquals(response_next_page.status_code, 200)
+
+            next_data = response_next_page.json()
+            self.assertEquals(len(next_data['results']), 5)
+            self.assertEquals(next_data['next'], None)
+
+            titles = [r['match']['title'] for r in data['results'] + next_data['results']]
+            self.assertEquals(len(set(titles)), total_matches)
+            if ordering == '-created_date':
+                self.assertEquals(titles[0], f'Match title {total_matches - 1}')
+
+    def test_search_matches_invalid_cursor(self):
+        """GET /matches: Should not accept invalid cursor values"""
+        test_user = self._create_test_user()
+        self.client.force_authenticate(user=test_user)
+
+        lat, lon, rad = -8.0651966, -34.944717, 15
+        url = f'{URL_PREFFIX}/matches?latitude={lat}&longitude={lon}&radius={rad}&cursor=invalid'
+        response = self.client.get(url, follow=True)
+        self.assertEquals(response.status_code, 400)
+        self.assertJSONEqual(response, {'errors': ['Invalid cursor']})
+
+    def test_search_match_nearest_order(self):
+        """GET /matches: Passing ordering=distance should return nearest matches first"""
+        test_user = self._create_test_user()
+        self.client.force_authenticate(user=test_user)
+
+        lat, lon, rad = -8.0651966, -34.944717, 15
+        self._create_test_match(owner=test_user, title='Near match', latitude=lat, longitude=lon)
+        self._create_test_match(owner=test_user, title='Far match', latitude=-8.045210, longitude=-34.930935)
+
+        url = f'{URL_PREFFIX}/matches?latitude={lat}&longitude={lon}&radius={rad}&ordering=distance'
+        response = self.client.get(url, follow=True)
+        self.assertEquals(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEquals([r['match']['title'] for r in results], ['Near match', 'Far match'])
+        self.assertLess(results[0]['distance'], results[1]['distance'])
+
+        url = f'{URL_PREFFIX}/matches?latitude={lat}&longitude={lon}&radius={rad}'
+        response = self.client.get(url, follow=True)
+        self.assertEquals(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEquals([r['match']['title'] for r in results], ['Far match', 'Near match'])
+
+    def test_search_match_invalid_ordering(self):
+        """GET /matches: Should not accept invalid ordering values"""
+        test_user = self._create_test_user()
+        self.client.force_authenticate(user=test_user)
+
+        lat, lon, rad = -8.0651966, -34.944717, 15
+        url = f'{URL_PREFFIX}/matches?latitude={lat}&longitude={lon}&radius={rad}&ordering=title'
+        response = self.client.get(url, follow=True)
+        self.assertEquals(response.status_code, 400)
+        self.assertJSONEqual(response, {'errors': ['Choose a valid ordering value']})
+
+    def test_values_serializers_representation(self):
+        """GET /matches: Values serializers should render the same JSON of the model serializers"""
+        test_user = self._create_test_user()
+        self._create_test_match(owner=test_user, title='On hold match')
+        limited_match = self._create_test_match(owner=test_user, description=None, duration=timedelta(minutes=90))
+        limited_match.limit_participants = 10
+        limited_match.save()
+        finished_match = self._create_test_match(owner=test_user, latitude=-8.1, longitude=-34.9)
+        Match.objects.filter(id=finished_match.id).update(date=timezone.now() - timedelta(days=2),
+                                                          end_date=timezone.now() - timedelta(days=1))
+
+        origin = Point(-34.944717, -8.0651966, srid=4326)
+        queryset = Match.objects.with_status().annotate(distance=GeographyDistance('location', origin)) \
+                                .order_by('id')
+        for serializer_class, values_serializer_class in ((MatchSerializer, MatchValuesSerializer),
+                                                          (MatchSearchResultSerializer,
+                                                           MatchSearchResultValuesSerializer)):
+            data = serializer_class(list(queryset.select_related('owner')), many=True).data
+            values = values_serializer_class.setup_eager_loading(queryset)
+            values_data = values_serializer_class(list(values), many=True).data
+            self.assertEquals(JSONRenderer().render(values_data), JSONRenderer().render(data))
+
+    def test_search_matches_tile_cache(self):
+        """GET /matches: Cached tiles should be invalidated when matches are created, moved or deleted"""
+        test_user = self._create_test_user()
+        self.client.force_authenticate(user=test_user)
+        tile_cache = get_tile_cache()
+        tile_cache.backend.clear()
+
+        lat, lon, rad = -8.0651966, -34.944717, 15
+        url = f'{URL_PREFFIX}/matches?latitude={lat}&longitude={lon}&radius={rad}'
+        first_match = self._create_test_match(owner=test_user, title='First match')
+        self.assertEquals(self.client.get(url, follow=True).json()['count'], 1)
+
+        hits = tile_cache.stats()['hits']
+        self.assertEquals(self.client.get(url, follow=True).json()['count'], 1)
+        self.assertGreater(tile_cache.stats()['hits'], hits)
+
+        self._create_test_match(owner=test_user, title='Second match', latitude=lat + 0.01)
+        self.assertEquals(self.client.get(url, follow=True).json()['count'], 2)
+
+        first_match.location = Point(-46.6333, -23.5505)
+        first_match.save()
+        results = self.client.get(url, follow=True).json()['results']
+        self.assertEquals([r['match']['title'] for r in results], ['Second match'])
+
+        first_match.location = Point(lon, lat)
+        first_match.save()
+        self.assertEquals(self.client.get(url, follow=True).json()['count'], 2)
+
+        first_match.delete()
+        self.assertEquals(self.client.get(url, follow=True).json()['count'], 1)
+
     def _create_test_user(self):
         return User.objects.create_user(username='whatever', email='whatever@gmail.com', password='1234')
     
@@ -119,5 +119,28 @@ class SearchUserEndpointTestCase(TestCase):
 
         assert len(data['results']) == limit, f'Result do not have {limit} records'
     
+    def test_search_user_ranking(self):
+        """GET /users: Users starting with the search come first, then the most similar ones"""
+        self.client.force_authenticate(user=self._create_test_user())
+        User.objects.create_user(username='the_johnny', email='the_johnny@gmail.com', password='1234')
+        User.objects.create_user(username='the_john', email='the_john@gmail.com', password='1234')
+        User.objects.create_user(username='johnny', email='johnny@gmail.com', password='1234')
+        User.objects.create_user(username='maria', email='maria@gmail.com', password='1234')
+        response = self.client.get(f'{URL_PREFFIX}/users?search=john', follow=True)
+        self.assertEquals(response.status_code, 200)
+        usernames = [user['username'] for user in response.json()['results']]
+        self.assertEquals(usernames, ['johnny', 'the_john', 'the_johnny'])
+
+    def test_search_user_short_term(self):
+        """GET /users: Search terms shorter than 3 characters should match the beginning of username or name"""
+        self.client.force_authenticate(user=self._create_test_user())
+        User.objects.create_user(username='johnny', email='johnny@gmail.com', password='1234')
+        User.objects.create_user(username='user', first_name='Joana', email='user@gmail.com', password='1234')
+        User.objects.create_user(username='mojo', email='mojo@gmail.com', password='1234')
+        response = self.client.get(f'{URL_PREFFIX}/users?search=jo', follow=True)
+        self.assertEquals(response.status_code, 200)
+        usernames = {user['username'] for user in response.json()['results']}
+        self.assertEquals(usernames, {'johnny', 'user'})
+
     def _create_test_user(self):
         return User.objects.create_user(username='whatever', email='whatever@gmail.com', password='1234')
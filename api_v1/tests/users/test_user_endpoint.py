@@ -127,6 +127,29 @@ class UserEndpointTestCase(TestCase):
         self.assertEquals(response.status_code, 200)
         self.assertJSONContains(response, {'username', 'name', 'level', 'registred_date'})
 
+    def test_user_conditional_get(self):
+        """GET /users/{username}: Should return 304 while the user is not modified"""
+        test_user = self._create_test_user()
+        other_user = User.objects.create_user(username='other', email='other@gmail.com', password='1234')
+        self.client.force_authenticate(user=test_user)
+        url = f'{URL_PREFFIX}/users/{test_user.username}'
+        etag = self.client.get(url, follow=True)['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, follow=True)
+        self.assertEquals(response.status_code, 304)
+
+        # Other users get a representation without the email
+        self.client.force_authenticate(user=other_user)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag, follow=True)
+        self.assertEquals(response.status_code, 200)
+
+        self.client.force_authenticate(user=test_user)
+        response = self.client.patch(url, {'name': 'New name'}, format='json', HTTP_IF_MATCH=etag, follow=True)
+        self.assertEquals(response.status_code, 200)
+        response = self.client.patch(url, {'name': 'Other name'}, format='json', HTTP_IF_MATCH=etag, follow=True)
+        self.assertEquals(response.status_code, 412)
+        self.assertJSONEqual(response, {'errors': ['The resource has been modified']})
+
     def test_user_not_found(self):
         """GET /users/{username}: Get a user who does not exist should return 404 response code and appropriate error message"""
         self.client.force_authenticate(user=self._create_test_user())
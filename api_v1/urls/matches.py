@@ -1,8 +1,11 @@
 from django.urls import path
-from api_v1.views import MatchCreateSearch, MatchRetrieveUpdateDelete, MatchSubscriptionView
+from api_v1.views import MatchCreateSearch, MatchRetrieveUpdateDelete, MatchSubscriptionView, \
+                         MatchChatMessageList, MatchBatch
 
 urlpatterns = [
-   path('matches', MatchCreateSearch.as_view()),
-   path('matches/<int:pk>', MatchRetrieveUpdateDelete.as_view()),
-   path('matches/<int:pk>/subscriptions', MatchSubscriptionView.as_view())
+   path('matches', MatchCreateSearch.as_view(), name='match_create_search'),
+   path('matches/batch', MatchBatch.as_view(), name='match_batch'),
+   path('matches/<int:pk>', MatchRetrieveUpdateDelete.as_view(), name='match_retrieve_update_delete'),
+   path('matches/<int:pk>/subscriptions', MatchSubscriptionView.as_view(), name='match_subscription'),
+   path('matches/<int:pk>/messages', MatchChatMessageList.as_view(), name='match_chat_messages')
 ]
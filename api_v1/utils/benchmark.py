@@ -0,0 +1,40 @@
+import time
+import math
+
+
+def percentile(samples, percent):
+    """
+    Nearest-rank percentile of a list of samples.
+    """
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def measure(func, repeat=1):
+    """
+    Call `func` `repeat` times and return the elapsed time (in ms) of each call.
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summarize(samples):
+    return {
+        'p50': percentile(samples, 50),
+        'p95': percentile(samples, 95),
+        'p99': percentile(samples, 99),
+        'mean': sum(samples) / len(samples) if samples else None,
+    }
+
+
+def format_summary(name, samples, unit='ms'):
+    summary = summarize(samples)
+    values = ', '.join(f'{k}={v:.3f}{unit}' for k, v in summary.items() if v is not None)
+    return f'{name}: {values} (n={len(samples)})'
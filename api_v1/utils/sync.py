@@ -0,0 +1,20 @@
+import functools
+
+from asgiref.sync import sync_to_async
+
+from django.db import close_old_connections
+
+
+def database_sync_to_async(func):
+    """
+    Run a function that uses the database in a worker thread, from async
+    code. Connections are closed (returned to the pool) in that thread.
+    """
+    def run_and_close(*args, **kwargs):
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return functools.wraps(func)(sync_to_async(run_and_close))
@@ -1,9 +1,43 @@
 import django.test
 
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.test.utils import CaptureQueriesContext
+
 from rest_framework.response import Response
 
 
+class _AssertMaxNumQueriesContext(CaptureQueriesContext):
+    def __init__(self, test_case, num, connection):
+        self.test_case = test_case
+        self.num = num
+        super().__init__(connection)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super().__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return
+        executed = len(self)
+        queries = '\n'.join(f"{i}. {q['sql']}" for i, q in enumerate(self.captured_queries, start=1))
+        self.test_case.assertLessEqual(
+            executed, self.num,
+            f'{executed} queries executed, a maximum of {self.num} expected\n'
+            f'Captured queries were:\n{queries}'
+        )
+
+
 class TestCase(django.test.TestCase):
+    def assertMaxNumQueries(self, num, func=None, *args, using=DEFAULT_DB_ALIAS, **kwargs):
+        """
+        Assert a function call (or the block of a `with` statement) 
+        executes at most `num` queries.
+        """
+        context = _AssertMaxNumQueriesContext(self, num, connections[using])
+        if func is None:
+            return context
+
+        with context:
+            func(*args, **kwargs)
+
     def assertJSONContentType(self, response):
         self.assertTrue(response.has_header('Content-Type'))
         self.assertEquals(response.get('Content-Type'), 'application/json')
@@ -1,4 +1,5 @@
 from copy import deepcopy
+from collections import OrderedDict
 
 from django.contrib.gis.geos import Point
 from django.utils.translation import gettext as _
@@ -18,7 +19,7 @@ def validate_location(location_dict):
     location_dict = validate_float_values(location_dict)
 
     try:
-        location = Point(params['longitude'], params['latitude'])
+        location = Point(params['longitude'], params['latitude'], srid=4326)
     except TypeError:
         raise ValidationError(_('Invalid geo coordinates'))
     
@@ -44,4 +45,22 @@ def validate_float_values(values_dict):
     if any(len(e) > 0 for e in errors.values()):
         raise ValidationError(errors)
     
-    return values_dict
\ No newline at end of file
+    return values_dict
+
+def validate_id_list(param, value, max_size):
+    """
+    Unique ids, in the given order, of a comma-separated list.
+    """
+    try:
+        ids = [int(i) for i in value.split(',') if i.strip()]
+    except ValueError:
+        raise ValidationError({param: [_('%(label_name)s must be a comma-separated list of ids')
+                                       % dict(label_name=param.capitalize())]})
+    ids = list(OrderedDict.fromkeys(ids))
+    if not ids:
+        raise ValidationError({param: ValidationError(_('%(field_label)s is required'), code='required',
+                                                      params={'field_label': param})})
+    if len(ids) > max_size:
+        raise ValidationError({param: [_('%(label_name)s must have at most %(max_size)d ids')
+                                       % dict(label_name=param.capitalize(), max_size=max_size)]})
+    return ids
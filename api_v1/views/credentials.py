@@ -4,18 +4,33 @@ from api_v1.models import User
 from api_v1.serializers import TokenObtainPairSerializer, TokenRefreshSerializer, \
                                UserSerializer
 
-from rest_framework import generics
+from rest_framework import generics, status
 
+from api_v1.metrics import SIGN_INS, TOKEN_REFRESHES
+from api_v1.profiling import ProfilingMixin
 
-class TokenObtainPairView(rest_framework_simplejwt.views.TokenObtainPairView):
+
+class TokenObtainPairView(ProfilingMixin, rest_framework_simplejwt.views.TokenObtainPairView):
     serializer_class = TokenObtainPairSerializer
     queryset = User.objects.filter(is_staff=False)
 
+    def post(self, request, *args, **kwargs):
+        response = super().post(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            SIGN_INS.inc()
+        return response
+
 
-class TokenRefreshView(rest_framework_simplejwt.views.TokenRefreshView):
+class TokenRefreshView(ProfilingMixin, rest_framework_simplejwt.views.TokenRefreshView):
     serializer_class = TokenRefreshSerializer
     queryset = User.objects.filter(is_staff=False)
 
+    def post(self, request, *args, **kwargs):
+        response = super().post(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            TOKEN_REFRESHES.inc()
+        return response
+
 
-class SignupAccountView(generics.CreateAPIView):
+class SignupAccountView(ProfilingMixin, generics.CreateAPIView):
     serializer_class = UserSerializer
@@ -1,26 +1,60 @@
+from collections import OrderedDict
+
+from django.conf import settings
 from django.http.response import Http404
+from django.db import transaction
+from django.db.models import F
 from django.db.utils import IntegrityError 
+from django.utils import timezone
 from django.utils.translation import gettext as _
 
 from psycopg2 import errorcodes
 
 from rest_framework import generics, mixins, status
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import ValidationError, PermissionDenied
+from rest_framework.response import Response
 from rest_framework.pagination import LimitOffsetPagination
 
-from api_v1.models import User, Match, MatchSubscription
-from api_v1.filters import LocationRangeFilter, MatchStatusFilter
-from api_v1.serializers import MatchSerializer, MatchSubscriptionSerializer, \
-                               MatchSearchResultSerializer
+from api_v1.models import User, Match, MatchStatus, MatchSubscription, MatchChatMessage, \
+                           participants_count_changed
+from api_v1.filters import LocationRangeFilter, MatchStatusFilter, MatchVacancyFilter
+from api_v1.serializers import MatchSerializer, MatchSubscriptionSerializer, MatchValuesSerializer, \
+                               MatchSearchResultValuesSerializer, MatchChatMessageSerializer, \
+                               MatchSubscriptionBulkSerializer
+from api_v1.metrics import SUBSCRIPTIONS, SUBSCRIBE
 from api_v1.core import IsAuthenticated, IsOwnerOrReadOnly, IsOwnerUser, \
-                        IsMatchSubscriptionUserOrReadOnly
+                        IsMatchSubscriptionUserOrReadOnly, EagerLoadingMixin, ConditionalMixin
+from api_v1.profiling import ProfilingMixin
+from api_v1.utils.validation import validate_required_params, validate_id_list
+
+
+class MatchConditionalMixin(ConditionalMixin):
+    """
+    Conditional requests of matches, versioned by `Match.last_modified`
+    and the owner username (shown in the representation).
+    """
+    last_modified_field = 'last_modified'
+
+    def get_object_version(self, instance):
+        return super().get_object_version(instance) + (instance.owner.username,)
+
+    def get_row_version(self, row):
+        if isinstance(row, dict):
+            return super().get_row_version(row) + (row['owner_username'],)
+        return super().get_row_version(row)
 
+    def get_last_modified_expression(self):
+        return Match.objects.last_modified_expression()
 
-class MatchRetrieveUpdateDelete(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Match.objects.all()
+
+class MatchRetrieveUpdateDelete(ProfilingMixin, MatchConditionalMixin, EagerLoadingMixin,
+                                generics.RetrieveUpdateDestroyAPIView):
     serializer_class = MatchSerializer
     permission_classes = (IsAuthenticated, IsOwnerOrReadOnly)
 
+    def get_queryset(self):
+        return Match.objects.with_status()
+
     def handle_exception(self, exc):
         response = super().handle_exception(exc)
         if response.status_code == status.HTTP_404_NOT_FOUND: 
@@ -28,34 +62,58 @@ class MatchRetrieveUpdateDelete(generics.RetrieveUpdateDestroyAPIView):
         return response
 
 
-class MatchCreateSearch(generics.ListCreateAPIView):
-    queryset = Match.objects.all()
-    filter_backends = (LocationRangeFilter, MatchStatusFilter)
+class MatchCreateSearch(ProfilingMixin, MatchConditionalMixin, EagerLoadingMixin,
+                        generics.ListCreateAPIView):
+    filter_backends = (LocationRangeFilter, MatchStatusFilter, MatchVacancyFilter)
     permission_classes = (IsAuthenticated,)
 
-    def filter_queryset(self, queryset):
-        queryset = super().filter_queryset(queryset)
-        return queryset.order_by('-created_date')
+    def get_queryset(self):
+        return Match.objects.with_status()
 
     def get_serializer_class(self):
         if self.request and self.request.method == 'GET':
-            return MatchSearchResultSerializer
+            return MatchSearchResultValuesSerializer
         return MatchSerializer
 
-class UsersMatch(generics.ListCreateAPIView):
+class MatchBatch(ProfilingMixin, generics.GenericAPIView):
+    """
+    Matches of a list of ids (`ids=1,2,3`, at most `settings.MATCH_BATCH_MAX_SIZE`),
+    in the requested order, fetched in one query. Ids without a match get a
+    not found marker.
+    """
+    serializer_class = MatchValuesSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        return Match.objects.with_status()
+
+    def get(self, request, *args, **kwargs):
+        params = validate_required_params(request.query_params, ('ids',))
+        ids = validate_id_list('ids', params['ids'], settings.MATCH_BATCH_MAX_SIZE)
+        queryset = self.get_serializer_class().setup_eager_loading(self.get_queryset().filter(id__in=ids))
+        matches = {row['id']: row for row in queryset}
+        return Response([self.get_serializer(matches[pk]).data if pk in matches
+                         else {'id': pk, 'errors': [_('Match not found')]} for pk in ids])
+
+
+class UsersMatch(ProfilingMixin, MatchConditionalMixin, EagerLoadingMixin, generics.ListCreateAPIView):
     lookup_field = 'username'
     lookup_url_kwarg = 'username'
-    serializer_class = MatchSerializer
-    filter_backends = (MatchStatusFilter,)
+    filter_backends = (MatchStatusFilter, MatchVacancyFilter)
     permission_classes = (IsAuthenticated, IsOwnerUser)
 
     def get_queryset(self):
         user = User.objects.get(username=self.kwargs['username'])
-        return Match.objects.filter(matchsubscription__user=user)
+        return Match.objects.with_status().filter(matchsubscription__user=user)
+
+    def get_serializer_class(self):
+        if self.request and self.request.method == 'GET':
+            return MatchValuesSerializer
+        return MatchSerializer
 
     def filter_queryset(self, queryset):
         queryset = super().filter_queryset(queryset)
-        return queryset.order_by('-created_date')
+        return queryset.order_by('-created_date', '-id')
     
     def handle_exception(self, exc):
         response = super().handle_exception(exc)
@@ -64,7 +122,8 @@ class UsersMatch(generics.ListCreateAPIView):
         return response
 
 
-class MatchSubscriptionView(mixins.CreateModelMixin,
+class MatchSubscriptionView(ProfilingMixin, EagerLoadingMixin,
+                            mixins.CreateModelMixin,
                             mixins.DestroyModelMixin,
                             generics.ListAPIView):
     serializer_class = MatchSubscriptionSerializer
@@ -72,18 +131,99 @@ class MatchSubscriptionView(mixins.CreateModelMixin,
 
     def get_queryset(self):
         match = Match.objects.get(id=self.kwargs['pk'])
-        return MatchSubscription.objects.filter(user=self.request.user, match=match)
+        return MatchSubscription.objects.filter(user=self.request.user, match=match).order_by('-date', '-id')
     
     def get_object(self):
         match = Match.objects.get(id=self.kwargs['pk'])
         return MatchSubscription.objects.get(user=self.request.user, match=match)
     
     def post(self, request, *args, **kwargs):
+        if 'usernames' in request.data:
+            return self.bulk_subscribe(request)
         request.data['match_id'] = self.kwargs['pk']
         return self.create(request, *args, **kwargs)
 
     def delete(self, request, *args, **kwargs):
+        if 'usernames' in request.data:
+            return self.bulk_unsubscribe(request)
         return self.destroy(request, *args, **kwargs)
+
+    def get_bulk_usernames(self, request):
+        serializer = MatchSubscriptionBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        # Unique usernames, in the requested order
+        return list(OrderedDict.fromkeys(serializer.validated_data['usernames']))
+
+    def get_bulk_match(self, request):
+        # Locked until the transaction ends, as by the single subscriptions
+        match = Match.objects.select_for_update().get(id=self.kwargs['pk'])
+        if match.owner_id != request.user.id:
+            raise PermissionDenied()
+        return match
+
+    def bulk_subscribe(self, request):
+        """
+        Subscribe the users of a list of usernames, by the match owner. The
+        match capacity is checked once for all the new subscriptions, which
+        are inserted together, and the participants count is updated once.
+        """
+        usernames = self.get_bulk_usernames(request)
+        with transaction.atomic():
+            match = self.get_bulk_match(request)
+            if match.status == MatchStatus.FINISHED:
+                raise ValidationError(_('You cannot subscribe for a finished match'))
+            users = {user.username: user for user in User.objects.filter(username__in=usernames)}
+            subscribed = set(MatchSubscription.objects.filter(match=match, user__in=users.values())
+                                                      .values_list('user_id', flat=True))
+            new_users = [users[username] for username in usernames
+                         if username in users and users[username].id not in subscribed]
+            if match.limit_participants is not None \
+                    and match.participants_count + len(new_users) > match.limit_participants:
+                raise ValidationError(_('This match is full'))
+            # With ignore_conflicts, bulk_create returns every object, inserted or not. The
+            # match row lock (get_bulk_match) keeps concurrent subscriptions of these users
+            # from being inserted after the `subscribed` query, so all of them are inserted.
+            subscriptions = MatchSubscription.objects.bulk_create(
+                [MatchSubscription(match=match, user=user) for user in new_users], ignore_conflicts=True)
+            Match.objects.filter(pk=match.pk) \
+                .update(participants_count=F('participants_count') + len(subscriptions),
+                        updated_date=timezone.now())
+            if subscriptions:
+                participants_count_changed.send(sender=MatchSubscription, match_ids=[match.pk])
+        SUBSCRIPTIONS.labels(SUBSCRIBE).inc(len(subscriptions))
+
+        created = {subscription.user.username: subscription for subscription in subscriptions}
+        results = []
+        for username in usernames:
+            if username in created:
+                results.append(self.get_serializer(created[username]).data)
+            elif username in users:
+                results.append({'username': username,
+                                'errors': [_('Match subscription with this Match and User already exists.')]})
+            else:
+                results.append({'username': username, 'errors': [_('User not found')]})
+        return Response(results, status=status.HTTP_200_OK)
+
+    def bulk_unsubscribe(self, request):
+        """
+        Unsubscribe the users of a list of usernames, by the match owner,
+        with one delete and one participants count update (see
+        MatchSubscription.delete_many).
+        """
+        usernames = self.get_bulk_usernames(request)
+        with transaction.atomic():
+            match = self.get_bulk_match(request)
+            subscriptions = dict(MatchSubscription.objects.filter(match=match, user__username__in=usernames)
+                                                          .values_list('user__username', 'pk'))
+            MatchSubscription.delete_many(MatchSubscription.objects.filter(pk__in=subscriptions.values()))
+
+        results = []
+        for username in usernames:
+            if username in subscriptions:
+                results.append({'username': username})
+            else:
+                results.append({'username': username, 'errors': [_('You are not subscribed for this match')]})
+        return Response(results, status=status.HTTP_200_OK)
     
     def handle_exception(self, exc):
         response = super().handle_exception(exc)
@@ -92,4 +232,21 @@ class MatchSubscriptionView(mixins.CreateModelMixin,
             response.data['errors'] = [_('You are not subscribed for this match')]
         elif response.status_code == status.HTTP_404_NOT_FOUND:
             response.data['errors'] = [_('Match not found')]
-        return response
\ No newline at end of file
+        return response
+
+
+class MatchChatMessageList(ProfilingMixin, EagerLoadingMixin, generics.ListAPIView):
+    serializer_class = MatchChatMessageSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def get_queryset(self):
+        match = Match.objects.get(id=self.kwargs['pk'])
+        if not MatchSubscription.objects.filter(match=match, user=self.request.user).exists():
+            raise PermissionDenied(_('You are not subscribed for this match'))
+        return MatchChatMessage.objects.filter(match=match).order_by('-date', '-id')
+
+    def handle_exception(self, exc):
+        response = super().handle_exception(exc)
+        if response.status_code == status.HTTP_404_NOT_FOUND:
+            response.data['errors'] = [_('Match not found')]
+        return response
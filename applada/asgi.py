@@ -2,6 +2,10 @@
 ASGI config for applada project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Views run in a bounded thread pool (see ``applada.handlers``), sized by the
+ASGI_THREADS environment variable. WebSocket connections are served by the
+match chat (``api_v1.chat``) and /v1/matches/feed by the Server-Sent Events
+match feed (``api_v1.feed``).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
@@ -9,8 +13,19 @@ https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'applada.settings')
 
-application = get_asgi_application()
+django.setup(set_prefix=False)
+
+from applada.handlers import ThreadPoolASGIHandler, ProtocolRouter, PathRouter  # noqa: E402
+from api_v1.chat import MatchChatConsumer, get_writer  # noqa: E402
+from api_v1.feed import MatchFeedConsumer  # noqa: E402
+
+application = ProtocolRouter(
+    http=PathRouter([(MatchFeedConsumer.path_regex, MatchFeedConsumer())],
+                    default=ThreadPoolASGIHandler()),
+    websocket=MatchChatConsumer(),
+    on_shutdown=[lambda: get_writer().close()],
+)
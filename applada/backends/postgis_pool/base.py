@@ -0,0 +1,85 @@
+import os
+
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql.base import Database
+from django.db.backends.postgresql.creation import DatabaseCreation as PostgreSQLDatabaseCreation
+from django.contrib.gis.db.backends.postgis.base import DatabaseWrapper as PostGISDatabaseWrapper
+
+from .pool import get_pool, pool_stats
+
+DEFAULT_POOL_OPTIONS = {
+    'MIN_SIZE': 1,
+    'MAX_SIZE': 10,
+    'TIMEOUT': 10,
+    'HEALTH_CHECK_INTERVAL': 30,
+    'MAX_LIFETIME': 3600,
+}
+
+
+class DatabaseCreation(PostgreSQLDatabaseCreation):
+
+    def destroy_test_db(self, *args, **kwargs):
+        # Idle pooled connections to the test database would prevent dropping it
+        self.connection.close()
+        self.connection.close_pool()
+        super().destroy_test_db(*args, **kwargs)
+
+
+class DatabaseWrapper(PostGISDatabaseWrapper):
+    """
+    PostGIS backend that takes its connections from a per-process pool
+    (see `pool.ConnectionPool`), configured by the `POOL` dict of the
+    database settings. Closing the connection, as Django does at the end of
+    every request when CONN_MAX_AGE is 0, returns it to the pool.
+    """
+    creation_class = DatabaseCreation
+
+    pool = None
+
+    def get_pool(self, conn_params):
+        options = {**DEFAULT_POOL_OPTIONS, **self.settings_dict.get('POOL', {})}
+        key = (self.alias, tuple(sorted((k, str(v)) for k, v in conn_params.items())))
+        return get_pool(key, connect=lambda: Database.connect(**conn_params),
+                        name=f"{self.alias}:{conn_params.get('database', '')}",
+                        min_size=options['MIN_SIZE'], max_size=options['MAX_SIZE'],
+                        timeout=options['TIMEOUT'],
+                        health_check_interval=options['HEALTH_CHECK_INTERVAL'],
+                        max_lifetime=options['MAX_LIFETIME'])
+
+    def get_new_connection(self, conn_params):
+        # Connections used to create or drop databases are not pooled
+        if self.alias == NO_DB_ALIAS:
+            return super().get_new_connection(conn_params)
+
+        self.pool = self.get_pool(conn_params)
+        connection = self.pool.getconn()
+
+        # Same isolation level handling of the PostgreSQL backend
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+
+        return connection
+
+    def _close(self):
+        pool, self.pool = self.pool, None
+        if self.connection is None or pool is None:
+            return super()._close()
+        if pool.pid != os.getpid():
+            # Connection inherited from the parent process, which still uses it
+            return
+        with self.wrap_database_errors:
+            pool.putconn(self.connection)
+
+    def close_pool(self):
+        if self.alias != NO_DB_ALIAS:
+            self.get_pool(self.get_connection_params()).close()
+
+    @staticmethod
+    def pool_stats():
+        return pool_stats()
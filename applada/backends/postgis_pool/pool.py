@@ -0,0 +1,222 @@
+import os
+import time
+import threading
+import collections
+
+from psycopg2 import Error, OperationalError, extensions
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+class PooledConnection:
+    def __init__(self, connection):
+        self.connection = connection
+        self.created = time.monotonic()
+        self.last_used = self.created
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of psycopg2 connections of a process.
+
+    Up to `max_size` connections are opened on demand, `min_size` of them are
+    opened on the first checkout. Idle connections are reused last-in
+    first-out; the ones idle for more than `health_check_interval` seconds are
+    checked with `SELECT 1` before being handed out, and the ones older than
+    `max_lifetime` seconds are replaced. When the pool is exhausted, a checkout
+    waits up to `timeout` seconds for a connection.
+    """
+
+    def __init__(self, connect, name='', min_size=0, max_size=10, timeout=10,
+                 health_check_interval=30, max_lifetime=None):
+        self.pid = os.getpid()
+        self.name = name
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.max_lifetime = max_lifetime
+
+        self._connect = connect
+        self._idle = collections.deque()
+        self._records = {}
+        self._size = 0
+        self._waiting = 0
+        self._filled = False
+        self._condition = threading.Condition()
+        self._counters = collections.Counter(checkouts=0, created=0, discarded=0,
+                                             health_check_failures=0, timeouts=0)
+
+    def getconn(self):
+        self._fill()
+        deadline = time.monotonic() + self.timeout
+        while True:
+            record = self._checkout(deadline)
+            if record is None:
+                return self._create().connection
+            if self._is_usable(record):
+                return record.connection
+            self._discard(record)
+
+    def putconn(self, connection, close=False):
+        record = self._records.get(connection)
+        if record is None:
+            connection.close()
+            return
+        if close or self._is_expired(record) or not self._reset(connection):
+            self._discard(record)
+            return
+        record.last_used = time.monotonic()
+        with self._condition:
+            self._idle.append(record)
+            self._condition.notify()
+
+    def close(self):
+        """
+        Close the idle connections, the ones in use are closed when returned.
+        """
+        with self._condition:
+            idle = list(self._idle)
+            self._idle.clear()
+        for record in idle:
+            self._discard(record)
+
+    def stats(self):
+        with self._condition:
+            return {
+                'name': self.name,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'waiting': self._waiting,
+                **self._counters,
+            }
+
+    def _fill(self):
+        if self._filled:
+            return
+        with self._condition:
+            if self._filled:
+                return
+            self._filled = True
+            missing = max(self.min_size - self._size, 0)
+            self._size += missing
+        for _ in range(missing):
+            try:
+                record = self._create()
+            except Error:
+                # The checkout opens a connection and reports the error
+                continue
+            self.putconn(record.connection)
+
+    def _checkout(self, deadline):
+        """
+        An idle connection record, or None after reserving room for a new one.
+        """
+        with self._condition:
+            while True:
+                if self._idle:
+                    self._counters['checkouts'] += 1
+                    return self._idle.pop()
+                if self._size < self.max_size:
+                    self._size += 1
+                    self._counters['checkouts'] += 1
+                    return None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._counters['timeouts'] += 1
+                    raise PoolTimeout(f'Timed out waiting for a connection of the pool {self.name}')
+                self._waiting += 1
+                try:
+                    self._condition.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+    def _create(self):
+        try:
+            connection = self._connect()
+        except BaseException:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+        record = PooledConnection(connection)
+        with self._condition:
+            self._records[connection] = record
+            self._counters['created'] += 1
+        return record
+
+    def _discard(self, record):
+        try:
+            record.connection.close()
+        except Error:
+            pass
+        with self._condition:
+            self._records.pop(record.connection, None)
+            self._size -= 1
+            self._counters['discarded'] += 1
+            self._condition.notify()
+
+    def _is_expired(self, record):
+        return self.max_lifetime is not None and \
+               time.monotonic() - record.created > self.max_lifetime
+
+    def _is_usable(self, record):
+        if record.connection.closed or self._is_expired(record):
+            return False
+        if time.monotonic() - record.last_used < self.health_check_interval:
+            return True
+        try:
+            with record.connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            return self._reset(record.connection)
+        except Error:
+            self._counters['health_check_failures'] += 1
+            return False
+
+    @staticmethod
+    def _reset(connection):
+        """
+        Roll back any open transaction, False if the connection is not reusable.
+        """
+        if connection.closed:
+            return False
+        status = connection.get_transaction_status()
+        if status == extensions.TRANSACTION_STATUS_IDLE:
+            return True
+        if status in (extensions.TRANSACTION_STATUS_INTRANS, extensions.TRANSACTION_STATUS_INERROR):
+            try:
+                connection.rollback()
+                return True
+            except Error:
+                return False
+        return False
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key, **options):
+    """
+    Pool of the current process for `key`. Pools inherited from a parent
+    process (fork) are replaced, their connections belong to the parent.
+    """
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool.pid != os.getpid():
+            pool = _pools[key] = ConnectionPool(**options)
+        return pool
+
+
+def pool_stats():
+    """
+    Statistics of the connection pools of the current process.
+    """
+    with _pools_lock:
+        pools = [pool for pool in _pools.values() if pool.pid == os.getpid()]
+    return [pool.stats() for pool in pools]
@@ -0,0 +1,80 @@
+import asyncio
+
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.core.handlers.asgi import ASGIHandler
+
+
+class ThreadPoolASGIHandler(ASGIHandler):
+    """
+    ASGI handler that runs the (synchronous) views in a bounded pool of
+    `settings.ASGI_THREADS` threads, so one process keeps that many requests
+    (e.g. slow geo searches) in flight while the event loop keeps accepting
+    connections. Requests beyond it wait in the executor queue.
+
+    Database connections are closed (returned to the pool) by the thread
+    that used them, as soon as the response is ready.
+    """
+    executor = None
+
+    async def get_response(self, request):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=settings.ASGI_THREADS,
+                                               thread_name_prefix='asgi-view')
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, self.get_response_in_thread, request)
+
+    def get_response_in_thread(self, request):
+        close_old_connections()
+        response = super().get_response(request)
+        # Streaming responses may still query the database while they are sent
+        if not response.streaming:
+            close_old_connections()
+        return response
+
+
+class ProtocolRouter:
+    """
+    ASGI application dispatching connections by scope type (`http`,
+    `websocket`), and answering the server lifespan events. The
+    `on_shutdown` coroutine functions are awaited before the server stops.
+    """
+    def __init__(self, on_shutdown=(), **applications):
+        self.applications = applications
+        self.on_shutdown = on_shutdown
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] not in self.applications:
+            raise ValueError(f'No application for {scope["type"]} connections')
+        return await self.applications[scope['type']](scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                for callback in self.on_shutdown:
+                    await callback()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+class PathRouter:
+    """
+    ASGI application dispatching HTTP connections by path: to the first
+    (regex, application) route matching it, or else to `default`.
+    """
+    def __init__(self, routes, default):
+        self.routes = routes
+        self.default = default
+
+    async def __call__(self, scope, receive, send):
+        for regex, application in self.routes:
+            if regex.match(scope['path']):
+                return await application(scope, receive, send)
+        return await self.default(scope, receive, send)
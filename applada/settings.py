@@ -38,6 +38,18 @@ DB_PORT = os.getenv('DB_PORT', '5432')
 DB_NAME = os.getenv('DB_NAME', 'applada')
 DB_USER = os.getenv('DB_USER', 'postgres')
 DB_PASS = os.getenv('DB_PASS', 'postgres')
+DB_POOL = os.getenv('DB_POOL', 'True') != 'False'
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE') or 1)
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT') or 10)
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE') or 0)
+
+# Threads running the views of each ASGI process (applada/asgi.py). The pool of
+# each process has a connection per thread by default, so the threads do not
+# wait for connections (and fail with PoolTimeout) under slow queries. Mind the
+# PostgreSQL max_connections: workers * DB_POOL_MAX_SIZE, plus 2 per worker for
+# the chat broker
+ASGI_THREADS = int(os.getenv('ASGI_THREADS') or 10)
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE') or ASGI_THREADS)
 
 ALLOWED_HOSTS = [API_HOST]
 
@@ -55,7 +67,9 @@ INSTALLED_APPS = [
     'api_v1'
 ]
 
-MIDDLEWARE = [
+FULL_MIDDLEWARE = [
+    'api_v1.metrics.MetricsMiddleware',
+    'api_v1.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -67,57 +81,87 @@ MIDDLEWARE = [
     'api_v1.middleware.NotFoundMiddleware'
 ]
 
-# LOGGING = {
-# 	'version': 1,
-# 	'disable_existing_loggers': False,
-# 	'filters': {
-# 		'require_debug_false': {
-# 			'()': 'django.utils.log.RequireDebugFalse',
-# 		},
-# 		'require_debug_true': {
-# 			'()': 'django.utils.log.RequireDebugTrue',
-# 		},
-# 	},
-# 	'formatters': {
-# 		'django.server': {
-# 			'()': 'django.utils.log.ServerFormatter',
-# 			'format': '[%(server_time)s] %(message)s',
-# 		}
-# 	},
-# 	'handlers': {
-# 		'console': {
-# 			'level': 'INFO',
-# 			'filters': ['require_debug_true'],
-# 			'class': 'logging.StreamHandler',
-# 		},
-# 		'console_debug_false': {
-# 			'level': 'ERROR',
-# 			'filters': ['require_debug_false'],
-# 			'class': 'logging.StreamHandler',
-# 		},
-# 		'django.server': {
-# 			'level': 'INFO',
-# 			'class': 'logging.StreamHandler',
-# 			'formatter': 'django.server',
-# 		},
-# 		'mail_admins': {
-# 			'level': 'ERROR',
-# 			'filters': ['require_debug_false'],
-# 			'class': 'django.utils.log.AdminEmailHandler'
-# 		}
-# 	},
-# 	'loggers': {
-# 		'django': {
-# 			'handlers': ['console', 'console_debug_false'],
-# 			'level': 'INFO',
-# 		},
-# 		'django.server': {
-# 			'handlers': ['django.server'],
-# 			'level': 'INFO',
-# 			'propagate': False,
-# 		}
-# 	}
-# }
+# Lean API middleware: session, CSRF, authentication, messages and clickjacking
+# middlewares run only outside API_PATH_PREFIX (e.g. for the admin)
+API_PATH_PREFIX = '/v1/'
+LEAN_API_MIDDLEWARE = os.getenv('LEAN_API_MIDDLEWARE', 'True') != 'False'
+API_EXEMPT_MIDDLEWARE = {
+    'django.contrib.sessions.middleware.SessionMiddleware': 'api_v1.middleware.APIExemptSessionMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware': 'api_v1.middleware.APIExemptCsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware': 'api_v1.middleware.APIExemptAuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware': 'api_v1.middleware.APIExemptMessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware': 'api_v1.middleware.APIExemptXFrameOptionsMiddleware',
+}
+
+if LEAN_API_MIDDLEWARE:
+    MIDDLEWARE = [API_EXEMPT_MIDDLEWARE.get(m, m) for m in FULL_MIDDLEWARE]
+else:
+    MIDDLEWARE = FULL_MIDDLEWARE
+
+LOGGING = {
+	'version': 1,
+	'disable_existing_loggers': False,
+	'filters': {
+		'require_debug_false': {
+			'()': 'django.utils.log.RequireDebugFalse',
+		},
+		'require_debug_true': {
+			'()': 'django.utils.log.RequireDebugTrue',
+		},
+	},
+	'formatters': {
+		'django.server': {
+			'()': 'django.utils.log.ServerFormatter',
+			'format': '[%(server_time)s] %(message)s',
+		},
+		'json': {
+			'()': 'api_v1.profiling.formatters.JSONFormatter',
+		}
+	},
+	'handlers': {
+		'console': {
+			'level': 'INFO',
+			'filters': ['require_debug_true'],
+			'class': 'logging.StreamHandler',
+		},
+		'console_debug_false': {
+			'level': 'ERROR',
+			'filters': ['require_debug_false'],
+			'class': 'logging.StreamHandler',
+		},
+		'django.server': {
+			'level': 'INFO',
+			'class': 'logging.StreamHandler',
+			'formatter': 'django.server',
+		},
+		'json': {
+			'level': 'INFO',
+			'class': 'logging.StreamHandler',
+			'formatter': 'json',
+		},
+		'mail_admins': {
+			'level': 'ERROR',
+			'filters': ['require_debug_false'],
+			'class': 'django.utils.log.AdminEmailHandler'
+		}
+	},
+	'loggers': {
+		'django': {
+			'handlers': ['console', 'console_debug_false'],
+			'level': 'INFO',
+		},
+		'django.server': {
+			'handlers': ['django.server'],
+			'level': 'INFO',
+			'propagate': False,
+		},
+		'api_v1.profiling': {
+			'handlers': ['json'],
+			'level': 'INFO',
+			'propagate': False,
+		}
+	}
+}
 
 
 ROOT_URLCONF = 'applada.urls'
@@ -152,30 +196,106 @@ NOSE_ARGS = ['--with-spec', '--spec-color', '--rednose']
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.contrib.gis.db.backends.postgis',
+        # Pooled PostGIS backend, connections are returned to the pool at the end of each request
+        'ENGINE': 'applada.backends.postgis_pool' if DB_POOL else 'django.contrib.gis.db.backends.postgis',
         'NAME': DB_NAME,
         'USER': DB_USER,
         'PASSWORD': DB_PASS,
         'HOST': DB_HOST,
         'PORT': DB_PORT,
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'POOL': {
+            'MIN_SIZE': DB_POOL_MIN_SIZE,
+            'MAX_SIZE': DB_POOL_MAX_SIZE,
+            'TIMEOUT': DB_POOL_TIMEOUT,
+        },
     }
 }
 
+# Request profiling (api_v1.profiling): a SAMPLE_RATE fraction of the requests
+# is profiled and logged to the 'api_v1.profiling' logger (JSON lines), with a
+# Server-Timing header if SERVER_TIMING is enabled
+
+PROFILING = {
+    'SAMPLE_RATE': float(os.getenv('PROFILING_SAMPLE_RATE') or 0.01),
+    'SERVER_TIMING': (os.getenv('PROFILING_SERVER_TIMING') or str(DEBUG)) != 'False',
+}
+
+# Metrics (api_v1.metrics) exposed at /metrics. With gunicorn, the metrics of
+# all the workers are aggregated through the files of prometheus_multiproc_dir
+# (applada/gunicorn.conf.py). TOKEN is required as Bearer token, without it
+# /metrics is only served in DEBUG mode.
+
+METRICS = {
+    'TOKEN': os.getenv('METRICS_TOKEN') or None,
+    'PROCESS_STATS_INTERVAL': 5,  # seconds, connection pool and tile cache statistics
+}
+
+# Maximum usernames of a bulk match subscription or unsubscription request
+
+MATCH_SUBSCRIPTIONS_BULK_MAX_SIZE = 100
+
+# Maximum ids of a match batch request (matches/batch?ids=)
+
+MATCH_BATCH_MAX_SIZE = 100
+
+# Match chat (api_v1.chat). The broker delivers the chat messages and the match
+# feed events to the clients of every worker process (PostgreSQL LISTEN/NOTIFY),
+# 'api_v1.chat.InProcessBroker' only works with a single worker process.
+
+CHAT_BROKER = 'api_v1.chat.PostgresBroker'
+CHAT_BATCH_SIZE = 100
+CHAT_FLUSH_INTERVAL = 0.2  # seconds
+CHAT_MESSAGE_MAX_LENGTH = 1000
+
+# Match feed (api_v1.feed)
+
+FEED_CELL_SIZE = 0.1  # degrees, cells of the listeners spatial index
+FEED_HEARTBEAT_INTERVAL = 15  # seconds
+
+# Geohash tile cache of the match location search (api_v1.geocache), None
+# disables it. Each worker process has its own tiles, the invalidated tiles
+# are dropped in every process through the broker (CHAT_BROKER), or up to
+# 'timeout' seconds later if the notification is lost. Otherwise,
+# 'api_v1.geocache.DjangoTileBackend' shares the tiles through a Django cache
+# (OPTIONS: alias, timeout), which must be shared by the processes as well
+# (memcached, redis).
+
+GEO_TILE_CACHE = {
+    'BACKEND': 'api_v1.geocache.LRUTileBackend',
+    'OPTIONS': {'max_size': 10000, 'timeout': 30},
+    'MAX_TILES': 9,
+    'MAX_CANDIDATES': 1000,
+}
+
 # Rest Framework
 
 REST_FRAMEWORK = {
     'EXCEPTION_HANDLER': 'api_v1.core.core_exception_handler',
     'DATETIME_FORMAT': '%Y-%m-%d %H:%M:%S',
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api_v1.core.StatelessJWTAuthentication',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'api_v1.core.FastJSONRenderer',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
+    'DEFAULT_PARSER_CLASSES': [
+        'api_v1.core.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'api_v1.core.KeysetPagination',
     'PAGE_SIZE': 20,
 }
 
+# JSON backend of the API renderer and parser (api_v1.core.json_backends):
+# 'orjson', or 'json' (standard library, also used if orjson is not installed)
+API_JSON_BACKEND = os.getenv('API_JSON_BACKEND') or 'orjson'
+
+# Read-only requests trust the access token claims (api_v1.core.StatelessJWTAuthentication),
+# so a token keeps read access for its lifetime after a password change or after
+# the user is deactivated: keep it short.
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=15)
 }